@@ -1,21 +1,24 @@
-### THIS IS ONLY PLACEHOLDER, WE STILL HAVE TO MAKE THE ACTUAL ANALYSIS THINGE ###
-### THIS PRINTS THE FEEDS FROM THE RSS FETCHER ###
+### ANALYSIS WORKERS: RSS FETCH PROCESS -> BOUNDED QUEUE -> LLM ANALYSIS -> STORAGE ###
+### Ctrl+C (or SIGTERM) stops the fetcher, finishes the queued items and exits ###
+### GEOPULSE_ANALYSIS_WORKERS sets the LLM parallelism; every polling cycle prints its throughput ###
 
-import multiprocessing
+import os
+import signal
+import sys
+import threading
 
-def analyze_data(queue):
-    while True:
-        if not queue.empty():
-            data = queue.get()
-            print("Analyzing data:", data)
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion.workers import WorkerPipeline
 
 if __name__ == "__main__":
-    print("Starting analysis worker...")
-    queue = multiprocessing.Queue()
-    process = multiprocessing.Process(target=analyze_data, args=(queue,))
-    process.start()
+    print("Starting analysis workers...")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    pipeline = WorkerPipeline()
     try:
-        while True:
-            pass  # Keep the script running
+        pipeline.run_forever(stop, report_interval=float(os.getenv("GEOPULSE_QUEUE_REPORT_S", "60")))
     except (KeyboardInterrupt, SystemExit):
-        process.terminate()
\ No newline at end of file
+        pass
+    print(f"Analysis workers stopped: {pipeline.get_stats()}")
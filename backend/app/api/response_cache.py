@@ -0,0 +1,99 @@
+"""
+Serialized response cache for polled list endpoints.
+
+Entries hold the encoded JSON body and an ETag for one (route, params) key,
+tagged with the repository version they were built from. Any write bumps
+the version, which invalidates every entry; until then, polls are answered
+from memory, and clients that send a matching If-None-Match get a 304.
+ETags are a hash of the body rather than the version, so they stay valid
+across restarts (the memory backend's version restarts at 0) and agree
+between worker processes sharing one store.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+
+class ResponseCache:
+    """Small LRU of (version, etag, body) keyed by route and query parameters."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable, version: int) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) for `key` if it is cached at `version`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def get_or_build(self, key: Hashable, version: int, build: Callable[[], bytes]) -> Tuple[str, bytes]:
+        """
+        Return (etag, body) for `key`, rebuilding it if the store version moved on.
+
+        Args:
+            key: Route name plus the query parameters that shape the body
+            version: Current repository version
+            build: Produces the serialized body on a miss
+        """
+        cached = self.lookup(key, version)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+
+        body = build()
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (possibly a list, possibly weak) against an ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def cached_json_response(
+    request: Request,
+    cache: ResponseCache,
+    key: Hashable,
+    version: int,
+    build: Callable[[], bytes],
+) -> Response:
+    """
+    Serve a cached JSON body, or a 304 if the client already has this version.
+    Misses are built on the threadpool so a slow query never blocks the event loop.
+    """
+    cached = cache.lookup(key, version)
+    etag, body = cached if cached is not None else await run_in_threadpool(cache.get_or_build, key, version, build)
+    # no-cache makes browsers revalidate every poll instead of reusing a stale copy
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
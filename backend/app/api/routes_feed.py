@@ -1,19 +1,29 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 import random
 from typing import Optional
 
 from app.storage.models import (
     EventsResponse,
+    SearchResponse,
     ValidationResponse,
     AnalyzeRequest,
+    SeverityEnum,
+    MarketPressureEnum,
 )
 from app.storage import repository
+from app.storage.loader import dumps
+from app.api.response_cache import ResponseCache, cached_json_response
 from app.intelligence.pipeline import analyze_text
 from app.correlator.pipeline import validate_prediction
+from app.ingestion.feed_metrics import FeedMetrics
 
 router = APIRouter()
 
+# Serialized /api/events and /api/validations bodies, invalidated by any store write
+response_cache = ResponseCache()
+
 @router.get("/")
 async def root():
     return {
@@ -24,28 +34,75 @@ async def root():
 
 
 @router.get("/api/events", response_model=EventsResponse)
-async def get_events(limit: int = Query(10, ge=1, le=50)):
-    """Get latest events sorted by timestamp (newest first)."""
-    sorted_events = sorted(
-        repository.events_store,
-        key=lambda x: x.get("timestamp", ""),
-        reverse=True,
-    )[:limit]
-    return {"status": "success", "data": sorted_events}
+async def get_events(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    ticker: Optional[str] = Query(None, min_length=1, max_length=10),
+    source: Optional[str] = Query(None, min_length=1),
+    severity: Optional[SeverityEnum] = None,
+    market_pressure: Optional[MarketPressureEnum] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = Query(None, max_length=200),
+):
+    """
+    Get latest events sorted by timestamp (newest first), optionally filtered
+    to a [from, to) time range. Pass next_cursor back as ?cursor= to page
+    through older events. Responses carry an ETag; a matching If-None-Match
+    returns 304.
+    """
+    if cursor is not None:
+        try:
+            repository.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    filters = {
+        "ticker": ticker,
+        "source": source,
+        "severity": severity.value if severity else None,
+        "market_pressure": market_pressure.value if market_pressure else None,
+    }
+
+    def build() -> bytes:
+        # One extra row tells us whether another page exists
+        events = repository.query_events(limit + 1, **filters, start=start, end=end, cursor=cursor)
+        next_cursor = repository.encode_cursor(events[limit - 1]) if len(events) > limit else None
+        # Stored events were validated on ingest; serialize them directly
+        return dumps({"status": "success", "data": events[:limit], "next_cursor": next_cursor})
+
+    key = ("events", limit, *filters.values(), start, end, cursor)
+    return await cached_json_response(request, response_cache, key, repository.get_version(), build)
+
+
+@router.get("/api/search", response_model=SearchResponse)
+async def search_events(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+):
+    """
+    Full-text search over headlines and analysis text, ranked by relevance.
+    All terms must match; end a term with * for a prefix match (e.g. infl*).
+    """
+    def build() -> bytes:
+        results = repository.search_events(q, limit)
+        data = [{"score": round(score, 4), "event": event} for event, score in results]
+        return dumps({"status": "success", "query": q, "data": data})
+
+    key = ("search", q, limit)
+    return await cached_json_response(request, response_cache, key, repository.get_version(), build)
 
 
 @router.get("/api/events/{event_id}")
 async def get_event(event_id: str):
     """Get a specific event by ID."""
-    event = next((e for e in repository.events_store if e.get("event_id") == event_id), None)
+    event = repository.get_event_by_id(event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Include validation info if available
-    validation = next(
-        (v for v in repository.validations_store if v.get("event_id") == event_id),
-        None,
-    )
+    validation = repository.get_validation_by_event_id(event_id)
     
     return {
         "status": "success",
@@ -55,14 +112,26 @@ async def get_event(event_id: str):
 
 
 @router.get("/api/validations", response_model=ValidationResponse)
-async def get_validations(limit: int = Query(20, ge=1, le=100)):
-    """Get validation results."""
-    sorted_validations = sorted(
-        repository.validations_store,
-        key=lambda x: x.get("validated_at", ""),
-        reverse=True,
-    )[:limit]
-    return {"status": "success", "data": sorted_validations}
+async def get_validations(request: Request, limit: int = Query(20, ge=1, le=100)):
+    """Get validation results. Supports If-None-Match like /api/events."""
+    def build() -> bytes:
+        validations = repository.get_latest_validations(limit)
+        return dumps({"status": "success", "data": validations})
+
+    key = ("validations", limit)
+    return await cached_json_response(request, response_cache, key, repository.get_version(), build)
+
+
+@router.get("/api/stats")
+async def get_stats(request: Request):
+    """
+    Event and validation aggregates (counts by severity, sentiment and source;
+    accuracy per ticker and horizon). Maintained on write, so this never scans.
+    """
+    def build() -> bytes:
+        return dumps({"status": "success", "data": repository.get_rollups()})
+
+    return await cached_json_response(request, response_cache, ("stats",), repository.get_version(), build)
 
 
 @router.get("/api/validate/{event_id}")
@@ -141,15 +210,18 @@ async def analyze_news(request: AnalyzeRequest):
     """
     try:
         # Use Intelligence Layer with optional additional_text
-        event = analyze_text(
+        # The LLM call blocks, so keep it off the event loop
+        event = await run_in_threadpool(
+            analyze_text,
             headline=request.headline, 
             source=request.source, 
             timestamp=request.timestamp,
-            additional_text=request.text  # Pass full article text if provided
+            additional_text=request.text,  # Pass full article text if provided
+            related_sources=[related.model_dump() for related in request.related_sources]
         )
         
-        # Add to store with validation
-        repository.add_event(event, validate=True)
+        # Add to store with validation (the stored copy has the final event_id)
+        event = repository.add_event(event, validate=True)
         
         return {"status": "success", "data": event}
         
@@ -179,16 +251,17 @@ async def analyze_news_batch(requests: list[AnalyzeRequest]):
     for idx, request in enumerate(requests):
         try:
             # Use Intelligence Layer
-            event = analyze_text(
+            event = await run_in_threadpool(
+                analyze_text,
                 headline=request.headline,
                 source=request.source,
                 timestamp=request.timestamp,
-                additional_text=request.text
+                additional_text=request.text,
+                related_sources=[related.model_dump() for related in request.related_sources]
             )
             
-            # Add to store with validation
-            repository.add_event(event, validate=True)
-            results.append(event)
+            # Add to store with validation (the stored copy has the final event_id)
+            results.append(repository.add_event(event, validate=True))
             
         except Exception as e:
             errors.append({
@@ -240,11 +313,41 @@ async def get_llm_status():
     }
 
 
+@router.get("/api/ingestion/stats")
+async def get_ingestion_stats(request: Request):
+    """
+    Background ingestion runner status: queue depth, analysis counts, and
+    per-cycle throughput and publish-to-stored latency.
+    Enabled with GEOPULSE_RUN_INGESTION=1.
+    """
+    runner = getattr(request.app.state, "ingestion", None)
+    if runner is None:
+        return {"status": "disabled", "data": None}
+    return {"status": "success", "data": runner.get_stats()}
+
+
+@router.get("/api/ingestion/feeds")
+async def get_ingestion_feeds(
+    sort: str = Query("latency", pattern="^(latency|failures|url)$"),
+):
+    """
+    Per-feed health over each feed's recent fetches: latency, bytes, HTTP
+    status, entries, new vs duplicate items and consecutive failures.
+    sort=latency lists the slowest feeds first, sort=failures the failing ones.
+    """
+    # Written by the fetchers after every cycle, wherever they run
+    table = await run_in_threadpool(lambda: FeedMetrics().get_table(sort))
+    return {"status": "success", "data": table}
+
+
 @router.get("/api/health")
 async def health_check():
+    stats = repository.get_stats()
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "events_count": len(repository.events_store),
-        "validations_count": len(repository.validations_store),
+        "events_count": stats["events_count"],
+        "validations_count": stats["validations_count"],
+        "storage_load": repository.get_load_report(),
+        "storage_persistence": repository.get_persistence_stats(),
     }
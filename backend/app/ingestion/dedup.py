@@ -0,0 +1,213 @@
+"""
+Persistent dedup index for ingested items.
+
+Each item is reduced to a 64-bit hash of its normalized (headline, source)
+and appended to a binary file (8 bytes per item), so the index survives
+restarts and loading it is a single read. Lookups cost O(1) per item, so
+deduplicating a batch depends on the batch size, not the history length.
+
+For very large histories the exact in-memory set can be replaced by a
+Bloom filter (about 1.2 bytes per item at a 1% false-positive rate). A
+Bloom negative proves an item is new; a positive must be confirmed
+elsewhere (the pipeline asks the repository).
+
+Items are indexed once their event is stored (record_stored, called by
+the analysis workers), so an item that is dropped or fails analysis is
+picked up again. The fetch side reads hashes appended since it loaded
+the file with refresh().
+"""
+
+import hashlib
+import math
+import os
+import re
+import sys
+import threading
+from array import array
+from typing import Iterable, Optional
+
+DATA_DIR = os.getenv(
+    "GEOPULSE_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data"),
+)
+DEDUP_INDEX_PATH = os.getenv("GEOPULSE_DEDUP_INDEX_PATH", os.path.join(DATA_DIR, "dedup_index.bin"))
+# Expected history size for the Bloom filter; 0 keeps an exact set instead
+DEDUP_BLOOM_CAPACITY = int(os.getenv("GEOPULSE_DEDUP_BLOOM_CAPACITY", "0"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def content_hash(headline: str, source: str) -> int:
+    """64-bit hash of an item, ignoring case and whitespace differences."""
+    normalized = "\x1f".join(
+        _WHITESPACE_RE.sub(" ", (part or "").strip()).casefold() for part in (headline, source)
+    )
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def append_hashes(path: str, key_hashes: array) -> None:
+    """Append hashes to an index file in one write (small O_APPEND writes don't interleave)."""
+    if sys.byteorder != "little":
+        key_hashes = array("Q", key_hashes)
+        key_hashes.byteswap()
+    try:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(key_hashes.tobytes())
+    except OSError as e:
+        print(f"⚠ Failed to persist dedup index: {e}")
+
+
+def record_stored(headline: str, source: str, path: Optional[str] = DEDUP_INDEX_PATH) -> None:
+    """Index an item whose event has been stored, for every pipeline reading `path`."""
+    if path:
+        append_hashes(path, array("Q", [content_hash(headline, source)]))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit hashes (double hashing on the two 32-bit halves)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key_hash: int):
+        h1 = key_hash & 0xFFFFFFFF
+        h2 = (key_hash >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key_hash: int) -> None:
+        for pos in self._positions(key_hash):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key_hash: int) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key_hash))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class DedupIndex:
+    """Append-only, file-backed set of item hashes with an optional Bloom filter mode."""
+
+    def __init__(self, path: Optional[str] = DEDUP_INDEX_PATH, bloom_capacity: int = DEDUP_BLOOM_CAPACITY):
+        """
+        Args:
+            path: Index file (None keeps the index in memory only)
+            bloom_capacity: If > 0, hold a Bloom filter sized for this many
+                items instead of the exact set (grown to twice the stored
+                history if that is larger)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Bytes of the file read so far; later appends are picked up by refresh()
+        self._offset = 0
+        self._truncate_torn_tail()
+        stored = self._read_file()
+        self.bloom: Optional[BloomFilter] = None
+        self._hashes: set = set()
+        if bloom_capacity > 0:
+            self.bloom = BloomFilter(max(bloom_capacity, 2 * len(stored)))
+            for key_hash in stored:
+                self.bloom.add(key_hash)
+        else:
+            self._hashes = set(stored)
+        self.loaded = len(stored)
+
+    def _truncate_torn_tail(self) -> None:
+        """
+        Drop a partial trailing record left by an interrupted append, so
+        later appends stay aligned on record boundaries.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        torn = size % array("Q").itemsize
+        if torn:
+            try:
+                os.truncate(self.path, size - torn)
+                print(f"⚠ Dropped a torn {torn}-byte record from {self.path}")
+            except OSError as e:
+                print(f"⚠ Failed to truncate dedup index: {e}")
+
+    def _read_file(self) -> array:
+        """Read the records appended since the last read."""
+        hashes = array("Q")
+        if not self.path or not os.path.exists(self.path):
+            return hashes
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Leave a record still being written by another process for the next read
+        data = data[:len(data) - len(data) % hashes.itemsize]
+        self._offset += len(data)
+        hashes.frombytes(data)
+        if sys.byteorder != "little":
+            hashes.byteswap()
+        return hashes
+
+    def lookup(self, key_hash: int) -> Optional[bool]:
+        """
+        Check a hash against the index.
+
+        Returns:
+            True if the item was indexed, False if it certainly was not
+            (Bloom mode), or None if the index can't tell: a Bloom positive,
+            or an exact-set miss for an item that may have been stored
+            without going through ingestion.
+        """
+        with self._lock:
+            if self.bloom is not None:
+                return None if key_hash in self.bloom else False
+            return True if key_hash in self._hashes else None
+
+    def refresh(self) -> int:
+        """
+        Index hashes appended to the file by other writers (e.g. the analysis workers).
+
+        Returns:
+            Number of records read
+        """
+        with self._lock:
+            appended = self._read_file()
+            for key_hash in appended:
+                if self.bloom is not None:
+                    # Our own appends come back too; don't count them twice
+                    if key_hash not in self.bloom:
+                        self.bloom.add(key_hash)
+                else:
+                    self._hashes.add(key_hash)
+        return len(appended)
+
+    def add_many(self, key_hashes: Iterable[int]) -> None:
+        """Index new hashes and append them to the file in one write."""
+        new = array("Q")
+        with self._lock:
+            for key_hash in key_hashes:
+                if self.bloom is not None:
+                    self.bloom.add(key_hash)
+                elif key_hash in self._hashes:
+                    continue
+                else:
+                    self._hashes.add(key_hash)
+                new.append(key_hash)
+        if new and self.path:
+            append_hashes(self.path, new)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.bloom) if self.bloom is not None else len(self._hashes)
+
+    def get_stats(self) -> dict:
+        stats = {"mode": "bloom" if self.bloom is not None else "exact", "items": len(self), "loaded": self.loaded}
+        if self.bloom is not None:
+            stats["bloom_bytes"] = len(self.bloom._bits)
+            stats["bloom_capacity"] = self.bloom.capacity
+        return stats
@@ -0,0 +1,196 @@
+"""
+Rolling per-feed ingestion metrics.
+
+Every fetch of a feed leaves a record: outcome, latency, bytes, HTTP
+status, entries parsed, and how many of them were new versus duplicates.
+The last few records per feed, plus failure counters, make up a health
+table that shows which feeds are slow or failing cycle after cycle.
+
+The table is written to JSON after each fetch cycle (like the feed
+state), so the API can serve it whether the fetchers run inside the
+server or in their own processes.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+DATA_DIR = os.getenv(
+    "GEOPULSE_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data"),
+)
+FEED_METRICS_PATH = os.getenv("GEOPULSE_FEED_METRICS_PATH", os.path.join(DATA_DIR, "feed_metrics.json"))
+# Fetch records kept per feed
+FEED_METRICS_WINDOW = int(os.getenv("GEOPULSE_FEED_METRICS_WINDOW", "20"))
+
+FAILED_STATUSES = ("failed", "timed_out")
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class FeedMetrics:
+    """Thread-safe {feed_url: recent fetch records and failure counters}, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = FEED_METRICS_PATH, window: int = FEED_METRICS_WINDOW):
+        """
+        Args:
+            path: JSON file to load from and save to (None keeps metrics in memory only)
+            window: Fetch records kept per feed
+        """
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, dict] = {}
+        self._dirty = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._feeds = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable feed metrics {path}: {e}")
+
+    def _feed(self, feed_url: str) -> dict:
+        return self._feeds.setdefault(feed_url, {
+            "recent": [],
+            "fetches": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "last_error": None,
+            "last_success_at": None,
+        })
+
+    def record_fetch(
+        self,
+        feed_url: str,
+        status: str,
+        latency_ms: float,
+        bytes_downloaded: int = 0,
+        http_status: Optional[int] = None,
+        entries: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record one fetch of a feed.
+
+        Args:
+            status: "ok", "unchanged", "failed" or "timed_out"
+            latency_ms: Download (and parse) time; for timeouts, the time waited
+            http_status: Response status (None if no response arrived)
+            entries: Entries parsed from the feed
+            error: Failure message
+        """
+        record = {
+            "at": time.time(),
+            "status": status,
+            "latency_ms": round(latency_ms, 1),
+            "bytes": bytes_downloaded,
+            "http_status": http_status,
+            "entries": entries,
+            "new": 0,
+            "duplicates": 0,
+        }
+        with self._lock:
+            feed = self._feed(feed_url)
+            feed["recent"] = (feed["recent"] + [record])[-self.window:]
+            feed["fetches"] += 1
+            if status in FAILED_STATUSES:
+                feed["failures"] += 1
+                feed["consecutive_failures"] += 1
+                feed["last_error"] = error or status
+            else:
+                feed["consecutive_failures"] = 0
+                feed["last_success_at"] = record["at"]
+            self._dirty.add(feed_url)
+
+    def record_dedup(self, feed_url: str, new: int, duplicates: int) -> None:
+        """Attach dedup results to the feed's latest fetch record."""
+        with self._lock:
+            feed = self._feeds.get(feed_url)
+            if not feed or not feed["recent"]:
+                return
+            feed["recent"][-1]["new"] = new
+            feed["recent"][-1]["duplicates"] = duplicates
+            self._dirty.add(feed_url)
+
+    @staticmethod
+    def _row(feed_url: str, feed: dict) -> dict:
+        recent = feed["recent"]
+        last = recent[-1] if recent else {}
+        # Latency of feeds that answered; timeouts would only report the deadline
+        latencies = sorted(r["latency_ms"] for r in recent if r["status"] not in FAILED_STATUSES)
+        new = sum(r["new"] for r in recent)
+        duplicates = sum(r["duplicates"] for r in recent)
+        return {
+            "feed_url": feed_url,
+            "fetches": feed["fetches"],
+            "failures": feed["failures"],
+            "consecutive_failures": feed["consecutive_failures"],
+            "last_status": last.get("status"),
+            "last_http_status": last.get("http_status"),
+            "last_error": feed["last_error"],
+            "last_fetch_at": last.get("at"),
+            "last_success_at": feed["last_success_at"],
+            "latency_ms": {
+                "last": last.get("latency_ms"),
+                "avg": round(sum(latencies) / len(latencies), 1),
+                "p95": _percentile(latencies, 0.95),
+            } if latencies else None,
+            "avg_bytes": round(sum(r["bytes"] for r in recent) / len(recent)) if recent else 0,
+            "entries_last": last.get("entries", 0),
+            "new": new,
+            "duplicates": duplicates,
+            "duplicate_ratio": round(duplicates / (new + duplicates), 3) if new + duplicates else None,
+        }
+
+    def get_table(self, sort: str = "latency") -> List[dict]:
+        """
+        One row per feed over its recent window.
+
+        Args:
+            sort: "latency" (slowest average first), "failures" (most
+                consecutive failures first) or "url"
+        """
+        with self._lock:
+            rows = [self._row(url, feed) for url, feed in self._feeds.items()]
+        if sort == "failures":
+            rows.sort(key=lambda row: (-row["consecutive_failures"], -row["failures"], row["feed_url"]))
+        elif sort == "latency":
+            rows.sort(key=lambda row: (-(row["latency_ms"] or {}).get("avg", 0.0), row["feed_url"]))
+        else:
+            rows.sort(key=lambda row: row["feed_url"])
+        return rows
+
+    def save(self) -> None:
+        """
+        Write the feeds changed since the last save, atomically.
+
+        Feeds in the file that this instance hasn't touched are kept, so
+        fetch processes polling different feeds can share one file.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            changed = {url: dict(self._feeds[url], recent=list(self._feeds[url]["recent"])) for url in self._dirty}
+            self._dirty = set()
+        try:
+            merged = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    merged = json.load(f)
+            merged.update(changed)
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Failed to save feed metrics: {e}")
+            with self._lock:
+                self._dirty.update(changed)
@@ -0,0 +1,88 @@
+"""
+Per-feed HTTP validators for conditional GETs.
+
+For every feed URL we remember the ETag and Last-Modified values the
+publisher sent, plus a hash of the last body we parsed. The next request
+sends the validators back so an unchanged feed costs a 304 and no
+parsing; feeds without validators are still skipped when the body hash
+matches.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional, Set
+
+DATA_DIR = os.getenv(
+    "GEOPULSE_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data"),
+)
+FEED_STATE_PATH = os.getenv("GEOPULSE_FEED_STATE_PATH", os.path.join(DATA_DIR, "feed_state.json"))
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class FeedStateStore:
+    """Thread-safe {feed_url: {"etag", "modified", "hash"}} map persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = FEED_STATE_PATH):
+        """
+        Args:
+            path: JSON file to load from and save to (None keeps state in memory only)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: Dict[str, dict] = {}
+        # Feeds updated since the last save
+        self._dirty: Set[str] = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable feed state {path}: {e}")
+
+    def get(self, feed_url: str) -> dict:
+        with self._lock:
+            return dict(self._state.get(feed_url, {}))
+
+    def update(self, feed_url: str, etag: Optional[str], modified: Optional[str], content_hash: str) -> None:
+        entry = {"etag": etag, "modified": modified, "hash": content_hash}
+        with self._lock:
+            if self._state.get(feed_url) != entry:
+                self._state[feed_url] = entry
+                self._dirty.add(feed_url)
+
+    def save(self) -> None:
+        """
+        Write the feeds changed since the last save, atomically.
+
+        Feeds in the file that this instance hasn't touched are kept, so
+        fetch processes polling different feeds can share one file.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            changed = {url: dict(self._state[url]) for url in self._dirty}
+            self._dirty = set()
+        try:
+            merged = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    merged = json.load(f)
+            merged.update(changed)
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(merged, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Failed to save feed state: {e}")
+            with self._lock:
+                self._dirty.update(changed)
@@ -1,24 +1,135 @@
 import feedparser
+import multiprocessing
 import os
-import re
-from typing import List, Optional
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+from app.ingestion.feed_metrics import FeedMetrics
+from app.ingestion.feed_state import FeedStateStore, body_hash
+from app.ingestion.normalize import normalize_text
+from app.ingestion.replay import FEED_REPLAY_DIR, FeedReplay
+from app.storage.backend import timestamp_sort_key
 from app.storage.models import AnalyzeRequest
 
-def clean_html(raw_html: str) -> str:
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', raw_html)
-    return cleantext.strip()
+# Feeds downloaded in parallel
+FETCH_WORKERS = int(os.getenv("GEOPULSE_FETCH_WORKERS", "8"))
+# Longest a single feed may take (connect + download)
+FEED_TIMEOUT_S = float(os.getenv("GEOPULSE_FEED_TIMEOUT_S", "10"))
+# Longest a whole fetch_all cycle may take; feeds still running are abandoned
+CYCLE_DEADLINE_S = float(os.getenv("GEOPULSE_FETCH_DEADLINE_S", "30"))
+# Processes parsing downloaded feeds; 0 parses on the download threads instead
+PARSE_WORKERS = int(os.getenv("GEOPULSE_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+USER_AGENT = "GeoPulse/1.0 (+https://github.com/Patrick-ayo/GeoPulse)"
+READ_CHUNK_BYTES = 64 * 1024
+
+def parse_feed(body: bytes, headers: Optional[dict] = None) -> List[tuple]:
+    """
+    Parse a feed body into compact entries.
+
+    Module-level and free of shared state so it can run in a worker
+    process; plain tuples are much cheaper to send back than models.
+
+    Returns:
+        (headline, source, timestamp, text) per entry
+    """
+    feed = feedparser.parse(body, response_headers=headers or {})
+    feed_title = feed.feed.get('title', 'Unknown Source')
+    results = []
+
+    for entry in feed.entries:
+        headline = entry.get('title', 'No Title')
+        # Parse date if available, otherwise use now. feedparser usually returns structured time
+        published_parsed = entry.get('published_parsed')
+        if published_parsed:
+            timestamp = datetime(*published_parsed[:6])
+        else:
+            timestamp = datetime.utcnow()
+
+        # Plain text within the prompt's token budget
+        description = normalize_text(entry.get('description', ''))
+        results.append((headline, feed_title, timestamp, description))
+    return results
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool(workers: int = PARSE_WORKERS) -> ProcessPoolExecutor:
+    """Process pool shared by every fetcher in this process, started on first use."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn, not fork: fetchers run in threaded processes (the API server, the fetch threads)
+            _parse_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+def shutdown_parse_pool(broken: Optional[ProcessPoolExecutor] = None) -> None:
+    """Stop the parse processes (only if the pool is still `broken`, when given)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None or (broken is not None and _parse_pool is not broken):
+            return
+        pool, _parse_pool = _parse_pool, None
+    pool.shutdown(wait=broken is None, cancel_futures=True)
 
 class RSSFetcher:
-    def __init__(self, feeds_file_path: Optional[str] = None):
+    def __init__(
+        self,
+        feeds_file_path: Optional[str] = None,
+        max_workers: int = FETCH_WORKERS,
+        feed_timeout: float = FEED_TIMEOUT_S,
+        cycle_deadline: float = CYCLE_DEADLINE_S,
+        feed_state: Optional[FeedStateStore] = None,
+        parse_workers: int = PARSE_WORKERS,
+        feed_metrics: Optional[FeedMetrics] = None,
+        replay: Optional[FeedReplay] = None,
+    ):
+        """
+        Args:
+            feeds_file_path: Feed list, one URL per line (# for comments)
+            max_workers: Feeds downloaded concurrently
+            feed_timeout: Seconds allowed per feed, connect through last byte
+            cycle_deadline: Seconds allowed for a whole fetch_all() call
+            feed_state: ETag/Last-Modified store for conditional GETs
+                (default: data/feed_state.json)
+            parse_workers: Size of the process pool that parses feeds
+                (shared by all fetchers and sized by the first one to use it;
+                0 parses on the download threads)
+            feed_metrics: Per-feed health table, saved after every cycle
+                (default: data/feed_metrics.json)
+            replay: Download feeds from recorded snapshots instead of the
+                network; the feed list becomes the recorded feeds (default:
+                GEOPULSE_FEED_REPLAY_DIR, if set)
+        """
         if feeds_file_path:
             self.feeds_file = feeds_file_path
         else:
             # Default path relative to this file: backend/app/ingestion/fetcher.py -> ../../config
             self.feeds_file = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'rss_feeds.txt')
+        self.max_workers = max_workers
+        self.feed_timeout = feed_timeout
+        self.cycle_deadline = cycle_deadline
+        self.feed_state = feed_state if feed_state is not None else FeedStateStore()
+        self.parse_workers = parse_workers
+        self.feed_metrics = feed_metrics if feed_metrics is not None else FeedMetrics()
+        if replay is None and FEED_REPLAY_DIR:
+            replay = FeedReplay(FEED_REPLAY_DIR)
+        self.replay = replay
+        self.last_cycle: dict = {}
+        # feed_url -> {"status": "ok" | "unchanged" | "failed" | "timed_out" | "deferred",
+        # "published": [entry publish times (epoch)]} for the feeds in the last cycle
+        self.last_feed_results: Dict[str, dict] = {}
+        # feed_url -> validators of yielded feeds awaiting commit() (iter_fetch(commit=False))
+        self._uncommitted: Dict[str, dict] = {}
 
     def get_feeds_list(self) -> List[str]:
+        if self.replay is not None:
+            return self.replay.feed_urls()
         if not os.path.exists(self.feeds_file):
             print(f"RSS feeds file not found at {self.feeds_file}")
             return []
@@ -26,40 +137,246 @@ class RSSFetcher:
         with open(self.feeds_file, 'r') as file:
             return [line.strip() for line in file if line.strip() and not line.strip().startswith('#')]
 
-    def fetch_all(self) -> List[AnalyzeRequest]:
-        feeds = self.get_feeds_list()
-        results = []
-        
-        for feed_url in feeds:
-            # Skip invalid URLs
-            if not feed_url:
-                continue
-                
-            print(f"Fetching feed: {feed_url}")
+    def download(self, feed_url: str, validators: Optional[dict] = None) -> Optional[tuple]:
+        """
+        Download a feed, enforcing feed_timeout on the whole transfer.
+
+        Args:
+            feed_url: Feed URL
+            validators: {"etag", "modified"} from the previous download, sent
+                as If-None-Match / If-Modified-Since
+
+        Returns:
+            (body bytes, response headers, HTTP status), or None if the
+            server answered 304 Not Modified
+
+        Raises:
+            TimeoutError: If the feed takes longer than feed_timeout
+        """
+        deadline = time.monotonic() + self.feed_timeout
+        headers = {"User-Agent": USER_AGENT}
+        if validators and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("modified"):
+            headers["If-Modified-Since"] = validators["modified"]
+        # In replay mode only the transport changes; the feed keeps its URL everywhere else
+        source_url = self.replay.resolve(feed_url) if self.replay is not None else feed_url
+        request = urllib.request.Request(source_url, headers=headers)
+        try:
+            response = urllib.request.urlopen(request, timeout=self.feed_timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        with response:
+            chunks = []
+            while True:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"feed took longer than {self.feed_timeout}s")
+                chunk = response.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks), dict(response.headers), response.status
+
+    def parse(self, body: bytes, headers: Optional[dict] = None) -> List[AnalyzeRequest]:
+        """
+        Turn a downloaded feed into analysis requests.
+
+        Parsing runs in the parse process pool when there is one, so the
+        pure-Python feedparser work doesn't hold the GIL in this process.
+        """
+        entries = None
+        if self.parse_workers > 0:
+            pool = get_parse_pool(self.parse_workers)
             try:
-                feed = feedparser.parse(feed_url)
-                feed_title = feed.feed.get('title', 'Unknown Source')
-                
-                for entry in feed.entries:
-                    headline = entry.get('title', 'No Title')
-                    # Parse date if available, otherwise use now. feedparser usually returns structured time
-                    published_parsed = entry.get('published_parsed')
-                    if published_parsed:
-                        timestamp = datetime(*published_parsed[:6])
+                entries = pool.submit(parse_feed, body, headers).result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); start a fresh pool next time
+                print(f"⚠ Feed parser pool broke, parsing in-process: {e}")
+                shutdown_parse_pool(broken=pool)
+        if entries is None:
+            entries = parse_feed(body, headers)
+        return [
+            AnalyzeRequest(headline=headline, source=source, timestamp=timestamp, text=text)
+            for headline, source, timestamp, text in entries
+        ]
+
+    def fetch_feed(self, feed_url: str) -> tuple:
+        """
+        Download and parse a single feed, skipping both when it is unchanged.
+
+        The feed state is not updated here: the caller commits the returned
+        validators once the items have been handed on, so a feed whose items
+        are never delivered (abandoned at the deadline) is fetched again.
+
+        Returns:
+            (requests, bytes downloaded, HTTP status, validators), where
+            requests is None if the feed has not changed since the last
+            fetch (a 304, or an identical body), and validators is the new
+            {"etag", "modified", "hash"} state (None after a 304)
+        """
+        previous = self.feed_state.get(feed_url)
+        downloaded = self.download(feed_url, previous)
+        if downloaded is None:
+            return None, 0, 304, None
+        body, headers, http_status = downloaded
+        content_hash = body_hash(body)
+        # Header names keep the server's casing in the dict() copy
+        lowered = {name.lower(): value for name, value in headers.items()}
+        validators = {"etag": lowered.get("etag"), "modified": lowered.get("last-modified"), "hash": content_hash}
+        if content_hash == previous.get("hash"):
+            return None, len(body), http_status, validators
+        return self.parse(body, headers), len(body), http_status, validators
+
+    def _fetch_measured(self, feed_url: str) -> dict:
+        """fetch_feed on a pool thread, timed, with failures captured rather than raised."""
+        started = time.monotonic()
+        outcome = {"requests": None, "bytes": 0, "http_status": None, "validators": None, "error": None}
+        try:
+            (
+                outcome["requests"], outcome["bytes"], outcome["http_status"], outcome["validators"]
+            ) = self.fetch_feed(feed_url)
+        except urllib.error.HTTPError as e:
+            outcome["http_status"] = e.code
+            outcome["error"] = e
+        except Exception as e:
+            outcome["error"] = e
+        outcome["latency_ms"] = (time.monotonic() - started) * 1000
+        return outcome
+
+    def _commit_state(self, feed_url: str, validators: Optional[dict]) -> None:
+        if validators is not None:
+            self.feed_state.update(feed_url, validators["etag"], validators["modified"], validators["hash"])
+
+    def commit(self, feed_urls: List[str]) -> None:
+        """Save the new state of feeds whose items the caller has handed on (see iter_fetch)."""
+        for feed_url in feed_urls:
+            self._commit_state(feed_url, self._uncommitted.pop(feed_url, None))
+        self.feed_state.save()
+
+    def iter_fetch(self, feed_urls: Optional[List[str]] = None, commit: bool = True) -> Iterator[Tuple[str, List[AnalyzeRequest]]]:
+        """
+        Fetch feeds concurrently, yielding each feed's items as soon as it finishes.
+
+        At most max_workers feeds are in flight; the next feed is only
+        started when one completes, so a slow consumer holds back the
+        downloads instead of letting parsed feeds pile up. The cycle ends
+        at cycle_deadline: feeds still downloading are abandoned
+        ("timed_out"), and feeds not yet started are left for the next
+        cycle ("deferred"). Feeds that fail are logged and skipped.
+
+        last_cycle and last_feed_results are complete once the generator
+        is exhausted (or closed).
+
+        Args:
+            feed_urls: Feeds to fetch (default: every feed in the feeds file)
+            commit: Save a yielded feed's state when the consumer resumes;
+                if False the consumer calls commit() once it has handed the
+                items on (e.g. after holding them back)
+
+        Yields:
+            (feed_url, requests) for every changed feed with entries, in
+            completion order
+        """
+        feeds = self.get_feeds_list() if feed_urls is None else list(feed_urls)
+        started = time.monotonic()
+        deadline = started + self.cycle_deadline
+        self.last_feed_results = {}
+        counts = {"succeeded": 0, "unchanged": 0, "failed": 0, "timed_out": 0, "deferred": 0}
+        bytes_downloaded = 0
+        pending = iter(feeds)
+        in_flight: Dict[Future, str] = {}
+        submitted_at: Dict[str, float] = {}
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(feeds))), thread_name_prefix="rss-fetch")
+
+        def submit_next() -> None:
+            feed_url = next(pending, None)
+            if feed_url is not None:
+                submitted_at[feed_url] = time.monotonic()
+                in_flight[pool.submit(self._fetch_measured, feed_url)] = feed_url
+
+        try:
+            for _ in range(self.max_workers):
+                submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    feed_url = in_flight.pop(future)
+                    if time.monotonic() < deadline:
+                        submit_next()
+                    outcome = future.result()
+                    requests = outcome["requests"]
+                    if outcome["error"] is not None:
+                        status = "failed"
+                        counts["failed"] += 1
                     else:
-                        timestamp = datetime.utcnow()
-                    
-                    description = clean_html(entry.get('description', ''))
-                    
-                    # Create AnalyzeRequest object
-                    request = AnalyzeRequest(
-                        headline=headline,
-                        source=feed_title,
-                        timestamp=timestamp,
-                        text=description
+                        status = "ok" if requests is not None else "unchanged"
+                        counts["succeeded"] += 1
+                        if requests is None:
+                            counts["unchanged"] += 1
+                        bytes_downloaded += outcome["bytes"]
+                    self.feed_metrics.record_fetch(
+                        feed_url, status, outcome["latency_ms"], outcome["bytes"], outcome["http_status"],
+                        entries=len(requests or []), error=str(outcome["error"]) if outcome["error"] else None,
                     )
-                    results.append(request)
-            except Exception as e:
-                print(f"Error fetching {feed_url}: {e}")
-                
-        return results
+                    self.last_feed_results[feed_url] = {
+                        "status": status,
+                        "published": [timestamp_sort_key(request.timestamp) for request in requests or []],
+                    }
+                    if not requests:
+                        self._commit_state(feed_url, outcome["validators"])
+                    elif commit:
+                        yield feed_url, requests
+                        # Only now are the items delivered; if the consumer closed the
+                        # generator at the yield, the feed keeps its old state and is refetched
+                        self._commit_state(feed_url, outcome["validators"])
+                    else:
+                        self._uncommitted[feed_url] = outcome["validators"]
+                        yield feed_url, requests
+        finally:
+            # Don't wait for stragglers; their threads finish (or time out) on their own
+            pool.shutdown(wait=False, cancel_futures=True)
+            for feed_url in in_flight.values():
+                counts["timed_out"] += 1
+                self.last_feed_results[feed_url] = {"status": "timed_out", "published": []}
+                self.feed_metrics.record_fetch(
+                    feed_url, "timed_out", (time.monotonic() - submitted_at[feed_url]) * 1000,
+                    error=f"missed the {self.cycle_deadline}s cycle deadline",
+                )
+            for feed_url in pending:
+                counts["deferred"] += 1
+                self.last_feed_results[feed_url] = {"status": "deferred", "published": []}
+            self.feed_state.save()
+            self.feed_metrics.save()
+            self.last_cycle = {
+                "feeds": len(feeds),
+                **counts,
+                "bytes_downloaded": bytes_downloaded,
+                "duration_ms": round((time.monotonic() - started) * 1000, 2),
+            }
+            if counts["unchanged"]:
+                print(f"{counts['unchanged']} of {len(feeds)} feeds unchanged since the last fetch")
+            # One line per cycle; each feed's error is in the feed metrics table
+            if counts["failed"] or counts["timed_out"]:
+                print(
+                    f"⚠ {counts['failed']} of {len(feeds)} feeds failed, {counts['timed_out']} missed the "
+                    f"{self.cycle_deadline}s cycle deadline (see /api/ingestion/feeds)"
+                )
+
+    def fetch_all(self, feed_urls: Optional[List[str]] = None) -> List[AnalyzeRequest]:
+        """
+        Fetch feeds concurrently and return all new items at once.
+
+        A cycle takes about as long as its slowest feed, capped by
+        cycle_deadline (see iter_fetch). Results keep the order of the
+        feed list.
+
+        Args:
+            feed_urls: Feeds to fetch (default: every feed in the feeds file)
+        """
+        feeds = self.get_feeds_list() if feed_urls is None else list(feed_urls)
+        by_feed = dict(self.iter_fetch(feeds))
+        return [request for feed_url in feeds for request in by_feed.get(feed_url, [])]
@@ -0,0 +1,219 @@
+"""
+Near-duplicate story detection across feeds.
+
+The same wire story reaches several feeds with slightly different
+headlines. Each headline is reduced to a set of lightly stemmed content
+words and a MinHash signature; LSH buckets over the signature find
+candidate clusters from the recent window, and the exact Jaccard
+similarity of the word sets decides. Only the first item of a cluster is
+analyzed; later copies are attached to it as related sources.
+
+Word-set Jaccard is used rather than SimHash because headlines are too
+short for SimHash distances to separate rewrites from unrelated stories.
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.storage.backend import timestamp_sort_key
+from app.storage.models import AnalyzeRequest, RelatedSource
+from app.storage.search import tokenize
+
+# Minimum word-set Jaccard similarity for two headlines to be one story
+NEAR_DUP_THRESHOLD = float(os.getenv("GEOPULSE_NEAR_DUP_THRESHOLD", "0.5"))
+# Copies must be published within this many seconds of the first one
+NEAR_DUP_WINDOW_S = float(os.getenv("GEOPULSE_NEAR_DUP_WINDOW_S", str(6 * 3600)))
+
+NUM_PERM = 96
+# 32 bands of 3 rows: pairs at Jaccard 0.5 share a bucket with probability 0.986,
+# unrelated headlines sharing one common word (Jaccard ~0.1) only 0.03. With 2
+# rows a single common word keys a band often enough to make buckets grow with
+# the window.
+BANDS = 32
+# Newest clusters scanned per bucket; copies arrive close together, and this
+# keeps a lookup bounded when a bucket is keyed by a very common word
+MAX_BUCKET_SCAN = 64
+# Distinct words whose hash values are kept
+TOKEN_CACHE_SIZE = 50_000
+_MERSENNE_PRIME = (1 << 61) - 1
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its new of on or over says "
+    "said than that the to was were will with after amid".split()
+)
+_SUFFIXES = ("ing", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > 4 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def story_tokens(headline: str) -> FrozenSet[str]:
+    """Content words of a headline, lowercased and lightly stemmed."""
+    return frozenset(_stem(word) for word in tokenize(headline) if word not in STOPWORDS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures from NUM_PERM universal hash functions over 64-bit token hashes."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._cache: Dict[str, Tuple[int, ...]] = {}
+
+    def _token_hashes(self, token: str) -> Tuple[int, ...]:
+        """The token's value under every hash function (cached: headline words repeat a lot)."""
+        hashes = self._cache.get(token)
+        if hashes is None:
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            hashes = tuple((a * h + b) % _MERSENNE_PRIME for a, b in self.params)
+            if len(self._cache) >= TOKEN_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[token] = hashes
+        return hashes
+
+    def signature(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        return tuple(map(min, zip(*map(self._token_hashes, tokens))))
+
+
+class StoryCluster:
+    """First-seen item of a story plus the copies attached to it."""
+
+    def __init__(self, request: AnalyzeRequest, tokens: FrozenSet[str], signature: Tuple[int, ...], published: float):
+        self.request = request
+        self.tokens = tokens
+        self.signature = signature
+        self.published = published
+        self.copies = 0
+
+
+class NearDuplicateDetector:
+    """Groups near-duplicate headlines published within a time window."""
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        window_s: float = NEAR_DUP_WINDOW_S,
+        bands: int = BANDS,
+        num_perm: int = NUM_PERM,
+    ):
+        """
+        Args:
+            threshold: Minimum word-set Jaccard similarity to merge two items
+            window_s: Maximum publish-time distance between copies
+            bands: LSH bands over the signature (num_perm must divide evenly)
+            num_perm: MinHash signature length
+        """
+        self.threshold = threshold
+        self.window_s = window_s
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        # (published, seq, cluster) min-heap, for expiry: feeds list their
+        # newest items first, so arrival order says little about age
+        self._clusters: List[Tuple[float, int, StoryCluster]] = []
+        self._seq = itertools.count()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[StoryCluster]] = {}
+        self._newest_published = 0.0
+        self.merged = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _expire(self) -> None:
+        cutoff = self._newest_published - 2 * self.window_s
+        while self._clusters and self._clusters[0][0] < cutoff:
+            cluster = heapq.heappop(self._clusters)[2]
+            for key in self._band_keys(cluster.signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.remove(cluster)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _candidates(self, signature: Tuple[int, ...]):
+        """Distinct clusters sharing a band with the signature, newest first per bucket."""
+        seen = set()
+        for key in self._band_keys(signature):
+            for cluster in itertools.islice(reversed(self._buckets.get(key, ())), MAX_BUCKET_SCAN):
+                if id(cluster) not in seen:
+                    seen.add(id(cluster))
+                    yield cluster
+
+    def _find(self, tokens: FrozenSet[str], signature: Tuple[int, ...], published: float) -> Optional[StoryCluster]:
+        best, best_score = None, self.threshold
+        for cluster in self._candidates(signature):
+            if abs(cluster.published - published) > self.window_s:
+                continue
+            score = jaccard(tokens, cluster.tokens)
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+
+    def group(self, requests: List[AnalyzeRequest]) -> List[AnalyzeRequest]:
+        """
+        Keep one request per story.
+
+        Copies are dropped from the result and appended to the
+        related_sources of the story's first request (also when that
+        request came in an earlier batch, though a consumer that has
+        already serialized it won't see them). Every copy is counted in
+        `merged`.
+
+        Returns:
+            The first request of each new story, in input order
+        """
+        representatives = []
+        for request in requests:
+            tokens = story_tokens(request.headline)
+            published = timestamp_sort_key(request.timestamp) if request.timestamp else time.time()
+            self._newest_published = max(self._newest_published, published)
+            if not tokens:
+                representatives.append(request)
+                continue
+            signature = self.hasher.signature(tokens)
+            cluster = self._find(tokens, signature, published)
+            if cluster is None:
+                cluster = StoryCluster(request, tokens, signature, published)
+                heapq.heappush(self._clusters, (published, next(self._seq), cluster))
+                for key in self._band_keys(signature):
+                    self._buckets.setdefault(key, []).append(cluster)
+                representatives.append(request)
+                continue
+
+            if (request.headline, request.source) == (cluster.request.headline, cluster.request.source):
+                # The story's own item again: handed back by dedup for a retry
+                request.related_sources.extend(
+                    related for related in cluster.request.related_sources if related not in request.related_sources
+                )
+                cluster.request = request
+                representatives.append(request)
+                continue
+            cluster.copies += 1
+            self.merged += 1
+            related = RelatedSource(source=request.source, headline=request.headline)
+            if related.source != cluster.request.source and related not in cluster.request.related_sources:
+                cluster.request.related_sources.append(related)
+        self._expire()
+        return representatives
+
+    def get_stats(self) -> dict:
+        return {"clusters": len(self._clusters), "merged": self.merged}
@@ -0,0 +1,107 @@
+"""
+Feed text normalization: HTML to plain, prompt-ready text.
+
+Feed descriptions arrive as HTML fragments of any length: tags, entities
+(&amp;, &#8217;), runs of whitespace and embedded scripts or styles.
+normalize_text turns one into a single line of plain text and cuts it to
+a token budget, because it ends up in the LLM prompt.
+
+Only as much of the markup as the budget needs is stripped, so long
+articles cost about as much as short ones, and text with no markup skips
+the tag passes.
+"""
+
+import html
+import os
+import re
+from typing import Optional
+
+# Approximate token budget for a description (the LLM prompt's "Additional Context")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("GEOPULSE_CONTEXT_TOKENS", "200"))
+# Rough English average; the budget only needs to be approximate
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "…"
+
+# Elements whose content is never text, and comments
+_SKIP_ELEMENTS = "script|style|head|title|noscript|template"
+_SKIP_BLOCK_RE = re.compile(rf"<({_SKIP_ELEMENTS})\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+_SKIP_OPEN_RE = re.compile(rf"<(?:(?:{_SKIP_ELEMENTS})\b|!--)", re.I)
+# "<" followed by a letter (or /, !, ?) opens a tag; "3 < 4" is text
+_TAG_RE = re.compile(r"<[/!?]?[a-zA-Z][^>]*>")
+
+
+def html_to_text(raw_html: str, max_chars: Optional[int] = None) -> str:
+    """
+    Strip markup, replacing each tag with a space.
+
+    Only a window of the input is processed: it starts a little above max_chars and
+    doubles until it yields max_chars of text or covers the whole input, so
+    the cost follows the budget rather than the article length. Each window
+    is stripped with a few regex passes (no per-tag Python code).
+
+    Args:
+        raw_html: HTML fragment
+        max_chars: Stop once at least this much text is collected (None reads it all)
+
+    Returns:
+        Text with entities still encoded and whitespace not yet collapsed
+    """
+    if "<" not in raw_html:
+        return raw_html if max_chars is None else raw_html[:max_chars]
+
+    limit = len(raw_html) if max_chars is None else max_chars + max_chars // 4
+    while True:
+        window = raw_html[:limit]
+        complete = limit >= len(raw_html)
+        if not complete:
+            # Drop a tag cut in half by the window edge
+            open_tag = window.rfind("<")
+            if open_tag > window.rfind(">"):
+                window = window[:open_tag]
+        text = _SKIP_BLOCK_RE.sub(" ", window)
+        if not complete:
+            # ...and a script/style/comment whose end lies beyond it
+            unclosed = _SKIP_OPEN_RE.search(text)
+            if unclosed:
+                text = text[:unclosed.start()]
+        # Every tag becomes a space: a word split by inline markup is far
+        # rarer than words run together across <p>, <br> or <li>
+        text = _TAG_RE.sub(" ", text)
+        if complete or len(text) >= max_chars:
+            return text
+        limit *= 2
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens tokens at a word boundary, marking the cut with an ellipsis."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + ELLIPSIS
+
+
+def normalize_text(raw_html: Optional[str], max_tokens: Optional[int] = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Turn a feed HTML fragment into one line of plain text for the LLM prompt.
+
+    Tags are removed (script/style content with them), entities decoded,
+    whitespace collapsed and the result truncated to the token budget.
+
+    Args:
+        raw_html: Feed description or summary
+        max_tokens: Approximate token budget (None keeps everything)
+    """
+    if not raw_html:
+        return ""
+    # Collect some slack: entities and whitespace runs shrink when normalized
+    max_chars = None if max_tokens is None else max_tokens * CHARS_PER_TOKEN * 5 // 4 + 64
+    text = html_to_text(raw_html, max_chars)
+    if "&" in text:
+        text = html.unescape(text)
+    text = " ".join(text.split())
+    if max_tokens is None:
+        return text
+    return truncate_to_budget(text, max_tokens)
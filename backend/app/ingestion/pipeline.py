@@ -1,56 +1,161 @@
-from typing import List
+import os
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+from app.ingestion.dedup import DedupIndex, content_hash
 from app.ingestion.fetcher import RSSFetcher
+from app.ingestion.near_dup import NearDuplicateDetector
 from app.storage.models import AnalyzeRequest
 from app.storage import repository
 
+# Seconds a feed's new stories are held back before being handed on, so copies
+# of a story from feeds that finish shortly after are attached as related sources
+NEAR_DUP_HOLD_S = float(os.getenv("GEOPULSE_NEAR_DUP_HOLD_S", "5"))
+# Seconds an item handed on for analysis is skipped while waiting to be stored;
+# after that it is handed on again (its analysis failed or it was dropped)
+DEDUP_RETRY_S = float(os.getenv("GEOPULSE_DEDUP_RETRY_S", "1800"))
+
 class IngestionPipeline:
-    def __init__(self):
-        self.fetcher = RSSFetcher()
+    def __init__(
+        self,
+        fetcher: Optional[RSSFetcher] = None,
+        dedup_index: Optional[DedupIndex] = None,
+        near_dup: Optional[NearDuplicateDetector] = None,
+        hold_s: float = NEAR_DUP_HOLD_S,
+        retry_s: float = DEDUP_RETRY_S,
+        check_store: bool = True,
+    ):
+        """
+        Args:
+            check_store: Ask the repository about items the dedup index can't
+                place. Only worth it where the store lives in this process;
+                elsewhere it would load a private, stale copy of the store.
+        """
+        self.fetcher = fetcher or RSSFetcher()
+        # Hashes of every stored item, persisted across restarts
+        self.dedup_index = dedup_index if dedup_index is not None else DedupIndex()
+        # Collapses the same story reported by several feeds
+        self.near_dup = near_dup if near_dup is not None else NearDuplicateDetector()
+        self.hold_s = hold_s
+        self.retry_s = retry_s
+        self.check_store = check_store
+        # Hash -> when the item was handed on, for items not stored yet
+        self._pending: Dict[int, float] = {}
 
-    def run(self) -> List[AnalyzeRequest]:
+    def stream(self, feed_urls: Optional[List[str]] = None) -> Iterator[List[AnalyzeRequest]]:
         """
-        Runs the ingestion pipeline: Fetch -> Clean (done in fetcher) -> Deduplicate
-        Returns a list of NEW requests to be analyzed.
+        Runs the ingestion pipeline one feed at a time, as feeds finish downloading:
+        Fetch -> Clean (done in fetcher) -> Deduplicate -> Collapse near-duplicates
+
+        A feed's new items are yielded once hold_s has passed since it was
+        fetched (checked as later feeds arrive) or when the cycle ends,
+        whichever is first; copies of its stories from feeds finishing in
+        the meantime are attached to them as related sources first. Only
+        the feeds in flight or held are kept in memory.
+
+        Args:
+            feed_urls: Feeds to poll (default: all configured feeds). Per-feed
+                outcomes are left in self.fetcher.last_feed_results once the
+                generator is exhausted.
+
+        Yields:
+            Non-empty lists of NEW requests to be analyzed, one per feed
         """
         print("Starting ingestion pipeline...")
-        
-        # 1. Fetch
-        raw_requests = self.fetcher.fetch_all()
-        print(f"Fetched {len(raw_requests)} items.")
-        
-        # 2. Deduplicate
-        new_requests = self._deduplicate(raw_requests)
-        print(f"Found {len(new_requests)} new items after deduplication.")
-        
-        return new_requests
+        fetched = new = kept = 0
+        # Pick up items stored since the last run
+        self.dedup_index.refresh()
+        now = time.monotonic()
+        self._pending = {
+            key_hash: handed_at for key_hash, handed_at in self._pending.items()
+            if now - handed_at < self.retry_s and not self.dedup_index.lookup(key_hash)
+        }
+        # (release time, feed_url, stories) per feed, in fetch order
+        held = deque()
+        # Feeds whose items have been handed on, so their new state can be saved
+        delivered = []
+
+        try:
+            for feed_url, raw_requests in self.fetcher.iter_fetch(feed_urls, commit=False):
+                fetched += len(raw_requests)
+
+                new_requests = self._deduplicate(raw_requests)
+                new += len(new_requests)
+
+                # Keep one item per story; copies from other feeds ride along as related sources
+                stories = self.near_dup.group(new_requests)
+                kept += len(stories)
+                self.fetcher.feed_metrics.record_dedup(feed_url, new=len(stories), duplicates=len(raw_requests) - len(stories))
+
+                if stories:
+                    held.append((time.monotonic() + self.hold_s, feed_url, stories))
+                else:
+                    delivered.append(feed_url)
+                while held and held[0][0] <= time.monotonic():
+                    _, held_url, batch = held.popleft()
+                    yield batch
+                    delivered.append(held_url)
+
+            while held:
+                _, held_url, batch = held.popleft()
+                yield batch
+                delivered.append(held_url)
+        finally:
+            # Feeds still held (the consumer stopped early) keep their old state and are refetched
+            self.fetcher.commit(delivered)
+
+        print(f"Fetched {fetched} items, {new} new after deduplication, {kept} distinct stories.")
+
+    def run(self, feed_urls: Optional[List[str]] = None) -> List[AnalyzeRequest]:
+        """
+        Runs the whole ingestion pipeline (see stream) and returns every NEW
+        request to be analyzed.
+
+        Args:
+            feed_urls: Feeds to poll (default: all configured feeds)
+        """
+        return [request for batch in self.stream(feed_urls) for request in batch]
 
     def _deduplicate(self, requests: List[AnalyzeRequest]) -> List[AnalyzeRequest]:
         """
-        Simple deduplication based on headline and source.
-        Checks against existing events in the repository.
+        Deduplicate on normalized (headline, source) content hashes.
+
+        Items are checked against this batch, the persistent dedup index and,
+        when the index can't tell and check_store is set, the repository's
+        (headline, source) index.
+        Every check is O(1), so cost depends only on the batch size. Items
+        enter the dedup index once their event is stored (record_stored);
+        until then later polls skip them for retry_s.
         """
-        existing_events = repository.get_events()
-        # Create a set of (headline, source) tuples for fast lookup
-        existing_keys = {
-            (e.get("headline"), e.get("source")) 
-            for e in existing_events
-        }
-        
         unique_requests = []
+        new_hashes = []
         seen_in_batch = set()
-        
+        now = time.monotonic()
+
         for req in requests:
-            key = (req.headline, req.source)
-            
+            key_hash = content_hash(req.headline, req.source)
+
             # Check if already processed in this batch
-            if key in seen_in_batch:
+            if key_hash in seen_in_batch:
                 continue
-                
-            # Check if already in storage
-            if key in existing_keys:
+            seen_in_batch.add(key_hash)
+
+            # Check the dedup index, falling back to storage
+            known = self.dedup_index.lookup(key_hash)
+            if known:
+                continue
+            if known is None and self.check_store and repository.has_event(req.headline, req.source):
+                # Stored some other way (e.g. /api/analyze); index it for next time
+                new_hashes.append(key_hash)
+                continue
+
+            # Handed on recently and still waiting for analysis
+            handed_at = self._pending.get(key_hash)
+            if handed_at is not None and now - handed_at < self.retry_s:
                 continue
-                
+
             unique_requests.append(req)
-            seen_in_batch.add(key)
-            
+            self._pending[key_hash] = now
+
+        self.dedup_index.add_many(new_hashes)
         return unique_requests
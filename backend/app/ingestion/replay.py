@@ -0,0 +1,263 @@
+"""
+Offline feed replay for repeatable ingestion runs and benchmarks.
+
+A replay directory holds feed snapshots plus an index.json mapping each
+feed URL to its snapshot file. Snapshots are either recorded from the
+live feeds (record_snapshots) or generated at any scale
+(synthesize_snapshots, e.g. 500 feeds x 100 entries).
+
+An RSSFetcher given a FeedReplay downloads every feed from its snapshot
+instead of the publisher, while feed state, metrics and scheduling keep
+the original URLs. Snapshots are read straight from disk (file:// URLs),
+or served by a local ReplayServer that can add per-request latency and
+a bandwidth cap, so the HTTP path is exercised too.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+# Replay every feed from this directory instead of the network (unset: live feeds)
+FEED_REPLAY_DIR = os.getenv("GEOPULSE_FEED_REPLAY_DIR")
+INDEX_FILE = "index.json"
+
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+_SUBJECTS = [
+    "Fed", "ECB", "Bank of Japan", "OPEC", "Oil", "Gold", "Copper", "Wheat", "Treasury yields",
+    "The dollar", "The yen", "Bitcoin", "Tesla", "Apple", "Nvidia", "China", "India", "Germany",
+]
+_VERBS = [
+    "raises", "cuts", "holds", "jumps", "slides", "rallies", "slumps", "steadies", "warns on",
+    "beats forecasts on", "misses estimates on", "signals a shift on",
+]
+_OBJECTS = [
+    "interest rates", "inflation outlook", "supply concerns", "trade tariffs", "quarterly earnings",
+    "jobs data", "growth forecast", "output cuts", "bond purchases", "export controls",
+    "consumer demand", "energy prices",
+]
+
+
+def snapshot_name(feed_url: str) -> str:
+    """Stable, filesystem-safe snapshot file name for a feed URL."""
+    digest = hashlib.blake2b(feed_url.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{_SLUG_RE.sub('_', feed_url.split('://', 1)[-1]).strip('_')[:60]}_{digest}.xml"
+
+
+def write_index(directory: str, index: Dict[str, str]) -> None:
+    with open(os.path.join(directory, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def record_snapshots(feed_urls: List[str], directory: str, timeout: float = 10.0) -> Dict[str, str]:
+    """
+    Download the live feeds once and save them as a replay directory.
+
+    Returns:
+        {feed_url: snapshot file name} for the feeds that downloaded
+    """
+    from app.ingestion.fetcher import USER_AGENT
+
+    os.makedirs(directory, exist_ok=True)
+    index = {}
+    for feed_url in feed_urls:
+        request = urllib.request.Request(feed_url, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read()
+        except Exception as e:
+            print(f"Error recording {feed_url}: {e}")
+            continue
+        name = snapshot_name(feed_url)
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(body)
+        index[feed_url] = name
+    write_index(directory, index)
+    return index
+
+
+def synthetic_feed(title: str, headlines: List[str], newest: datetime, gap: timedelta) -> bytes:
+    items = "".join(
+        f"<item><title>{escape(headline)}</title>"
+        f"<link>https://replay.test/{i}</link>"
+        f"<description>{escape(f'<p>{headline} &mdash; markets react.</p><p>Analysts said the move was &quot;expected&quot;.</p>')}</description>"
+        f"<pubDate>{format_datetime(newest - i * gap, usegmt=True)}</pubDate></item>"
+        for i, headline in enumerate(headlines)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(title)}</title>{items}</channel></rss>"
+    ).encode("utf-8")
+
+
+def synthesize_snapshots(
+    directory: str,
+    feeds: int = 500,
+    entries: int = 100,
+    shared_ratio: float = 0.1,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Generate a synthetic replay directory.
+
+    Headlines mix a small financial vocabulary with made-up names; a share of each
+    feed's entries are stories also carried by other feeds (same headline
+    or a light rewrite), so dedup and near-duplicate detection have work.
+
+    Args:
+        directory: Output directory
+        feeds: Number of feeds
+        entries: Entries per feed
+        shared_ratio: Fraction of entries taken from a pool of cross-feed stories
+        seed: Random seed, for identical runs
+
+    Returns:
+        The synthetic feed URLs
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    newest = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+    # Made-up names (places, companies) keep unrelated stories from looking alike
+    syllables = ["ka", "lo", "mir", "ta", "ven", "dra", "so", "bel", "nu", "rak", "zi", "po", "gan", "te"]
+    names = list({"".join(rng.choices(syllables, k=3)).capitalize() for _ in range(5000)})
+
+    def headline() -> str:
+        about = " ".join(rng.sample(names, 3))
+        return f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} in {about}"
+
+    shared = [headline() for _ in range(max(1, feeds * entries // 50))]
+    index = {}
+    for i in range(feeds):
+        headlines = []
+        for _ in range(entries):
+            if rng.random() < shared_ratio:
+                story = rng.choice(shared)
+                headlines.append(story if rng.random() < 0.5 else f"{story}, sources say")
+            else:
+                headlines.append(headline())
+        feed_url = f"http://replay.test/feeds/{i}.xml"
+        name = snapshot_name(feed_url)
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(synthetic_feed(f"Replay Wire {i}", headlines, newest, timedelta(minutes=rng.randint(5, 120))))
+        index[feed_url] = name
+    write_index(directory, index)
+    return list(index)
+
+
+class FeedReplay:
+    """Maps feed URLs to their recorded snapshots, as file:// URLs or on a replay server."""
+
+    def __init__(self, directory: str, base_url: Optional[str] = None):
+        """
+        Args:
+            directory: Replay directory (with index.json)
+            base_url: Replay server URL (None reads snapshot files directly)
+        """
+        self.directory = os.path.abspath(directory)
+        self.base_url = base_url
+        with open(os.path.join(self.directory, INDEX_FILE), "r") as f:
+            self.index: Dict[str, str] = json.load(f)
+
+    def feed_urls(self) -> List[str]:
+        return list(self.index)
+
+    def resolve(self, feed_url: str) -> str:
+        """
+        URL to download a feed's snapshot from.
+
+        Raises:
+            KeyError: If the feed has no snapshot
+        """
+        name = self.index[feed_url]
+        if self.base_url:
+            return f"{self.base_url}/{name}"
+        return "file://" + urllib.request.pathname2url(os.path.join(self.directory, name))
+
+
+class ReplayServer:
+    """Local HTTP stand-in serving a replay directory, with optional latency and bandwidth cap."""
+
+    def __init__(self, directory: str, latency_s: float = 0.0, bandwidth_bps: int = 0):
+        """
+        Args:
+            directory: Replay directory to serve
+            latency_s: Delay before each response
+            bandwidth_bps: Per-response transfer rate in bytes/s (0: unlimited)
+        """
+        self.directory = os.path.abspath(directory)
+        self.latency_s = latency_s
+        self.bandwidth_bps = bandwidth_bps
+        self.requests = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay.requests += 1
+                time.sleep(replay.latency_s)
+                path = os.path.join(replay.directory, os.path.basename(self.path))
+                try:
+                    with open(path, "rb") as f:
+                        body = f.read()
+                except OSError:
+                    self.send_error(404)
+                    return
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/rss+xml")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    chunk = 64 * 1024 if replay.bandwidth_bps <= 0 else max(1, replay.bandwidth_bps // 10)
+                    for start in range(0, len(body), chunk):
+                        self.wfile.write(body[start:start + chunk])
+                        if replay.bandwidth_bps > 0:
+                            time.sleep(chunk / replay.bandwidth_bps)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The fetcher gave up (timeout or cycle deadline)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "ReplayServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 128
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def replay(self) -> FeedReplay:
+        """FeedReplay that downloads through this server."""
+        return FeedReplay(self.directory, base_url=self.url)
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,217 @@
+"""
+Adaptive per-feed polling scheduler.
+
+Each feed gets its own polling interval, learned from the publish times of
+its entries: the scheduler keeps an exponentially weighted estimate of the
+gap between new entries and polls about once per expected new entry,
+clamped to [min_interval, max_interval]. Long silences stretch the
+estimate, so quiet feeds are polled rarely. Failures back off
+exponentially with jitter, and every interval is jittered so feeds don't
+synchronize.
+
+The scheduler drives IngestionPipeline.stream with whichever feeds are due
+and hands the new (deduplicated) requests to a callback as they arrive.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.storage.models import AnalyzeRequest
+
+MIN_INTERVAL_S = float(os.getenv("GEOPULSE_POLL_MIN_S", "60"))
+MAX_INTERVAL_S = float(os.getenv("GEOPULSE_POLL_MAX_S", "1800"))
+DEFAULT_INTERVAL_S = float(os.getenv("GEOPULSE_POLL_DEFAULT_S", "120"))
+
+
+class FeedSchedule:
+    """Learned publish rate and polling state for one feed."""
+
+    def __init__(self, url: str, interval: float, next_due: float):
+        self.url = url
+        self.interval = interval
+        self.next_due = next_due
+        # EWMA of seconds between new entries (None until first estimate)
+        self.mean_gap: Optional[float] = None
+        # Publish time (UTC epoch) of the newest entry seen so far
+        self.last_entry_at: Optional[float] = None
+        self.consecutive_errors = 0
+        self.polls = 0
+        self.new_entries = 0
+
+    def get_stats(self, now: float) -> dict:
+        return {
+            "interval_s": round(self.interval, 1),
+            "next_poll_in_s": round(max(0.0, self.next_due - now), 1),
+            "mean_gap_s": round(self.mean_gap, 1) if self.mean_gap is not None else None,
+            "consecutive_errors": self.consecutive_errors,
+            "polls": self.polls,
+            "new_entries": self.new_entries,
+        }
+
+
+class AdaptiveScheduler:
+    """Polls each feed at a rate matched to how often it publishes."""
+
+    def __init__(
+        self,
+        pipeline,
+        on_new: Optional[Callable[[List[AnalyzeRequest]], Optional[bool]]] = None,
+        feeds: Optional[List[str]] = None,
+        min_interval: float = MIN_INTERVAL_S,
+        max_interval: float = MAX_INTERVAL_S,
+        default_interval: float = DEFAULT_INTERVAL_S,
+        smoothing: float = 0.3,
+        jitter: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            pipeline: IngestionPipeline (anything with stream(feed_urls) and fetcher.last_feed_results)
+            on_new: Receives the new requests, one batch per changed feed;
+                returning False ends the round (the rest is fetched again later)
+            feeds: Feed URLs (default: the pipeline fetcher's feeds file)
+            min_interval: Shortest polling interval in seconds
+            max_interval: Longest polling interval, also the error backoff cap
+            default_interval: Interval before a feed's rate is known
+            smoothing: Weight of the newest gap observation in the EWMA
+            jitter: Relative random spread applied to every interval
+            clock: Monotonic clock used for scheduling
+            wall_clock: UTC epoch clock compared with entry publish times
+            rng: Random source for jitter (injectable for tests)
+        """
+        self.pipeline = pipeline
+        self.on_new = on_new
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.smoothing = smoothing
+        self.jitter = jitter
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.rng = rng or random.Random()
+
+        if feeds is None:
+            feeds = pipeline.fetcher.get_feeds_list()
+        now = self.clock()
+        # Every feed is due immediately on start
+        self.feeds: Dict[str, FeedSchedule] = {url: FeedSchedule(url, default_interval, now) for url in feeds}
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _observe_gap(self, feed: FeedSchedule, gap: float) -> None:
+        if feed.mean_gap is None:
+            feed.mean_gap = gap
+        else:
+            feed.mean_gap = self.smoothing * gap + (1 - self.smoothing) * feed.mean_gap
+
+    def _learn(self, feed: FeedSchedule, published: List[float], polled_at: float) -> None:
+        """Update the feed's publish-gap estimate from the entry publish times of one successful poll."""
+        # Entries without a publish date are stamped with the fetch time; ignore them
+        published = sorted(ts for ts in published if 0 < ts < polled_at - 1)
+        if feed.last_entry_at is None:
+            # First poll: the feed's own history gives the initial estimate
+            if len(published) >= 2:
+                self._observe_gap(feed, (published[-1] - published[0]) / (len(published) - 1))
+            new = published
+        else:
+            new = [ts for ts in published if ts > feed.last_entry_at]
+            if new:
+                self._observe_gap(feed, (new[-1] - feed.last_entry_at) / len(new))
+        if new:
+            feed.last_entry_at = new[-1]
+            feed.new_entries += len(new)
+        self._observe_silence(feed, polled_at)
+
+    def _observe_silence(self, feed: FeedSchedule, polled_at: float) -> None:
+        """A feed silent for longer than its expected gap is publishing more slowly."""
+        if feed.last_entry_at is None or feed.mean_gap is None:
+            return
+        silence = polled_at - feed.last_entry_at
+        if silence > feed.mean_gap:
+            self._observe_gap(feed, silence)
+
+    def _reschedule(self, feed: FeedSchedule, status: str, published: List[float], now: float, polled_at: float) -> None:
+        if status == "deferred":
+            # Never started (the cycle ran out of time); poll it in the next round
+            feed.next_due = now
+            return
+        feed.polls += 1
+        if status in ("failed", "timed_out"):
+            feed.consecutive_errors += 1
+            # Exponential backoff with full jitter, from the feed's normal interval
+            backoff = min(self.max_interval, feed.interval * 2 ** feed.consecutive_errors)
+            feed.next_due = now + self.rng.uniform(backoff / 2, backoff)
+            return
+        feed.consecutive_errors = 0
+        if status == "ok":
+            self._learn(feed, published, polled_at)
+        else:
+            self._observe_silence(feed, polled_at)
+        if feed.mean_gap is not None:
+            feed.interval = self._clamp(feed.mean_gap)
+        feed.next_due = now + self._jittered(feed.interval)
+
+    def due_feeds(self) -> List[str]:
+        now = self.clock()
+        return [url for url, feed in self.feeds.items() if feed.next_due <= now]
+
+    def run_due(self) -> int:
+        """
+        Poll every feed that is due (concurrently, through one pipeline run).
+
+        New requests are handed to on_new feed by feed as the pipeline
+        streams them, so analysis starts before the slowest feed is done.
+
+        Returns:
+            Number of new requests found in this round
+        """
+        due = self.due_feeds()
+        if not due:
+            return 0
+        polled_at = self.wall_clock()
+        found = 0
+        try:
+            stream = self.pipeline.stream(due)
+            for batch in stream:
+                found += len(batch)
+                # on_new returns False to end the round early (e.g. on shutdown)
+                if self.on_new is not None and self.on_new(batch) is False:
+                    stream.close()
+                    break
+            results = self.pipeline.fetcher.last_feed_results
+        except Exception as e:
+            # Treat the whole round as failed so the feeds back off
+            print(f"⚠ Ingestion run failed: {e}")
+            results = {}
+        now = self.clock()
+        for url in due:
+            result = results.get(url, {"status": "failed", "published": []})
+            self._reschedule(self.feeds[url], result["status"], result["published"], now, polled_at)
+        return found
+
+    def seconds_until_next(self) -> float:
+        if not self.feeds:
+            return self.max_interval
+        return max(0.0, min(feed.next_due for feed in self.feeds.values()) - self.clock())
+
+    def run_forever(self, stop: threading.Event) -> None:
+        """Poll due feeds until `stop` is set, sleeping until the next one is due."""
+        while not stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"⚠ Polling round failed: {e}")
+            stop.wait(max(self.seconds_until_next(), 1.0))
+
+    def get_stats(self) -> Dict[str, dict]:
+        now = self.clock()
+        return {url: feed.get_stats(now) for url, feed in self.feeds.items()}
@@ -0,0 +1,405 @@
+"""
+Producer/consumer worker pipeline for continuous ingestion.
+
+Fetch processes poll the feeds and put new items on a bounded
+multiprocessing queue; a pool of analysis workers takes items off it, runs
+the LLM analysis and stores the events. Every put and get blocks with a
+timeout, so:
+
+- idle workers sleep in get() instead of spinning on queue.empty();
+- a full queue stalls the fetchers, and because ingestion is a generator
+  that stall reaches back to the feed downloads (backpressure);
+- both sides notice a shutdown request within one timeout.
+
+Analysis workers are threads in the consuming process. The LLM call is
+network-bound, and a single process keeps a single storage backend (the
+memory backend is not shared between processes). Fetchers can run as
+threads too (in_process=True), e.g. inside the API server.
+
+Each polling round is a cycle: its items carry the cycle key and a marker
+follows them, so the workers can report per-cycle throughput and the
+latency from publish time to stored event.
+"""
+
+import multiprocessing
+import os
+import queue as queue_module
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from app.ingestion.dedup import record_stored
+from app.ingestion.fetcher import shutdown_parse_pool
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.scheduler import AdaptiveScheduler
+from app.intelligence.pipeline import ERROR_EVENT_PREFIX, analyze_text
+from app.storage import repository
+from app.storage.backend import timestamp_sort_key
+from app.storage.models import AnalyzeRequest
+
+# Items waiting for analysis before the fetchers are held back
+QUEUE_SIZE = int(os.getenv("GEOPULSE_QUEUE_SIZE", "100"))
+# Concurrent analysis (LLM) workers
+ANALYSIS_WORKERS = int(os.getenv("GEOPULSE_ANALYSIS_WORKERS", "4"))
+# Longest a blocked put/get waits before re-checking for shutdown
+QUEUE_TIMEOUT_S = float(os.getenv("GEOPULSE_QUEUE_TIMEOUT_S", "1"))
+# Completed cycles kept for get_stats()
+CYCLE_HISTORY = 20
+
+
+def request_to_item(request: AnalyzeRequest) -> dict:
+    """Queue item for one request (plain dict, cheap to pickle)."""
+    return {
+        'source_title': request.source,
+        'item_title': request.headline,
+        'description': request.text or '',
+        'pubDate': request.timestamp.isoformat() if request.timestamp else None,
+        'related_sources': [related.model_dump() for related in request.related_sources],
+    }
+
+
+def item_to_request(item: dict) -> AnalyzeRequest:
+    return AnalyzeRequest(
+        headline=item['item_title'],
+        source=item['source_title'],
+        timestamp=item.get('pubDate'),
+        text=item.get('description') or None,
+        related_sources=item.get('related_sources', []),
+    )
+
+
+def put_blocking(queue, item, stop, timeout: float = QUEUE_TIMEOUT_S) -> bool:
+    """
+    Put an item, waiting as long as the queue is full.
+
+    Returns:
+        True once the item is queued, False if `stop` was set first
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=timeout)
+            return True
+        except queue_module.Full:
+            continue
+    return False
+
+
+def poll_feeds(queue, stop, feeds: Optional[List[str]] = None) -> None:
+    """
+    Fetch process: poll feeds on their adaptive intervals and queue new items until `stop` is set.
+
+    Items are tagged with the polling round (cycle) that found them, and a
+    {"cycle_end"} marker with the round's item count follows them.
+    """
+    # Cycle keys are prefixed with the fetcher's name: process name when forked, thread name in-process
+    if threading.current_thread() is threading.main_thread():
+        name = multiprocessing.current_process().name
+    else:
+        name = threading.current_thread().name
+    cycle = {"key": None, "items": 0}
+
+    def enqueue(requests):
+        for request in requests:
+            item = request_to_item(request)
+            item['cycle'] = cycle["key"]
+            if not put_blocking(queue, item, stop):
+                # Stopping: end the round so the feeds not handed on keep their state
+                return False
+            cycle["items"] += 1
+        return True
+
+    # A forked fetcher has no share in the store; it relies on the dedup index
+    # the analysis workers keep current (record_stored)
+    pipeline = IngestionPipeline(check_store=multiprocessing.parent_process() is None)
+    scheduler = AdaptiveScheduler(pipeline, on_new=enqueue, feeds=feeds)
+    rounds = 0
+    try:
+        while not stop.is_set():
+            rounds += 1
+            cycle.update(key=f"{name}#{rounds}", items=0)
+            started_at = time.time()
+            try:
+                scheduler.run_due()
+            except Exception as e:
+                print(f"⚠ Polling round failed: {e}")
+            if cycle["items"]:
+                put_blocking(queue, {'cycle_end': cycle["key"], 'items': cycle["items"], 'started_at': started_at}, stop)
+            stop.wait(max(scheduler.seconds_until_next(), 1.0))
+    finally:
+        shutdown_parse_pool()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CycleMetrics:
+    """Per-cycle throughput and publish-to-stored latency, reported by the analysis workers."""
+
+    def __init__(self, history: int = CYCLE_HISTORY):
+        self._lock = threading.Lock()
+        # cycle key -> counters for cycles whose items are still being analyzed
+        self._open: Dict[str, dict] = {}
+        self.completed: Deque[dict] = deque(maxlen=history)
+
+    def _cycle(self, key: str) -> dict:
+        return self._open.setdefault(key, {"items": None, "started_at": None, "done": 0, "failed": 0, "latencies": []})
+
+    def item_done(self, key: str, latency_s: Optional[float], ok: bool) -> Optional[dict]:
+        """Record one analyzed item; returns the cycle report if that was the cycle's last item."""
+        with self._lock:
+            cycle = self._cycle(key)
+            if ok:
+                cycle["done"] += 1
+            else:
+                cycle["failed"] += 1
+            if latency_s is not None:
+                cycle["latencies"].append(latency_s)
+            return self._finish_if_complete(key)
+
+    def close(self, key: str, items: int, started_at: float) -> Optional[dict]:
+        """Record a cycle's end marker; returns the cycle report if all its items are done."""
+        with self._lock:
+            cycle = self._cycle(key)
+            cycle["items"] = items
+            cycle["started_at"] = started_at
+            return self._finish_if_complete(key)
+
+    def _finish_if_complete(self, key: str) -> Optional[dict]:
+        cycle = self._open[key]
+        if cycle["items"] is None or cycle["done"] + cycle["failed"] < cycle["items"]:
+            return None
+        del self._open[key]
+        duration = max(time.time() - cycle["started_at"], 1e-6)
+        latencies = sorted(cycle["latencies"])
+        report = {
+            "cycle": key,
+            "items": cycle["items"],
+            "failed": cycle["failed"],
+            "duration_s": round(duration, 2),
+            "items_per_s": round(cycle["items"] / duration, 3),
+            "latency_s": {
+                "p50": round(_percentile(latencies, 0.5), 1),
+                "p95": round(_percentile(latencies, 0.95), 1),
+                "max": round(latencies[-1], 1),
+            } if latencies else None,
+        }
+        self.completed.append(report)
+        return report
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"in_progress": len(self._open), "recent": list(self.completed)}
+
+
+def format_cycle_report(report: dict) -> str:
+    line = (
+        f"Cycle {report['cycle']}: {report['items']} items ({report['failed']} failed) in "
+        f"{report['duration_s']}s, {report['items_per_s']} items/s"
+    )
+    if report["latency_s"]:
+        latency = report["latency_s"]
+        line += f", publish->stored p50 {latency['p50']}s p95 {latency['p95']}s max {latency['max']}s"
+    return line
+
+
+def analyze_item(item: dict) -> dict:
+    """
+    Analysis worker task: analyze one queued item and store the event.
+
+    Raises:
+        RuntimeError: If the LLM analysis failed (nothing is stored and the
+            item is picked up again by a later poll)
+    """
+    request = item_to_request(item)
+    event = analyze_text(
+        headline=request.headline,
+        source=request.source,
+        timestamp=request.timestamp,
+        additional_text=request.text,
+        related_sources=[related.model_dump() for related in request.related_sources],
+    )
+    if event.get("event_id", "").startswith(ERROR_EVENT_PREFIX):
+        # The LLM call failed; fail the item instead of storing the placeholder
+        raise RuntimeError(event.get("why") or "LLM analysis failed")
+    stored = repository.add_event(event, validate=True)
+    # Only now is the item done; until here a failure leaves it to be picked up again
+    record_stored(request.headline, request.source)
+    return stored
+
+
+class WorkerPipeline:
+    """Fetch processes -> bounded queue -> analysis worker threads."""
+
+    def __init__(
+        self,
+        fetch_target: Callable = poll_feeds,
+        handler: Callable[[dict], object] = analyze_item,
+        fetchers: int = 1,
+        workers: int = ANALYSIS_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+        feeds: Optional[List[str]] = None,
+        timeout: float = QUEUE_TIMEOUT_S,
+        in_process: bool = False,
+    ):
+        """
+        Args:
+            fetch_target: Fetch process entry point, called as
+                fetch_target(queue, stop, feeds) and expected to return once
+                `stop` is set
+            handler: Called by an analysis worker for every queued item
+            fetchers: Fetch processes; the feed list is split between them
+            workers: Analysis worker threads
+            queue_size: Queue capacity (the backpressure threshold)
+            feeds: Feed URLs (default: the configured feeds file)
+            timeout: Seconds a blocked put/get waits before re-checking
+                for shutdown
+            in_process: Run the fetchers as threads with a plain queue
+                (for hosts like the API server, where forking is unwelcome)
+        """
+        self.fetch_target = fetch_target
+        self.handler = handler
+        self.num_fetchers = max(1, fetchers)
+        self.num_workers = max(1, workers)
+        self.queue_size = queue_size
+        self.feeds = feeds
+        self.timeout = timeout
+
+        self.in_process = in_process
+        if in_process:
+            self.queue = queue_module.Queue(maxsize=queue_size)
+            self.stop_event = threading.Event()
+        else:
+            self._context = multiprocessing.get_context()
+            self.queue = self._context.Queue(maxsize=queue_size)
+            self.stop_event = self._context.Event()
+        self.metrics = CycleMetrics()
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+        # Processes, or threads when in_process
+        self.fetch_processes: list = []
+        self.worker_threads: List[threading.Thread] = []
+        self.processed = 0
+        self.failed = 0
+
+    def _feed_shards(self) -> List[Optional[List[str]]]:
+        if self.num_fetchers == 1:
+            return [self.feeds]
+        feeds = self.feeds
+        if feeds is None:
+            feeds = IngestionPipeline().fetcher.get_feeds_list()
+        return [feeds[i::self.num_fetchers] for i in range(self.num_fetchers)]
+
+    def start(self) -> None:
+        for i, shard in enumerate(self._feed_shards()):
+            spawn = threading.Thread if self.in_process else self._context.Process
+            process = spawn(
+                target=self.fetch_target,
+                args=(self.queue, self.stop_event, shard),
+                name=f"geopulse-fetch-{i}",
+                daemon=True,
+            )
+            process.start()
+            self.fetch_processes.append(process)
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._work, name=f"geopulse-analysis-{i}", daemon=True)
+            thread.start()
+            self.worker_threads.append(thread)
+
+    def _work(self) -> None:
+        while not self._abort.is_set():
+            try:
+                item = self.queue.get(timeout=self.timeout)
+            except queue_module.Empty:
+                continue
+            if item is None:
+                # Shutdown sentinel, queued behind every real item
+                return
+            if 'cycle_end' in item:
+                self._report(self.metrics.close(item['cycle_end'], item['items'], item['started_at']))
+                continue
+            ok = True
+            try:
+                self.handler(item)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                ok = False
+                with self._lock:
+                    self.failed += 1
+                print(f"⚠ Analysis failed for {item.get('item_title')!r}: {e}")
+            if item.get('cycle') is not None:
+                latency = time.time() - timestamp_sort_key(item['pubDate']) if item.get('pubDate') else None
+                self._report(self.metrics.item_done(item['cycle'], latency, ok))
+
+    def _report(self, report: Optional[dict]) -> None:
+        if report is not None:
+            print(format_cycle_report(report))
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        """
+        Shut the pipeline down.
+
+        Fetchers are asked to stop first. With drain=True the workers then
+        finish every item already queued; otherwise they stop after their
+        current item and queued items are discarded.
+
+        Args:
+            drain: Analyze the items still queued before returning
+            timeout: Seconds to wait for each process/thread before giving up
+                on it (fetch processes are terminated)
+        """
+        self.stop_event.set()
+        for process in self.fetch_processes:
+            process.join(timeout)
+            if process.is_alive() and not self.in_process:
+                print(f"⚠ {process.name} did not stop in {timeout}s; terminating it")
+                process.terminate()
+                process.join()
+
+        if drain:
+            for _ in self.worker_threads:
+                try:
+                    self.queue.put(None, timeout=timeout)
+                except queue_module.Full:
+                    break
+        else:
+            self._abort.set()
+        for thread in self.worker_threads:
+            thread.join(timeout)
+        self._abort.set()
+
+        if not self.in_process:
+            # Anything still buffered is being discarded anyway; don't block on flushing it
+            self.queue.cancel_join_thread()
+            self.queue.close()
+
+    def queue_depth(self) -> Optional[int]:
+        """Items waiting for analysis (None where the platform can't tell, e.g. macOS)."""
+        try:
+            return self.queue.qsize()
+        except NotImplementedError:
+            return None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            processed, failed = self.processed, self.failed
+        return {
+            "queue_depth": self.queue_depth(),
+            "queue_size": self.queue_size,
+            "processed": processed,
+            "failed": failed,
+            "fetchers_alive": sum(p.is_alive() for p in self.fetch_processes),
+            "workers_alive": sum(t.is_alive() for t in self.worker_threads),
+            "cycles": self.metrics.summary(),
+        }
+
+    def run_forever(self, stop: threading.Event, report_interval: float = 60.0) -> None:
+        """Run until `stop` is set (or KeyboardInterrupt), reporting queue depth periodically."""
+        self.start()
+        try:
+            while not stop.wait(report_interval):
+                print(f"Worker pipeline: {self.get_stats()}")
+        finally:
+            self.stop()
@@ -5,12 +5,15 @@ Uses LLM to analyze news and generate structured market predictions.
 
 import os
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from .llm_client import LLMClient, GeminiClient, OpenAIClient, MockLLMClient
 from .prompt_builder import PromptBuilder
 
 
+# event_id prefix of the placeholder event returned when the LLM call fails
+ERROR_EVENT_PREFIX = "evt_error_"
+
 # Global LLM client instance (initialized on first use)
 _llm_client: Optional[LLMClient] = None
 
@@ -60,7 +63,8 @@ def analyze_text(
     headline: str, 
     source: str, 
     timestamp: Optional[datetime] = None,
-    additional_text: Optional[str] = None
+    additional_text: Optional[str] = None,
+    related_sources: Optional[List[Dict[str, str]]] = None
 ) -> Dict[str, Any]:
     """
     Analyze news headline using LLM and generate structured predictions.
@@ -70,6 +74,8 @@ def analyze_text(
         source: Source of the news (e.g., "Reuters", "Bloomberg")
         timestamp: Optional timestamp of the news event
         additional_text: Optional additional news text/body
+        related_sources: Optional {"source", "headline"} copies of the story
+            from other feeds, recorded on the event
         
     Returns:
         Dictionary matching the Event model structure
@@ -97,13 +103,11 @@ def analyze_text(
         elif "timestamp" not in result:
             result["timestamp"] = datetime.utcnow().isoformat() + "Z"
         
-        return result
-        
     except Exception as e:
         # Fallback to error response if LLM fails
         print(f"⚠ LLM analysis failed: {e}")
-        return {
-            "event_id": f"evt_error_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+        result = {
+            "event_id": f"{ERROR_EVENT_PREFIX}{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
             "headline": headline,
             "source": source,
             "timestamp": (timestamp or datetime.utcnow()).isoformat() + "Z",
@@ -131,3 +135,7 @@ def analyze_text(
                 "confidence_formula": "0.4*llm_score+0.3*sentiment_strength+0.3*historical_similarity"
             }
         }
+
+    if related_sources:
+        result["related_sources"] = list(related_sources)
+    return result
@@ -0,0 +1,547 @@
+"""
+Cold archive for events evicted from the in-memory hot window.
+
+Events are appended to gzip-compressed JSONL segments partitioned by the
+UTC day of their timestamp (archive/events-YYYY-MM-DD.jsonl.gz). Their
+directory (event_id -> partition, hashed dedup keys, rollup counters),
+postings of the filter fields and a full-text index live in an on-disk
+SQLite database (archive/index.db), so memory holds only per-partition
+counts however large the archive grows, and a filtered listing reads only
+the partitions holding matches. Payloads are read back from the segments
+on demand.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+from app.storage.backend import EVENT_FILTER_FIELDS, event_filter_values, event_matches, event_sort_key, timestamp_sort_key
+from app.storage.loader import loads
+from app.storage.rollups import EVENT_ROLLUP_FIELDS, UNKNOWN, StatsRollup, event_rollup_values
+from app.storage.search import QueryTerm, event_search_text, fts5_match_expression, tokenize
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_FILE = "index.db"
+# In-memory directory of archives written before index.db; imported once
+LEGACY_DIRECTORY_FILE = "directory.jsonl"
+# Postings counted per filter when choosing which one drives a listing
+DRIVER_COUNT_CAP = 10000
+
+INDEX_SCHEMA = """
+-- One row per archived event; indexed = 0 until its payload is in the
+-- full-text and filter indexes. sort_id is event_id or '' (event_sort_key).
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    event_id TEXT UNIQUE,
+    sort_id TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    indexed INTEGER NOT NULL DEFAULT 0,
+    length INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_events_key ON events(key);
+CREATE INDEX IF NOT EXISTS idx_events_partition ON events(partition);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp, sort_id);
+
+-- Filter field values (EVENT_FILTER_FIELDS) per event, in event_sort_key order
+CREATE TABLE IF NOT EXISTS event_values (
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    sort_id TEXT NOT NULL,
+    event INTEGER NOT NULL REFERENCES events(id)
+);
+CREATE INDEX IF NOT EXISTS idx_event_values ON event_values(field, value, timestamp, sort_id);
+CREATE INDEX IF NOT EXISTS idx_event_values_event ON event_values(event, field, value);
+
+-- Rollup counters over archived events
+CREATE TABLE IF NOT EXISTS event_counters (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+);
+
+-- Contentless full-text index keyed by events.id
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(body, content='', tokenize='unicode61 remove_diacritics 0');
+CREATE VIRTUAL TABLE IF NOT EXISTS events_vocab USING fts5vocab(events_fts, 'row');
+
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def dedup_key_hash(headline: str, source: str) -> int:
+    """Stable 64-bit hash of a (headline, source) pair."""
+    digest = hashlib.blake2b(f"{headline}\x1f{source}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _signed(key: int) -> int:
+    """Map an unsigned 64-bit hash onto SQLite's signed INTEGER range."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def partition_for_timestamp(ts: float) -> str:
+    """UTC day partition ("YYYY-MM-DD") for an epoch timestamp."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def partition_for(event: dict) -> str:
+    """UTC day partition ("YYYY-MM-DD") for an event."""
+    return partition_for_timestamp(timestamp_sort_key(event.get("timestamp")))
+
+
+class ArchiveIndex:
+    """SQLite directory and full-text index of an archive's events."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(INDEX_SCHEMA)
+        # Full-text collection statistics for BM25, kept current as events are indexed
+        self._stats_lock = threading.Lock()
+        self.documents, self.total_length = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM events WHERE indexed = 1"
+        ).fetchone()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, rollup_values: Dict[str, str]) -> None:
+        conn.executemany(
+            "INSERT INTO event_counters (dimension, value, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1",
+            list(rollup_values.items()),
+        )
+
+    @staticmethod
+    def _index_payload(conn: sqlite3.Connection, row_id: int, event: dict) -> int:
+        """Add an event's text and filter values to the indexes; returns its token count."""
+        text = event_search_text(event)
+        conn.execute("INSERT INTO events_fts (rowid, body) VALUES (?, ?)", (row_id, text))
+        timestamp, sort_id = event_sort_key(event)
+        conn.executemany(
+            "INSERT INTO event_values (field, value, timestamp, sort_id, event) VALUES (?, ?, ?, ?, ?)",
+            [
+                (field, value, timestamp, sort_id, row_id)
+                for field in EVENT_FILTER_FIELDS for value in event_filter_values(event, field)
+            ],
+        )
+        return len(tokenize(text))
+
+    def add(self, events: List[Tuple[dict, str]]) -> None:
+        """Register and index (event, partition) pairs in one transaction."""
+        added_length = 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            for event, partition in events:
+                timestamp, sort_id = event_sort_key(event)
+                cursor = conn.execute(
+                    "INSERT INTO events (event_id, sort_id, partition, key, timestamp, indexed) VALUES (?, ?, ?, ?, ?, 1)",
+                    (
+                        event.get("event_id"), sort_id, partition,
+                        _signed(dedup_key_hash(event.get("headline"), event.get("source"))), timestamp,
+                    ),
+                )
+                length = self._index_payload(conn, cursor.lastrowid, event)
+                conn.execute("UPDATE events SET length = ? WHERE id = ?", (length, cursor.lastrowid))
+                self._count(conn, event_rollup_values(event))
+                added_length += length
+        with self._stats_lock:
+            self.documents += len(events)
+            self.total_length += added_length
+
+    def import_legacy_directory(self, path: str) -> int:
+        """
+        Register the entries of a pre-index directory.jsonl (once; the
+        payloads are full-text indexed later by index_payloads).
+
+        Returns:
+            Number of entries imported
+        """
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE name = 'legacy_directory_imported'").fetchone():
+            return 0
+        imported = 0
+        with conn, open(path, "rb") as f:
+            conn.execute("BEGIN")
+            for line in f:
+                try:
+                    entry = loads(line)
+                except ValueError:
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO events (event_id, sort_id, partition, key, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (entry["id"], entry["id"] or "", entry["p"], _signed(entry["k"]), entry["t"]),
+                )
+                if cursor.rowcount:
+                    # Entries written before rollups existed have no "r"
+                    rollup_values = dict(zip(EVENT_ROLLUP_FIELDS, entry.get("r") or ()))
+                    self._count(conn, {dimension: rollup_values.get(dimension, UNKNOWN) for dimension in EVENT_ROLLUP_FIELDS})
+                    imported += 1
+            conn.execute("INSERT INTO meta (name, value) VALUES ('legacy_directory_imported', '1')")
+        return imported
+
+    def unindexed_partitions(self) -> List[str]:
+        rows = self._conn().execute("SELECT DISTINCT partition FROM events WHERE indexed = 0 ORDER BY partition")
+        return [row[0] for row in rows]
+
+    def index_payloads(self, partition: str, events: Iterable[dict]) -> int:
+        """
+        Index the payloads of registered events of one partition that are not indexed yet.
+
+        Returns:
+            Number of events indexed
+        """
+        indexed = added_length = 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            for event in events:
+                row = conn.execute(
+                    "SELECT id FROM events WHERE key = ? AND event_id IS ? AND partition = ? AND indexed = 0 LIMIT 1",
+                    (_signed(dedup_key_hash(event.get("headline"), event.get("source"))), event.get("event_id"), partition),
+                ).fetchone()
+                if row is None:
+                    continue
+                length = self._index_payload(conn, row[0], event)
+                conn.execute("UPDATE events SET indexed = 1, length = ? WHERE id = ?", (length, row[0]))
+                indexed += 1
+                added_length += length
+        with self._stats_lock:
+            self.documents += indexed
+            self.total_length += added_length
+        return indexed
+
+    def stats(self) -> Tuple[Dict[str, int], float, Dict[str, Dict[str, int]]]:
+        """(events per partition, newest timestamp, rollup counters) of the whole archive."""
+        conn = self._conn()
+        partition_counts = dict(conn.execute("SELECT partition, COUNT(*) FROM events GROUP BY partition").fetchall())
+        max_timestamp = conn.execute("SELECT COALESCE(MAX(timestamp), 0) FROM events").fetchone()[0]
+        counters: Dict[str, Dict[str, int]] = {}
+        for dimension, value, count in conn.execute("SELECT dimension, value, count FROM event_counters"):
+            counters.setdefault(dimension, {})[value] = count
+        return partition_counts, max_timestamp, counters
+
+    def partition_of(self, event_id: str) -> Optional[str]:
+        row = self._conn().execute("SELECT partition FROM events WHERE event_id = ?", (event_id,)).fetchone()
+        return row[0] if row else None
+
+    def newest(
+        self,
+        limit: int,
+        filters: Dict[str, str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[Tuple[str, float, str]]:
+        """
+        (partition, timestamp, sort_id) of the newest `limit` events matching
+        every filter, in descending event_sort_key order.
+
+        The filter with the fewest postings drives the scan (through its
+        index, already in order); the others are checked per candidate.
+        """
+        conn = self._conn()
+        params: list = []
+        if filters:
+            counts = {
+                field: conn.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM event_values WHERE field = ? AND value = ? LIMIT ?)",
+                    (field, value, DRIVER_COUNT_CAP),
+                ).fetchone()[0]
+                for field, value in filters.items()
+            }
+            if not all(counts.values()):
+                return []
+            driver = min(counts, key=counts.get)
+            sql = (
+                "SELECT events.partition, v.timestamp, v.sort_id FROM event_values AS v "
+                "JOIN events ON events.id = v.event WHERE v.field = ? AND v.value = ?"
+            )
+            params += [driver, filters[driver]]
+            for field, value in filters.items():
+                if field != driver:
+                    sql += " AND EXISTS (SELECT 1 FROM event_values AS w WHERE w.event = v.event AND w.field = ? AND w.value = ?)"
+                    params += [field, value]
+            table = "v"
+        else:
+            sql = "SELECT partition, timestamp, sort_id FROM events WHERE 1"
+            table = "events"
+        if start is not None:
+            sql += f" AND {table}.timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += f" AND {table}.timestamp < ?"
+            params.append(end)
+        if before is not None:
+            sql += f" AND ({table}.timestamp < ? OR ({table}.timestamp = ? AND {table}.sort_id < ?))"
+            params += [before[0], before[0], before[1]]
+        sql += f" ORDER BY {table}.timestamp DESC, {table}.sort_id DESC LIMIT ?"
+        params.append(limit)
+        return conn.execute(sql, params).fetchall()
+
+    def has_key(self, key: int) -> bool:
+        return self._conn().execute("SELECT 1 FROM events WHERE key = ? LIMIT 1", (_signed(key),)).fetchone() is not None
+
+    def expand(self, term: str, prefix: bool, max_terms: int = 256) -> List[str]:
+        """Indexed terms a query term matches (itself, or up to max_terms completions)."""
+        if not prefix:
+            return [term]
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        rows = self._conn().execute(
+            "SELECT term FROM events_vocab WHERE term >= ? AND term < ? ORDER BY term LIMIT ?",
+            (term, upper, max_terms),
+        )
+        return [row[0] for row in rows]
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        terms = list(terms)
+        if not terms:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT term, doc FROM events_vocab WHERE term IN ({','.join('?' * len(terms))})", terms,
+        )
+        return dict(rows.fetchall())
+
+    def search(self, terms: List[QueryTerm], limit: int) -> List[str]:
+        """IDs of the best `limit` events matching every term, by FTS5's own BM25."""
+        if not terms:
+            return []
+        rows = self._conn().execute(
+            "SELECT events.event_id FROM events_fts JOIN events ON events.id = events_fts.rowid "
+            "WHERE events_fts MATCH ? AND events.event_id IS NOT NULL "
+            "ORDER BY bm25(events_fts), events.id DESC LIMIT ?",
+            (fts5_match_expression(terms), limit),
+        )
+        return [row[0] for row in rows]
+
+
+class ColdArchive:
+    """Append-only, day-partitioned, compressed event archive."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._partition_counts: Dict[str, int] = {}
+        self.max_timestamp = 0.0
+        # Aggregates over archived events, loaded from the index
+        self.rollup = StatsRollup()
+        # Most recently read partition and its decoded events
+        self._cached_partition: Optional[Tuple[str, List[dict]]] = None
+        # Most recently looked-up partition, by event_sort_key
+        self._cached_lookup: Optional[Tuple[str, Dict[Tuple[float, str], dict]]] = None
+        self._index: Optional[ArchiveIndex] = None
+        # Set once every archived event is in the full-text and filter indexes
+        self.search_ready = threading.Event()
+        if os.path.isdir(directory):
+            self._load()
+        else:
+            self.search_ready.set()
+
+    @property
+    def index(self) -> ArchiveIndex:
+        if self._index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._index = ArchiveIndex(os.path.join(self.directory, INDEX_FILE))
+        return self._index
+
+    def _load(self) -> None:
+        legacy_directory = os.path.join(self.directory, LEGACY_DIRECTORY_FILE)
+        if os.path.exists(legacy_directory):
+            self.index.import_legacy_directory(legacy_directory)
+        self._partition_counts, self.max_timestamp, counters = self.index.stats()
+        for dimension, counts in counters.items():
+            self.rollup.event_counts.setdefault(dimension, {}).update(counts)
+        self._start_search_backfill()
+
+    def _start_search_backfill(self) -> None:
+        """
+        Index events registered without their payload (imported from a
+        legacy directory) on a background thread; until it finishes, those
+        events are missing from search results and filtered listings fall
+        back to walking every archived event.
+        """
+        partitions = self.index.unindexed_partitions()
+        if not partitions:
+            self.search_ready.set()
+            return
+
+        def backfill() -> None:
+            try:
+                for partition in partitions:
+                    self.index.index_payloads(partition, self._decode_partition(partition, torn_ok=True))
+            except Exception as e:
+                print(f"⚠ Archive search backfill failed: {e}")
+            finally:
+                self.search_ready.set()
+
+        threading.Thread(target=backfill, name="archive-search-backfill", daemon=True).start()
+
+    def _segment_path(self, partition: str) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{partition}{SEGMENT_SUFFIX}")
+
+    def __len__(self) -> int:
+        return sum(self._partition_counts.values())
+
+    def __contains__(self, event_id: str) -> bool:
+        return bool(self._partition_counts) and self.index.partition_of(event_id) is not None
+
+    def append(self, events: List[dict]) -> int:
+        """
+        Archive a batch of events, one gzip member per touched partition.
+
+        Events whose ID is already archived are skipped, so re-evicting
+        events restored from an older snapshot does not duplicate them.
+
+        Returns:
+            Number of events written
+        """
+        by_partition: Dict[str, List[dict]] = {}
+        batch_ids = set()
+        for event in events:
+            event_id = event.get("event_id")
+            if event_id is not None:
+                if event_id in batch_ids or event_id in self:
+                    continue
+                batch_ids.add(event_id)
+            by_partition.setdefault(partition_for(event), []).append(event)
+        if not by_partition:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        for partition, batch in by_partition.items():
+            payload = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch)
+            with gzip.open(self._segment_path(partition), "ab") as f:
+                f.write(payload.encode("utf-8"))
+            if self._cached_partition and self._cached_partition[0] == partition:
+                self._cached_partition = None
+            if self._cached_lookup and self._cached_lookup[0] == partition:
+                self._cached_lookup = None
+        # The index is written after the segments, so an entry always points
+        # at data that is already on disk. Events written before a crash here
+        # are unregistered, and are evicted again from the replayed WAL.
+        self.index.add([(event, partition) for partition, batch in by_partition.items() for event in batch])
+        for partition, batch in by_partition.items():
+            self._partition_counts[partition] = self._partition_counts.get(partition, 0) + len(batch)
+            for event in batch:
+                self.rollup.add_event(event)
+                self.max_timestamp = max(self.max_timestamp, timestamp_sort_key(event.get("timestamp")))
+        return sum(len(batch) for batch in by_partition.values())
+
+    def _decode_partition(self, partition: str, torn_ok: bool = False) -> List[dict]:
+        """
+        Decode every event in one partition (in archive order), bypassing the cache.
+
+        Args:
+            torn_ok: Return what was read if the last gzip member is still
+                being written (readers not holding the backend lock)
+        """
+        path = self._segment_path(partition)
+        if not os.path.exists(path):
+            return []
+        events = []
+        with gzip.open(path, "rb") as f:
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        events.append(loads(line))
+            except (EOFError, gzip.BadGzipFile, zlib.error, ValueError):
+                if not torn_ok:
+                    raise
+        return events
+
+    def read_partition(self, partition: str) -> List[dict]:
+        """Decode every event in one partition (in archive order)."""
+        cached = self._cached_partition
+        if cached and cached[0] == partition:
+            return cached[1]
+        events = self._decode_partition(partition)
+        self._cached_partition = (partition, events)
+        return events
+
+    def partitions(self, newest_first: bool = False) -> List[str]:
+        return sorted(self._partition_counts, reverse=newest_first)
+
+    def get(self, event_id: str) -> Optional[dict]:
+        if not self._partition_counts:
+            return None
+        partition = self.index.partition_of(event_id)
+        if partition is None:
+            return None
+        for event in reversed(self.read_partition(partition)):
+            if event.get("event_id") == event_id:
+                return event
+        return None
+
+    def has_key(self, headline: str, source: str) -> bool:
+        return bool(self._partition_counts) and self.index.has_key(dedup_key_hash(headline, source))
+
+    def _partition_by_key(self, partition: str) -> Dict[Tuple[float, str], dict]:
+        cached = self._cached_lookup
+        if cached and cached[0] == partition:
+            return cached[1]
+        by_key = {event_sort_key(event): event for event in self.read_partition(partition)}
+        self._cached_lookup = (partition, by_key)
+        return by_key
+
+    def newest(
+        self,
+        limit: int,
+        filters: Dict[str, str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+        exclude: Container[str] = (),
+    ) -> List[dict]:
+        """
+        Newest archived events matching the filters, in descending event_sort_key order.
+
+        Matches come from the index's filter postings, so only partitions
+        holding them are read.
+
+        Args:
+            limit: Maximum events
+            filters: Normalized {field: value} filters
+            start: Inclusive lower timestamp bound
+            end: Exclusive upper timestamp bound
+            before: Only return events whose sort key is below this
+            exclude: Event IDs to skip (e.g. those with a hot copy)
+        """
+        events: List[dict] = []
+        if not self._partition_counts:
+            return events
+        # Legacy events lack postings until the backfill is done
+        index_filters = filters if self.search_ready.is_set() else {}
+        while len(events) < limit:
+            wanted = limit - len(events)
+            rows = self.index.newest(wanted, index_filters, start, end, before)
+            for partition, timestamp, sort_id in rows:
+                event = self._partition_by_key(partition).get((timestamp, sort_id))
+                if event is not None and event.get("event_id") not in exclude and event_matches(event, filters):
+                    events.append(event)
+            if len(rows) < wanted:
+                break
+            before = rows[-1][1:]
+        return events
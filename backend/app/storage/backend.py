@@ -0,0 +1,186 @@
+"""
+Storage backend interface for the repository.
+
+The repository module validates data and delegates storage to one of the
+implementations: MemoryBackend (default, in-process lists) or SQLiteBackend.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+# Fields with secondary indexes, usable as /api/events filters
+EVENT_FILTER_FIELDS = ("ticker", "source", "severity", "market_pressure")
+
+
+def timestamp_sort_key(value) -> float:
+    """Convert an event timestamp (datetime or ISO string) into a UTC epoch used for ordering."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def event_sort_key(event: dict) -> Tuple[float, str]:
+    """
+    Total order for events: timestamp, then event_id to break ties.
+
+    Stable across restarts and backends, so a key can serve as a pagination
+    cursor: the next page holds the events strictly below it.
+    """
+    return timestamp_sort_key(event.get("timestamp")), event.get("event_id") or ""
+
+
+def normalize_filter_value(field: str, value: str) -> str:
+    """Tickers match case-insensitively; other fields match exactly."""
+    return value.upper() if field == "ticker" else value
+
+
+def event_filter_values(event: dict, field: str) -> Set[str]:
+    """Indexed values of one filter field for an event (tickers come from affected_assets)."""
+    if field == "ticker":
+        return {
+            normalize_filter_value("ticker", str(asset["ticker"]))
+            for asset in event.get("affected_assets") or []
+            if asset.get("ticker")
+        }
+    value = event.get(field)
+    return {value} if value is not None else set()
+
+
+def event_matches(event: dict, filters: Dict[str, str]) -> bool:
+    """Check an event against normalized {field: value} filters."""
+    return all(value in event_filter_values(event, field) for field, value in filters.items())
+
+
+class StorageBackend(ABC):
+    """
+    Abstract base class for repository storage engines.
+
+    Implementations must be safe to call from multiple threads. Returned
+    event and validation dicts are shared with the store and must be
+    treated as read-only.
+    """
+
+    @abstractmethod
+    def add_event(self, event: dict) -> None:
+        """Store an already validated event."""
+        pass
+
+    @abstractmethod
+    def get_events(self) -> List[dict]:
+        """Get all events, most recently added first."""
+        pass
+
+    def get_latest_events(self, limit: int) -> List[dict]:
+        """Get up to `limit` events ordered by timestamp (newest first)."""
+        return self.query_events(limit, {})
+
+    @abstractmethod
+    def query_events(
+        self,
+        limit: int,
+        filters: Dict[str, str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        """
+        Get up to `limit` matching events in descending event_sort_key order.
+
+        Args:
+            limit: Maximum number of events to return
+            filters: Normalized {field: value} pairs over EVENT_FILTER_FIELDS,
+                all of which must match
+            start: Inclusive lower timestamp bound (UTC epoch)
+            end: Exclusive upper timestamp bound (UTC epoch)
+            before: Only return events whose event_sort_key is below this
+                (the key of the last event on the previous page)
+        """
+        pass
+
+    @abstractmethod
+    def get_event_by_id(self, event_id: str) -> Optional[dict]:
+        """Get the most recently added event with this ID."""
+        pass
+
+    @abstractmethod
+    def has_event(self, headline: str, source: str) -> bool:
+        """Check whether an event with this headline and source is stored."""
+        pass
+
+    @abstractmethod
+    def search_events(self, terms: List[Tuple[str, bool]], limit: int) -> List[Tuple[dict, float]]:
+        """
+        Full-text search over headlines and analysis text.
+
+        Args:
+            terms: Parsed (term, is_prefix) pairs from search.parse_query, all
+                of which must match
+            limit: Maximum number of results
+
+        Returns:
+            (event, score) pairs, most relevant first (higher score is better)
+        """
+        pass
+
+    @abstractmethod
+    def add_validation(self, validation: dict) -> None:
+        """Store an already validated validation."""
+        pass
+
+    @abstractmethod
+    def get_validations(self) -> List[dict]:
+        """Get all validations in insertion order."""
+        pass
+
+    @abstractmethod
+    def get_latest_validations(self, limit: int) -> List[dict]:
+        """Get up to `limit` validations ordered by validated_at (newest first)."""
+        pass
+
+    @abstractmethod
+    def get_validation(self, event_id: str, horizon: Optional[str] = None) -> Optional[dict]:
+        """Get the first validation for an event, optionally for one horizon."""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """Get counts and last-write timestamps."""
+        pass
+
+    @abstractmethod
+    def get_rollups(self) -> dict:
+        """
+        Get incrementally maintained aggregates (see rollups.build_rollup_summary):
+        event counts by severity, sentiment and source, and validation status
+        counts and accuracy per ticker and horizon.
+        """
+        pass
+
+    @abstractmethod
+    def get_version(self) -> int:
+        """Get a counter that changes whenever an event or validation is written."""
+        pass
+
+    def compact(self) -> bool:
+        """Fold incremental write logs into a compact on-disk form, if the engine has one."""
+        return True
+
+    def flush(self) -> None:
+        """Persist any writes still buffered in memory."""
+        pass
+
+    def close(self) -> None:
+        """Flush buffered writes and release files and connections."""
+        pass
+
+    def get_persistence_stats(self) -> dict:
+        """Get write-path metrics (buffered records, flush lag, bytes written)."""
+        return {}
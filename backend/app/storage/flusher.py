@@ -0,0 +1,132 @@
+"""
+Debounced background flusher for repository persistence.
+
+Writes are queued in memory and handed to a flush callback from a
+background thread, either every `interval_ms` or as soon as `max_pending`
+records are waiting, so request handlers never wait on disk I/O.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+Record = Tuple[str, dict]
+
+
+class BackgroundFlusher:
+    """Coalesces queued records and flushes them in batches from a daemon thread."""
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Record]], int],
+        interval_ms: int = 200,
+        max_pending: int = 100,
+    ):
+        """
+        Args:
+            flush_fn: Persists a batch of records and returns the bytes written
+            interval_ms: Maximum time a record waits before being flushed
+            max_pending: Flush early once this many records are queued
+        """
+        self.flush_fn = flush_fn
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+
+        self._pending: List[Record] = []
+        self._oldest_pending_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.bytes_written = 0
+        self.records_flushed = 0
+        self.flush_count = 0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="repository-flusher", daemon=True)
+            self._thread.start()
+
+    def submit(self, kind: str, data: dict) -> None:
+        """Queue a record for the next flush."""
+        with self._cond:
+            first = self._oldest_pending_at is None
+            if first:
+                self._oldest_pending_at = time.monotonic()
+            self._pending.append((kind, data))
+            # Wake the thread to arm its deadline, or to flush early when full
+            if first or len(self._pending) >= self.max_pending:
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and len(self._pending) < self.max_pending:
+                    if self._oldest_pending_at is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._oldest_pending_at + self.interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            self.flush()
+            if self.last_error is not None:
+                # Back off instead of spinning on a persistent I/O error
+                with self._cond:
+                    self._cond.wait(self.interval)
+
+    def flush(self) -> None:
+        """Flush everything queued so far on the calling thread."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                oldest, self._oldest_pending_at = self._oldest_pending_at, None
+            if not batch:
+                return
+            try:
+                self.bytes_written += self.flush_fn(batch)
+                self.last_error = None
+            except Exception as e:
+                print(f"⚠ Background flush failed: {e}")
+                self.last_error = str(e)
+                # Put the batch back so the next flush retries it
+                with self._cond:
+                    self._pending[:0] = batch
+                    self._oldest_pending_at = oldest
+                return
+            self.records_flushed += len(batch)
+            self.flush_count += 1
+            self.last_flush_lag_ms = round((time.monotonic() - oldest) * 1000, 2)
+            self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.last_flush_lag_ms)
+
+    def stop(self) -> None:
+        """Stop the thread and flush whatever is still queued."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._stopping = False
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            pending = len(self._pending)
+            oldest = self._oldest_pending_at
+        return {
+            "pending_records": pending,
+            "current_lag_ms": round((time.monotonic() - oldest) * 1000, 2) if oldest else 0.0,
+            "last_flush_lag_ms": self.last_flush_lag_ms,
+            "max_flush_lag_ms": self.max_flush_lag_ms,
+            "bytes_written": self.bytes_written,
+            "records_flushed": self.records_flushed,
+            "flush_count": self.flush_count,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,45 @@
+"""
+Fast JSON decoding and encoding for persisted data and API responses.
+
+Uses orjson when it is installed (several times faster than the standard
+library on large snapshots) and falls back to json otherwise.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    DECODER = "orjson"
+
+    def loads(data) -> Any:
+        """Decode JSON from str or bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode JSON-compatible data as compact UTF-8 bytes."""
+        return orjson.dumps(obj)
+
+except ImportError:
+    DECODER = "json"
+
+    def loads(data) -> Any:
+        """Decode JSON from str or bytes."""
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode JSON-compatible data as compact UTF-8 bytes."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def load_json_file(path: str) -> Any:
+    """
+    Read and decode a JSON file in one pass.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file is not valid JSON
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
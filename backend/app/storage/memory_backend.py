@@ -0,0 +1,469 @@
+"""
+In-memory storage backend (the default).
+
+Recent events live in a bounded hot window (a deque, newest first) with
+hash and timestamp indexes; older events are evicted into a compressed
+cold archive on disk. Writes are appended to a write-ahead log and
+periodically compacted into JSON backup snapshots.
+
+All public methods are thread-safe: reads share a reader/writer lock and
+writes take it exclusively. Disk I/O for the WAL happens outside the lock.
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.storage.archive import ColdArchive
+from app.storage.backend import (
+    EVENT_FILTER_FIELDS,
+    StorageBackend,
+    event_filter_values,
+    event_matches,
+    event_sort_key,
+)
+from app.storage.flusher import BackgroundFlusher
+from app.storage.locking import ReadWriteLock
+from app.storage.rollups import StatsRollup
+from app.storage.search import SearchIndex, event_search_text, rank_documents
+from app.storage.wal import WriteAheadLog
+
+
+IndexEntry = Tuple[float, str, int, dict]
+
+
+def _write_json_atomic(path: str, data: list) -> int:
+    """Write JSON to a temp file and rename it over `path`. Returns the file size."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class MemoryBackend(StorageBackend):
+    """Hot-window store with id, dedup-key, timestamp and filter-field indexes."""
+
+    def __init__(
+        self,
+        events: Optional[List[dict]] = None,
+        validations: Optional[List[dict]] = None,
+        wal_path: Optional[str] = None,
+        events_backup_path: Optional[str] = None,
+        validations_backup_path: Optional[str] = None,
+        compaction_threshold: int = 1000,
+        flush_interval_ms: int = 0,
+        flush_max_records: int = 100,
+        hot_capacity: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        evict_batch: int = 1,
+    ):
+        """
+        Initialize the store and replay the WAL on top of the given data.
+
+        Args:
+            events: Initial events, newest first (e.g. loaded from a backup)
+            validations: Initial validations in insertion order
+            wal_path: Write-ahead log path (None disables persistence)
+            events_backup_path: Snapshot written on compaction
+            validations_backup_path: Snapshot written on compaction
+            compaction_threshold: Logged writes after which the WAL is compacted
+            flush_interval_ms: If > 0, WAL writes are queued and flushed by a
+                background thread at most this long after they happen
+            flush_max_records: Queued writes that trigger an early flush
+            hot_capacity: Maximum events kept in memory (None = unbounded)
+            archive_dir: Cold archive directory for evicted events (None drops them)
+            evict_batch: Events moved to the archive at once when the hot
+                window overflows, so archive writes are amortized
+        """
+        self.archive = ColdArchive(archive_dir) if archive_dir else None
+        events = events or []
+        if self.archive is not None and len(self.archive):
+            # The snapshot is only rewritten on compaction, so it can still hold
+            # events archived since; they are served (and counted) from the archive.
+            events = [event for event in events if event.get("event_id") not in self.archive]
+        self.events_store: Deque[dict] = deque(events)
+        self.validations_store: List[dict] = validations if validations is not None else []
+        self.events_backup_path = events_backup_path
+        self.validations_backup_path = validations_backup_path
+        self.compaction_threshold = compaction_threshold
+        self.hot_capacity = hot_capacity
+        self.evict_batch = max(1, evict_batch)
+
+        self._events_by_id: Dict[str, dict] = {}
+        self._event_keys: Counter = Counter()
+        # Ascending (timestamp, event_id, insertion seq, event) entries, i.e.
+        # event_sort_key order; the seq breaks ties between duplicate IDs so
+        # event dicts are never compared.
+        self._timestamp_index: List[IndexEntry] = []
+        # id(event) -> its timestamp index entry, for removal on eviction
+        self._index_entries: Dict[int, IndexEntry] = {}
+        # field -> value -> ascending timestamp index entries (inverted indexes)
+        self._field_index: Dict[str, Dict[str, List[IndexEntry]]] = {
+            field: {} for field in EVENT_FILTER_FIELDS
+        }
+        self._index_seq = itertools.count()
+        # event_id -> horizon -> validation (first one added wins)
+        self._validations_by_event: Dict[str, Dict[str, dict]] = {}
+        # Full-text index of the hot window; archived events are searched
+        # through the archive's own on-disk index
+        self.search_index = SearchIndex()
+        # Running aggregates; evicted events stay counted, and events archived
+        # by earlier runs are counted from the archive index.
+        self.rollup = StatsRollup()
+        if self.archive is not None:
+            self.rollup.merge(self.archive.rollup)
+
+        # events_store is newest first, so index oldest first to let the
+        # newest entry win on duplicate IDs.
+        for event in reversed(self.events_store):
+            self._index_event(event)
+        for validation in self.validations_store:
+            self._index_validation(validation)
+        self._evict_overflow()
+
+        # Guards the hot window, validations and all indexes
+        self._lock = ReadWriteLock()
+        # Bumped on every write; lets callers cache derived responses
+        self._version = 0
+        self.replayed_records = 0
+        self.snapshot_bytes_written = 0
+        # Serializes WAL writes and compaction between request and flusher threads
+        self._persist_lock = threading.RLock()
+        self._flusher: Optional[BackgroundFlusher] = None
+        self._wal = WriteAheadLog(wal_path) if wal_path else None
+        if self._wal is not None:
+            self._replay_wal()
+            self.replayed_records = self._wal.records_since_compaction
+            if self._wal.records_since_compaction >= self.compaction_threshold:
+                self.compact()
+            if flush_interval_ms > 0:
+                self._flusher = BackgroundFlusher(self._write_records, flush_interval_ms, flush_max_records)
+                self._flusher.start()
+
+    # -- indexing -----------------------------------------------------------
+
+    def _index_event(self, event: dict) -> None:
+        """Register an event in the id, dedup-key and timestamp indexes."""
+        event_id = event.get("event_id")
+        if event_id is not None:
+            self._events_by_id[event_id] = event
+        self._event_keys[(event.get("headline"), event.get("source"))] += 1
+        entry = (*event_sort_key(event), next(self._index_seq), event)
+        bisect.insort(self._timestamp_index, entry)
+        self._index_entries[id(event)] = entry
+        for field, postings in self._field_index.items():
+            for value in event_filter_values(event, field):
+                bisect.insort(postings.setdefault(value, []), entry)
+        if event_id is not None:
+            self.search_index.add(event_id, event_search_text(event))
+        self.rollup.add_event(event)
+
+    def _unindex_event(self, event: dict) -> None:
+        """Remove an evicted event from the hot indexes."""
+        event_id = event.get("event_id")
+        if self._events_by_id.get(event_id) is event:
+            del self._events_by_id[event_id]
+            self.search_index.remove(event_id)
+        key = (event.get("headline"), event.get("source"))
+        self._event_keys[key] -= 1
+        if self._event_keys[key] <= 0:
+            del self._event_keys[key]
+        entry = self._index_entries.pop(id(event))
+        del self._timestamp_index[bisect.bisect_left(self._timestamp_index, entry)]
+        for field, postings in self._field_index.items():
+            for value in event_filter_values(event, field):
+                entries = postings[value]
+                del entries[bisect.bisect_left(entries, entry)]
+                if not entries:
+                    del postings[value]
+
+    def _evict_overflow(self) -> None:
+        """Move the oldest-inserted events to the archive once the hot window is full."""
+        if self.hot_capacity is None or len(self.events_store) <= self.hot_capacity:
+            return
+        count = max(self.evict_batch, len(self.events_store) - self.hot_capacity)
+        evicted = [self.events_store.pop() for _ in range(min(count, len(self.events_store)))]
+        if self.archive is not None:
+            self.archive.append(evicted)
+        for event in evicted:
+            self._unindex_event(event)
+
+    def _index_validation(self, validation: dict) -> None:
+        """Register a validation in the (event_id, horizon) index."""
+        horizons = self._validations_by_event.setdefault(validation.get("event_id"), {})
+        horizons.setdefault(validation.get("horizon"), validation)
+        self.rollup.add_validation(validation)
+
+    # -- persistence --------------------------------------------------------
+
+    def _replay_wal(self) -> None:
+        """
+        Re-apply logged writes on top of the loaded backups.
+
+        Records already present in the backups (e.g. when a crash hit between
+        writing the backups and truncating the log) are skipped, so replay is
+        idempotent.
+        """
+        replayed_events = []
+        for kind, data in self._wal.replay():
+            if kind == "event":
+                event_id = data.get("event_id")
+                if self._events_by_id.get(event_id) == data:
+                    continue
+                if self.archive is not None and event_id in self.archive:
+                    continue
+                replayed_events.append(data)
+                self._index_event(data)
+            elif kind == "validation":
+                if self._get_validation(data.get("event_id"), data.get("horizon")) == data:
+                    continue
+                self.validations_store.append(data)
+                self._index_validation(data)
+        # events_store is newest first; extendleft reverses the oldest-first list
+        self.events_store.extendleft(replayed_events)
+        self._evict_overflow()
+
+    def _save_backup(self, path: Optional[str], data: List[dict], label: str) -> bool:
+        if not path:
+            return True
+        try:
+            self.snapshot_bytes_written += _write_json_atomic(path, data)
+            return True
+        except Exception as e:
+            print(f"⚠ Failed to save {label} backup: {e}")
+            return False
+
+    def _compact(self) -> bool:
+        with self._persist_lock:
+            # Copy the lists so concurrent inserts cannot change them mid-dump;
+            # records added after this point are still queued for the new WAL.
+            with self._lock.read_locked():
+                events = list(self.events_store)
+                validations = list(self.validations_store)
+            if (
+                self._save_backup(self.events_backup_path, events, "events")
+                and self._save_backup(self.validations_backup_path, validations, "validations")
+            ):
+                if self._wal is not None:
+                    self._wal.truncate()
+                return True
+            return False
+
+    def compact(self) -> bool:
+        """Write full backups and truncate the WAL once both are safely on disk."""
+        self.flush()
+        return self._compact()
+
+    def _write_records(self, records: List[Tuple[str, dict]]) -> int:
+        """Append records to the WAL, compacting it once it grows past the threshold."""
+        with self._persist_lock:
+            written = self._wal.append_many(records)
+            if self._wal.records_since_compaction >= self.compaction_threshold:
+                self._compact()
+            return written
+
+    def _log_write(self, kind: str, data: dict) -> None:
+        """Persist a write, via the background flusher when one is running."""
+        if self._wal is None:
+            return
+        if self._flusher is not None:
+            self._flusher.submit(kind, data)
+            return
+        try:
+            self._write_records([(kind, data)])
+        except Exception as e:
+            print(f"⚠ Failed to append to WAL: {e}")
+
+    def flush(self) -> None:
+        if self._flusher is not None:
+            self._flusher.flush()
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.stop()
+        if self._wal is not None:
+            self._wal.close()
+
+    def get_persistence_stats(self) -> dict:
+        stats = {
+            "mode": "background" if self._flusher is not None else "inline",
+            "wal_records_since_compaction": self._wal.records_since_compaction if self._wal else 0,
+            "snapshot_bytes_written": self.snapshot_bytes_written,
+        }
+        if self._flusher is not None:
+            stats.update(self._flusher.get_stats())
+        return stats
+
+    # -- events -------------------------------------------------------------
+
+    def add_event(self, event: dict) -> None:
+        with self._lock.write_locked():
+            self.events_store.appendleft(event)
+            self._index_event(event)
+            self._evict_overflow()
+            self._version += 1
+        self._log_write("event", event)
+
+    def get_events(self) -> List[dict]:
+        """Get the events in the hot window (archived events are not loaded)."""
+        with self._lock.read_locked():
+            return list(self.events_store)
+
+    def query_events(
+        self,
+        limit: int,
+        filters: Dict[str, str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        """
+        Walk the smallest matching posting list newest first, so a filtered
+        query costs O(matches) rather than O(store). Time bounds and the
+        cursor are applied by binary search on the (sorted) posting list.
+        """
+        with self._lock.read_locked():
+            if filters:
+                postings = [self._field_index[field].get(value, []) for field, value in filters.items()]
+                candidates = min(postings, key=len)
+            else:
+                candidates = self._timestamp_index
+            lo = bisect.bisect_left(candidates, (start,)) if start is not None else 0
+            hi = len(candidates)
+            if end is not None:
+                hi = min(hi, bisect.bisect_left(candidates, (end,)))
+            if before is not None:
+                hi = min(hi, bisect.bisect_left(candidates, before))
+            hot = []
+            for i in range(hi - 1, lo - 1, -1):
+                if len(hot) == limit:
+                    break
+                event = candidates[i][3]
+                if event_matches(event, filters):
+                    hot.append(event)
+            if self.archive is None or not len(self.archive):
+                return hot
+            # The archive can only contribute if the hot window is short or an
+            # archived event is newer than the oldest hot candidate.
+            if len(hot) == limit and event_sort_key(hot[-1])[0] > self.archive.max_timestamp:
+                return hot
+            # Hot copies win over archived ones with the same ID
+            archived = self.archive.newest(limit, filters, start, end, before, exclude=self._events_by_id)
+        merged = sorted(itertools.chain(hot, archived), key=event_sort_key, reverse=True)
+        return merged[:limit]
+
+    def _get_event(self, event_id: str) -> Optional[dict]:
+        event = self._events_by_id.get(event_id)
+        if event is None and self.archive is not None:
+            event = self.archive.get(event_id)
+        return event
+
+    def get_event_by_id(self, event_id: str) -> Optional[dict]:
+        with self._lock.read_locked():
+            return self._get_event(event_id)
+
+    def has_event(self, headline: str, source: str) -> bool:
+        with self._lock.read_locked():
+            if (headline, source) in self._event_keys:
+                return True
+            return self.archive is not None and self.archive.has_key(headline, source)
+
+    def search_events(self, terms: List[Tuple[str, bool]], limit: int) -> List[Tuple[dict, float]]:
+        with self._lock.read_locked():
+            hot = [
+                (self._events_by_id[event_id], score)
+                for event_id, score in self.search_index.search(terms, limit)
+            ]
+            if self.archive is None or not len(self.archive):
+                return hot
+            archive_index = self.archive.index
+            archived = [
+                event for event in map(self.archive.get, archive_index.search(terms, limit))
+                if event is not None and event.get("event_id") not in self._events_by_id
+            ]
+            if not archived:
+                return hot
+
+            # Rank both sets together, with statistics over hot and archived events
+            groups = [
+                sorted(set(self.search_index.expand(term, prefix)) | set(archive_index.expand(term, prefix)))
+                for term, prefix in terms
+            ]
+            vocabulary = {term for group in groups for term in group}
+            archived_freq = archive_index.document_frequencies(vocabulary)
+            doc_freq = {
+                term: self.search_index.document_frequency(term) + archived_freq.get(term, 0)
+                for term in vocabulary
+            }
+            candidates = sorted(archived + [event for event, _ in hot], key=event_sort_key)
+            ranked = rank_documents(
+                [(event["event_id"], event_search_text(event)) for event in candidates],
+                groups,
+                doc_freq,
+                len(self.search_index) + archive_index.documents,
+                self.search_index.total_length + archive_index.total_length,
+                limit,
+                self.search_index.k1,
+                self.search_index.b,
+            )
+            by_id = {event["event_id"]: event for event in candidates}
+            return [(by_id[event_id], score) for event_id, score in ranked]
+
+    # -- validations --------------------------------------------------------
+
+    def add_validation(self, validation: dict) -> None:
+        with self._lock.write_locked():
+            self.validations_store.append(validation)
+            self._index_validation(validation)
+            self._version += 1
+        self._log_write("validation", validation)
+
+    def get_validations(self) -> List[dict]:
+        with self._lock.read_locked():
+            return list(self.validations_store)
+
+    def get_latest_validations(self, limit: int) -> List[dict]:
+        with self._lock.read_locked():
+            validations = list(self.validations_store)
+        return sorted(
+            validations,
+            key=lambda x: x.get("validated_at") or "",
+            reverse=True,
+        )[:limit]
+
+    def _get_validation(self, event_id: str, horizon: Optional[str] = None) -> Optional[dict]:
+        horizons = self._validations_by_event.get(event_id)
+        if not horizons:
+            return None
+        if horizon is None:
+            return next(iter(horizons.values()))
+        return horizons.get(horizon)
+
+    def get_validation(self, event_id: str, horizon: Optional[str] = None) -> Optional[dict]:
+        with self._lock.read_locked():
+            return self._get_validation(event_id, horizon)
+
+    def get_version(self) -> int:
+        return self._version
+
+    def get_rollups(self) -> dict:
+        with self._lock.read_locked():
+            return self.rollup.summary()
+
+    def get_stats(self) -> dict:
+        with self._lock.read_locked():
+            archived = len(self.archive) if self.archive is not None else 0
+            return {
+                "events_count": len(self.events_store) + archived,
+                "hot_events_count": len(self.events_store),
+                "archived_events_count": archived,
+                "validations_count": len(self.validations_store),
+                "last_event_timestamp": self.events_store[0].get("timestamp") if self.events_store else None,
+                "last_validation_timestamp": self.validations_store[-1].get("validated_at") if self.validations_store else None,
+            }
@@ -72,6 +72,12 @@ class AffectedAsset(BaseModel):
     reason: str = Field(max_length=200)
 
 
+class RelatedSource(BaseModel):
+    """Another feed's copy of the same story."""
+    source: str
+    headline: str
+
+
 class Event(BaseModel):
     event_id: str
     headline: str
@@ -86,6 +92,8 @@ class Event(BaseModel):
     affected_assets: List[AffectedAsset]
     why: str = Field(max_length=200)
     meta: EventMeta
+    # Near-duplicate copies of the story from other feeds
+    related_sources: List[RelatedSource] = []
 
 
 class ValidationStatus(str, Enum):
@@ -113,11 +121,25 @@ class AnalyzeRequest(BaseModel):
     source: str = "Unknown"
     timestamp: Optional[datetime] = None
     text: Optional[str] = None
+    related_sources: List[RelatedSource] = []
 
 
 class EventsResponse(BaseModel):
     status: str = "success"
     data: List[Event]
+    # Pass as ?cursor= to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    score: float
+    event: Event
+
+
+class SearchResponse(BaseModel):
+    status: str = "success"
+    query: str
+    data: List[SearchResult]
 
 
 class ValidationResponse(BaseModel):
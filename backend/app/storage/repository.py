@@ -1,10 +1,19 @@
+import atexit
+import base64
 import json
 import os
-from typing import List, Optional
+import threading
+import time
 from datetime import datetime
-from pydantic import ValidationError
+from typing import List, Optional, Tuple, Union
+from pydantic import TypeAdapter, ValidationError
 
 from app.storage.models import Event, Validation
+from app.storage.backend import StorageBackend, event_sort_key, normalize_filter_value, timestamp_sort_key
+from app.storage.loader import DECODER, load_json_file
+from app.storage.memory_backend import MemoryBackend
+from app.storage.search import parse_query
+from app.storage.sqlite_backend import SQLiteBackend
 
 # Load mock data
 # Assuming mock_data is 2 levels up from backend/app/storage/repository.py -> backend/app/storage -> backend/app -> backend -> mock_data
@@ -13,10 +22,32 @@ from app.storage.models import Event, Validation
 MOCK_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "mock_data", "mock_data.json")
 MOCK_VALIDATIONS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "mock_data", "mock_validations.json")
 
-# Optional persistence paths
-PERSISTENCE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data")
+# Optional persistence paths (GEOPULSE_DATA_DIR overrides the default data/ directory)
+PERSISTENCE_DIR = os.getenv(
+    "GEOPULSE_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "data"),
+)
 EVENTS_BACKUP_PATH = os.path.join(PERSISTENCE_DIR, "events_backup.json")
 VALIDATIONS_BACKUP_PATH = os.path.join(PERSISTENCE_DIR, "validations_backup.json")
+WAL_PATH = os.path.join(PERSISTENCE_DIR, "repository_wal.jsonl")
+
+# Number of logged writes after which the WAL is compacted into the backups
+WAL_COMPACTION_THRESHOLD = int(os.getenv("GEOPULSE_WAL_COMPACT_EVERY", "1000"))
+
+# Background flushing of memory-backend writes: at most this many ms or
+# records are buffered before they hit the WAL (0 writes inline)
+FLUSH_INTERVAL_MS = int(os.getenv("GEOPULSE_FLUSH_INTERVAL_MS", "200"))
+FLUSH_MAX_RECORDS = int(os.getenv("GEOPULSE_FLUSH_MAX_RECORDS", "100"))
+
+# Memory backend hot window: at most HOT_CAPACITY events stay in RAM; when it
+# overflows, the oldest EVICT_BATCH are moved to the compressed cold archive
+HOT_CAPACITY = int(os.getenv("GEOPULSE_HOT_CAPACITY", "10000"))
+EVICT_BATCH = int(os.getenv("GEOPULSE_EVICT_BATCH", "500"))
+ARCHIVE_DIR = os.getenv("GEOPULSE_ARCHIVE_DIR", os.path.join(PERSISTENCE_DIR, "archive"))
+
+# Storage engine: "memory" (default) or "sqlite"
+STORAGE_BACKEND = os.getenv("GEOPULSE_STORAGE_BACKEND", "memory")
+SQLITE_PATH = os.getenv("GEOPULSE_SQLITE_PATH", os.path.join(PERSISTENCE_DIR, "geopulse.db"))
 
 
 def load_mock_events():
@@ -37,24 +68,20 @@ def load_mock_validations():
         return []
 
 
-def save_events_backup():
-    """Save events to backup JSON file."""
+def load_backup(path: str) -> Optional[List[dict]]:
+    """Load a backup snapshot, or None if it does not exist or is unreadable."""
     try:
-        os.makedirs(PERSISTENCE_DIR, exist_ok=True)
-        with open(EVENTS_BACKUP_PATH, "w") as f:
-            json.dump(events_store, f, indent=2)
-    except Exception as e:
-        print(f"⚠ Failed to save events backup: {e}")
+        return load_json_file(path)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"⚠ Ignoring unreadable backup {path}: {e}")
+        return None
 
 
-def save_validations_backup():
-    """Save validations to backup JSON file."""
-    try:
-        os.makedirs(PERSISTENCE_DIR, exist_ok=True)
-        with open(VALIDATIONS_BACKUP_PATH, "w") as f:
-            json.dump(validations_store, f, indent=2)
-    except Exception as e:
-        print(f"⚠ Failed to save validations backup: {e}")
+# Built once: constructing an adapter compiles its validator and serializer
+EVENT_ADAPTER = TypeAdapter(Event)
+VALIDATION_ADAPTER = TypeAdapter(Validation)
 
 
 def validate_event_data(event_data: dict) -> Event:
@@ -70,7 +97,7 @@ def validate_event_data(event_data: dict) -> Event:
     Raises:
         ValidationError: If data doesn't match Event model schema
     """
-    return Event(**event_data)
+    return EVENT_ADAPTER.validate_python(event_data)
 
 
 def validate_validation_data(validation_data: dict) -> Validation:
@@ -86,72 +113,303 @@ def validate_validation_data(validation_data: dict) -> Validation:
     Raises:
         ValidationError: If data doesn't match Validation model schema
     """
-    return Validation(**validation_data)
+    return VALIDATION_ADAPTER.validate_python(validation_data)
+
 
+def load_initial_data() -> Tuple[List[dict], List[dict], str]:
+    """
+    Load the persisted backups, falling back to the mock data per file.
 
-# In-memory storage (would be MongoDB in production)
-events_store = load_mock_events()
-validations_store = load_mock_validations()
+    Returns:
+        (events, validations, source) where source is "backup" if any
+        backup was found, otherwise "mock"
+    """
+    events = load_backup(EVENTS_BACKUP_PATH)
+    validations = load_backup(VALIDATIONS_BACKUP_PATH)
+    source = "mock" if events is None and validations is None else "backup"
+    if events is None:
+        events = load_mock_events()
+    if validations is None:
+        validations = load_mock_validations()
+    return events, validations, source
+
+
+def create_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Create the storage backend selected by name.
+
+    Args:
+        name: "memory" (default, in-process lists + WAL) or "sqlite"
+
+    Returns:
+        Initialized storage backend
+    """
+    if name == "sqlite" and os.path.exists(SQLITE_PATH):
+        # An existing database is the source of truth; skip parsing the backups
+        _load_report["source"] = "sqlite"
+        return SQLiteBackend(SQLITE_PATH)
+
+    events, validations, source = load_initial_data()
+    _load_report["source"] = source
+    if name == "memory":
+        return MemoryBackend(
+            events,
+            validations,
+            wal_path=WAL_PATH,
+            events_backup_path=EVENTS_BACKUP_PATH,
+            validations_backup_path=VALIDATIONS_BACKUP_PATH,
+            compaction_threshold=WAL_COMPACTION_THRESHOLD,
+            flush_interval_ms=FLUSH_INTERVAL_MS,
+            flush_max_records=FLUSH_MAX_RECORDS,
+            hot_capacity=HOT_CAPACITY,
+            archive_dir=ARCHIVE_DIR,
+            evict_batch=EVICT_BATCH,
+        )
+    if name == "sqlite":
+        return SQLiteBackend(
+            SQLITE_PATH,
+            seed_events=events,
+            seed_validations=validations,
+        )
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def _load_backend() -> StorageBackend:
+    """Create the configured backend and record how long startup loading took."""
+    started = time.perf_counter()
+    backend = create_backend()
+    stats = backend.get_stats()
+    _load_report.update({
+        "backend": STORAGE_BACKEND,
+        "decoder": DECODER,
+        "events_loaded": stats["events_count"],
+        "validations_loaded": stats["validations_count"],
+        "wal_records_replayed": getattr(backend, "replayed_records", 0),
+        "load_ms": round((time.perf_counter() - started) * 1000, 2),
+    })
+    return backend
+
+
+# Startup load metrics, reported by /api/health
+_load_report: dict = {}
+
+# Active storage backend (would be MongoDB in production), loaded on first
+# use: processes that only import this module (e.g. spawned parse workers,
+# which re-import the entry point) must not load the store or start a flusher
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+# Serializes add_event's ID uniqueness check with the insert
+_add_event_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """Get the active storage backend, loading it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _load_backend()
+    return _backend
+
+
+def get_load_report() -> dict:
+    """Get what was loaded at startup, from where and how long it took."""
+    get_backend()
+    return dict(_load_report)
+
+
+def compact() -> bool:
+    """Compact the backend's write log into its snapshot form."""
+    return get_backend().compact()
+
+
+def flush() -> None:
+    """Persist writes still buffered by the backend."""
+    get_backend().flush()
+
+
+def shutdown() -> None:
+    """Flush pending writes and close the backend (idempotent; a no-op if it was never loaded)."""
+    if _backend is not None:
+        _backend.close()
+
+
+def get_persistence_stats() -> dict:
+    """Get write-path metrics: flush lag, buffered records and bytes written."""
+    return get_backend().get_persistence_stats()
+
+
+# Scripts that import the repository without the API still get a final flush
+atexit.register(shutdown)
 
 
 def get_events() -> List[dict]:
     """Get all events."""
-    return events_store
+    return get_backend().get_events()
+
+
+def get_latest_events(limit: int) -> List[dict]:
+    """Get up to `limit` events ordered by timestamp (newest first)."""
+    return get_backend().get_latest_events(limit)
+
+
+def query_events(
+    limit: int,
+    ticker: Optional[str] = None,
+    source: Optional[str] = None,
+    severity: Optional[str] = None,
+    market_pressure: Optional[str] = None,
+    start: Optional[Union[datetime, str]] = None,
+    end: Optional[Union[datetime, str]] = None,
+    cursor: Optional[str] = None,
+) -> List[dict]:
+    """
+    Get up to `limit` events matching all given filters, newest first.
+
+    Uses the backend's secondary indexes, so cost scales with the number of
+    matches rather than the size of the store. Time bounds and cursors are
+    resolved by binary search on the timestamp-ordered index.
+
+    Args:
+        limit: Maximum number of events to return
+        ticker: Ticker in affected_assets (case-insensitive)
+        source: Exact news source
+        severity: LOW / MEDIUM / HIGH
+        market_pressure: e.g. INFLATIONARY, RISK_OFF
+        start: Only events at or after this time
+        end: Only events strictly before this time
+        cursor: encode_cursor() of the last event on the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    filters = {
+        field: normalize_filter_value(field, value)
+        for field, value in (
+            ("ticker", ticker),
+            ("source", source),
+            ("severity", severity),
+            ("market_pressure", market_pressure),
+        )
+        if value is not None
+    }
+    return get_backend().query_events(
+        limit,
+        filters,
+        start=timestamp_sort_key(start) if start is not None else None,
+        end=timestamp_sort_key(end) if end is not None else None,
+        before=decode_cursor(cursor) if cursor else None,
+    )
+
+
+def encode_cursor(event: dict) -> str:
+    """Opaque pagination cursor pointing just past `event` in newest-first order."""
+    ts, event_id = event_sort_key(event)
+    raw = json.dumps([ts, event_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a cursor from encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, event_id = json.loads(raw)
+        return float(ts), str(event_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def search_events(query: str, limit: int = 20) -> List[Tuple[dict, float]]:
+    """
+    Full-text search over headlines, macro effects, explanations and logic chains.
+
+    All terms must match; a trailing `*` makes a term a prefix match
+    (e.g. "oil infl*"). Results are ranked by BM25.
+
+    Args:
+        query: Search query
+        limit: Maximum number of results
+
+    Returns:
+        (event, score) pairs, most relevant first
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+    return get_backend().search_events(terms, limit)
 
 
 def get_event_by_id(event_id: str) -> Optional[dict]:
     """Get a specific event by ID."""
-    return next((e for e in events_store if e.get("event_id") == event_id), None)
+    return get_backend().get_event_by_id(event_id)
+
+
+def has_event(headline: str, source: str) -> bool:
+    """Check whether an event with this headline and source is stored."""
+    return get_backend().has_event(headline, source)
 
 
 def add_event(event: dict, validate: bool = True) -> dict:
     """
     Add an event to the store.
+
+    Event IDs must be unique (the archive and restart paths key on them),
+    but LLM-generated IDs are not: the mock client's are per second. An ID
+    already in the store gets a numeric suffix ("evt_x_2").
     
     Args:
         event: Event data dictionary
         validate: Whether to validate against Pydantic model (default: True)
         
     Returns:
-        The added event data
+        The added event data, with the ID it was stored under
         
     Raises:
         ValidationError: If validation is enabled and data is invalid
     """
     if validate:
-        # Validate against Pydantic model
-        validated_event = validate_event_data(event)
-        # Convert back to dict for storage
-        event = validated_event.model_dump(mode='json')
-    
-    events_store.insert(0, event)
-    
-    # Optional: Save backup
-    save_events_backup()
+        # Validate once and store the JSON form; reads serialize it as-is
+        # instead of validating it again.
+        event = EVENT_ADAPTER.dump_python(validate_event_data(event), mode="json")
+
+    backend = get_backend()
+    # Checking and adding under one lock keeps parallel analysis workers from
+    # claiming the same ID
+    with _add_event_lock:
+        event_id = event.get("event_id")
+        if event_id is not None and backend.get_event_by_id(event_id) is not None:
+            suffix = 2
+            while backend.get_event_by_id(f"{event_id}_{suffix}") is not None:
+                suffix += 1
+            event = {**event, "event_id": f"{event_id}_{suffix}"}
+        backend.add_event(event)
     
     return event
 
 
 def get_validations() -> List[dict]:
     """Get all validations."""
-    return validations_store
+    return get_backend().get_validations()
+
+
+def get_latest_validations(limit: int) -> List[dict]:
+    """Get up to `limit` validations ordered by validated_at (newest first)."""
+    return get_backend().get_latest_validations(limit)
 
 
 def get_validation_by_event_id(event_id: str) -> Optional[dict]:
     """Get validation by event ID."""
-    return next(
-        (v for v in validations_store if v.get("event_id") == event_id),
-        None,
-    )
+    return get_backend().get_validation(event_id)
 
 
 def get_validation_by_event_id_and_horizon(event_id: str, horizon: str) -> Optional[dict]:
     """Get validation by event ID and horizon."""
-    return next(
-        (v for v in validations_store 
-         if v.get("event_id") == event_id and v.get("horizon") == horizon),
-        None,
-    )
+    return get_backend().get_validation(event_id, horizon)
 
 
 def add_validation(validation: dict, validate: bool = True) -> dict:
@@ -169,24 +427,27 @@ def add_validation(validation: dict, validate: bool = True) -> dict:
         ValidationError: If validation is enabled and data is invalid
     """
     if validate:
-        # Validate against Pydantic model
-        validated_validation = validate_validation_data(validation)
-        # Convert back to dict for storage
-        validation = validated_validation.model_dump(mode='json')
+        validation = VALIDATION_ADAPTER.dump_python(validate_validation_data(validation), mode="json")
     
-    validations_store.append(validation)
-    
-    # Optional: Save backup
-    save_validations_backup()
+    get_backend().add_validation(validation)
     
     return validation
 
 
 def get_stats() -> dict:
     """Get repository statistics."""
-    return {
-        "events_count": len(events_store),
-        "validations_count": len(validations_store),
-        "last_event_timestamp": events_store[0].get("timestamp") if events_store else None,
-        "last_validation_timestamp": validations_store[-1].get("validated_at") if validations_store else None,
-    }
+    return get_backend().get_stats()
+
+
+def get_rollups() -> dict:
+    """
+    Get aggregates maintained on every write: event counts by severity,
+    sentiment and source, and CORRECT/INCORRECT/PENDING counts with accuracy
+    per ticker and horizon.
+    """
+    return get_backend().get_rollups()
+
+
+def get_version() -> int:
+    """Get the store version counter, bumped on every event or validation write."""
+    return get_backend().get_version()
@@ -0,0 +1,113 @@
+"""
+Incrementally maintained event and validation aggregates.
+
+Counters are bumped on every write, so /api/stats never scans the store.
+SQLiteBackend keeps the same counters in tables updated inside each
+insert transaction and shares build_rollup_summary() for the response.
+"""
+
+from typing import Dict, Optional, Tuple
+
+# Event fields counted by value, keyed by the name used in the summary
+EVENT_ROLLUP_FIELDS = {
+    "severity": "severity",
+    "sentiment": "event_sentiment",
+    "source": "source",
+}
+VALIDATION_STATUSES = ("CORRECT", "INCORRECT", "PENDING")
+UNKNOWN = "UNKNOWN"
+
+# (ticker, horizon, status)
+ValidationKey = Tuple[str, str, str]
+
+
+def _label(value) -> str:
+    if value is None or value == "":
+        return UNKNOWN
+    return str(getattr(value, "value", value))
+
+
+def event_rollup_values(event: dict) -> Dict[str, str]:
+    """Counted value of each rollup dimension for an event."""
+    return {dimension: _label(event.get(field)) for dimension, field in EVENT_ROLLUP_FIELDS.items()}
+
+
+def validation_rollup_key(validation: dict) -> ValidationKey:
+    """(ticker, horizon, status) a validation is counted under."""
+    return (
+        _label(validation.get("predicted_ticker")).upper(),
+        _label(validation.get("horizon")),
+        _label(validation.get("status") or "PENDING"),
+    )
+
+
+def _accuracy(correct: int, incorrect: int) -> Optional[float]:
+    decided = correct + incorrect
+    return round(correct / decided, 4) if decided else None
+
+
+def build_rollup_summary(
+    event_counts: Dict[str, Dict[str, int]],
+    validation_counts: Dict[ValidationKey, int],
+) -> dict:
+    """
+    Shape raw counters into the /api/stats payload.
+
+    Args:
+        event_counts: dimension -> value -> number of events
+        validation_counts: (ticker, horizon, status) -> number of validations
+    """
+    by_ticker: Dict[str, Dict[str, Dict[str, int]]] = {}
+    by_status = {status: 0 for status in VALIDATION_STATUSES}
+    for (ticker, horizon, status), count in validation_counts.items():
+        horizons = by_ticker.setdefault(ticker, {})
+        counts = horizons.setdefault(horizon, {s: 0 for s in VALIDATION_STATUSES})
+        counts[status] = counts.get(status, 0) + count
+        by_status[status] = by_status.get(status, 0) + count
+
+    for horizons in by_ticker.values():
+        for counts in horizons.values():
+            counts["accuracy"] = _accuracy(counts["CORRECT"], counts["INCORRECT"])
+
+    events_total = sum(event_counts.get("severity", {}).values())
+    return {
+        "events": {
+            "total": events_total,
+            **{f"by_{dimension}": dict(event_counts.get(dimension, {})) for dimension in EVENT_ROLLUP_FIELDS},
+        },
+        "validations": {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "accuracy": _accuracy(by_status["CORRECT"], by_status["INCORRECT"]),
+            "by_ticker": by_ticker,
+        },
+    }
+
+
+class StatsRollup:
+    """In-memory counters; callers provide their own locking."""
+
+    def __init__(self):
+        self.event_counts: Dict[str, Dict[str, int]] = {dimension: {} for dimension in EVENT_ROLLUP_FIELDS}
+        self.validation_counts: Dict[ValidationKey, int] = {}
+
+    def add_event(self, event: dict) -> None:
+        for dimension, value in event_rollup_values(event).items():
+            counts = self.event_counts[dimension]
+            counts[value] = counts.get(value, 0) + 1
+
+    def add_validation(self, validation: dict) -> None:
+        key = validation_rollup_key(validation)
+        self.validation_counts[key] = self.validation_counts.get(key, 0) + 1
+
+    def merge(self, other: "StatsRollup") -> None:
+        """Add another rollup's counters to this one."""
+        for dimension, counts in other.event_counts.items():
+            mine = self.event_counts[dimension]
+            for value, count in counts.items():
+                mine[value] = mine.get(value, 0) + count
+        for key, count in other.validation_counts.items():
+            self.validation_counts[key] = self.validation_counts.get(key, 0) + count
+
+    def summary(self) -> dict:
+        return build_rollup_summary(self.event_counts, self.validation_counts)
@@ -0,0 +1,287 @@
+"""
+Full-text search over event headlines and analysis text.
+
+Events are tokenized into lowercase alphanumeric terms drawn from
+`headline`, `macro_effect`, `why` and the `logic_chain` texts. The
+in-memory SearchIndex keeps one compact posting list (doc numbers and term
+frequencies in parallel arrays) per term, grows incrementally as events
+are added and ranks matches with BM25. SQLiteBackend, and the memory
+backend's cold archive, use FTS5 instead, with the same tokenization and
+query syntax; rank_documents merges matches from separate indexes.
+
+Query syntax: whitespace-separated terms, all of which must match; a
+trailing `*` turns a term into a prefix match (`infl*`).
+"""
+
+import bisect
+import heapq
+import math
+import re
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Letters and digits; underscores and punctuation separate tokens, as in
+# SQLite's unicode61 tokenizer.
+TOKEN_RE = re.compile(r"[^\W_]+")
+QUERY_TERM_RE = re.compile(r"([^\W_]+)(\*?)")
+
+# (term, is_prefix)
+QueryTerm = Tuple[str, bool]
+
+# Retired documents tolerated (beyond the live count) before an index is compacted
+COMPACT_MIN_RETIRED = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def event_search_text(event: dict) -> str:
+    """Concatenate the searchable fields of an event."""
+    parts = [event.get("headline"), event.get("macro_effect"), event.get("why")]
+    parts.extend(node.get("text") for node in event.get("logic_chain") or [] if isinstance(node, dict))
+    return " ".join(part for part in parts if part)
+
+
+def parse_query(query: str) -> List[QueryTerm]:
+    """
+    Parse a search query into (term, is_prefix) pairs.
+
+    Duplicate terms are dropped; an empty list means nothing searchable was given.
+    """
+    terms: List[QueryTerm] = []
+    for term, star in QUERY_TERM_RE.findall(query.lower()):
+        parsed = (term, bool(star))
+        if parsed not in terms:
+            terms.append(parsed)
+    return terms
+
+
+class SearchIndex:
+    """
+    Incrementally maintained inverted index with BM25 ranking.
+
+    Documents are numbered in insertion order. Re-adding or removing an
+    event ID retires its document; the postings stay in place and are
+    skipped at query time until retired documents outnumber live ones,
+    when the index is compacted. Not thread-safe on its own: the owning
+    backend guards it.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_prefix_terms: int = 256):
+        """
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+            max_prefix_terms: Most vocabulary terms a single prefix expands to
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_terms = max_prefix_terms
+        # term -> (doc numbers, term frequencies), both ascending by doc number
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        # Sorted vocabulary for prefix lookups
+        self._terms: List[str] = []
+        # doc number -> event_id (None once the document is retired)
+        self._doc_event_ids: List[Optional[str]] = []
+        self._doc_lengths = array("I")
+        self._doc_by_event: Dict[str, int] = {}
+        self._total_length = 0
+        self._live_docs = 0
+
+    def __len__(self) -> int:
+        return self._live_docs
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._doc_by_event
+
+    def add(self, event_id: str, text: str) -> None:
+        """Index one event's searchable text."""
+        self.remove(event_id)
+        tokens = tokenize(text)
+        doc = len(self._doc_event_ids)
+        self._doc_event_ids.append(event_id)
+        self._doc_lengths.append(len(tokens))
+        self._doc_by_event[event_id] = doc
+        self._total_length += len(tokens)
+        self._live_docs += 1
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("I"))
+                bisect.insort(self._terms, term)
+            postings[0].append(doc)
+            postings[1].append(tf)
+
+    def remove(self, event_id: str) -> None:
+        """Retire an event's document, if indexed."""
+        doc = self._doc_by_event.pop(event_id, None)
+        if doc is None:
+            return
+        self._doc_event_ids[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._live_docs -= 1
+        if len(self._doc_event_ids) - self._live_docs > max(self._live_docs, COMPACT_MIN_RETIRED):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop the postings of retired documents and renumber the live ones (order is kept)."""
+        renumbered: Dict[int, int] = {}
+        doc_event_ids: List[Optional[str]] = []
+        doc_lengths = array("I")
+        for doc, event_id in enumerate(self._doc_event_ids):
+            if event_id is not None:
+                renumbered[doc] = len(doc_event_ids)
+                doc_event_ids.append(event_id)
+                doc_lengths.append(self._doc_lengths[doc])
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (docs, tfs) in self._postings.items():
+            kept_docs, kept_tfs = array("I"), array("I")
+            for doc, tf in zip(docs, tfs):
+                new_doc = renumbered.get(doc)
+                if new_doc is not None:
+                    kept_docs.append(new_doc)
+                    kept_tfs.append(tf)
+            if kept_docs:
+                postings[term] = (kept_docs, kept_tfs)
+
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._doc_event_ids = doc_event_ids
+        self._doc_lengths = doc_lengths
+        self._doc_by_event = {event_id: doc for doc, event_id in enumerate(doc_event_ids)}
+
+    def document_frequency(self, term: str) -> int:
+        """Documents containing a term (retired ones not compacted yet included)."""
+        postings = self._postings.get(term)
+        return len(postings[0]) if postings is not None else 0
+
+    @property
+    def total_length(self) -> int:
+        """Combined token count of the live documents."""
+        return self._total_length
+
+    def expand(self, term: str, prefix: bool) -> List[str]:
+        """Vocabulary terms a query term matches (itself, or up to max_prefix_terms completions)."""
+        if not prefix:
+            return [term] if term in self._postings else []
+        start = bisect.bisect_left(self._terms, term)
+        matches = []
+        for candidate in self._terms[start:start + self.max_prefix_terms]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    def _score_term(self, term: str, avg_length: float, candidates: Optional[Dict[int, float]], into: Dict[int, float]) -> None:
+        """Add one term's BM25 contribution for each live doc (restricted to `candidates` if given)."""
+        docs, tfs = self._postings[term]
+        idf = math.log(1 + (self._live_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        k1, b = self.k1, self.b
+        doc_event_ids, doc_lengths = self._doc_event_ids, self._doc_lengths
+        for doc, tf in zip(docs, tfs):
+            if candidates is not None and doc not in candidates:
+                continue
+            if doc_event_ids[doc] is None:
+                continue
+            norm = k1 * (1 - b + b * doc_lengths[doc] / avg_length)
+            into[doc] = into.get(doc, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+    def search(self, terms: List[QueryTerm], limit: int) -> List[Tuple[str, float]]:
+        """
+        Find documents containing every query term, best BM25 score first.
+
+        Ties go to the most recently added document.
+
+        Returns:
+            Up to `limit` (event_id, score) pairs
+        """
+        if not terms or not self._live_docs:
+            return []
+        groups = []
+        for term, prefix in terms:
+            expansions = self.expand(term, prefix)
+            if not expansions:
+                return []
+            groups.append(expansions)
+        # Score the rarest group first so later groups only touch its matches
+        groups.sort(key=lambda group: sum(len(self._postings[t][0]) for t in group))
+
+        avg_length = max(self._total_length / self._live_docs, 1.0)
+        scores: Optional[Dict[int, float]] = None
+        for group in groups:
+            group_scores: Dict[int, float] = {}
+            for term in group:
+                self._score_term(term, avg_length, scores, group_scores)
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {doc: scores[doc] + score for doc, score in group_scores.items()}
+            if not scores:
+                return []
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(self._doc_event_ids[doc], score) for doc, score in best]
+
+    def get_stats(self) -> dict:
+        return {"documents": self._live_docs, "terms": len(self._postings)}
+
+
+def rank_documents(
+    documents: List[Tuple[str, str]],
+    groups: List[List[str]],
+    doc_freq: Dict[str, int],
+    total_docs: int,
+    total_length: int,
+    limit: int,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> List[Tuple[str, float]]:
+    """
+    BM25-rank candidate documents with collection statistics shared by several indexes.
+
+    Args:
+        documents: (event_id, searchable text) candidates, oldest first
+        groups: Vocabulary terms each query term expands to, over every index
+        doc_freq: Number of documents containing each vocabulary term
+        total_docs: Documents in the collection
+        total_length: Combined token count of the collection
+        limit: Maximum results
+
+    Returns:
+        Up to `limit` (event_id, score) pairs matching every group, best
+        first; ties go to the later candidate
+    """
+    total_docs = max(total_docs, 1)
+    avg_length = max(total_length / total_docs, 1.0)
+    scored = []
+    for position, (event_id, text) in enumerate(documents):
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        norm = k1 * (1 - b + b * len(tokens) / avg_length)
+        score = 0.0
+        for group in groups:
+            matched = [term for term in group if term in counts]
+            if not matched:
+                break
+            for term in matched:
+                df = doc_freq.get(term, 1)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                tf = counts[term]
+                score += idf * tf * (k1 + 1) / (tf + norm)
+        else:
+            scored.append((score, position, event_id))
+    return [(event_id, score) for score, _, event_id in heapq.nlargest(limit, scored)]
+
+
+def fts5_match_expression(terms: List[QueryTerm]) -> str:
+    """Build an FTS5 MATCH expression (implicit AND) from parsed query terms."""
+    return " ".join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
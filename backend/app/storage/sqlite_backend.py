@@ -0,0 +1,393 @@
+"""
+SQLite storage backend.
+
+Rows keep the full record as a JSON payload plus indexed columns for
+lookups and ordering. The database runs in WAL mode so several uvicorn
+workers can read while one writes, and nothing is held in RAM beyond the
+rows a query returns.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.storage.backend import StorageBackend, event_filter_values, timestamp_sort_key
+from app.storage.rollups import StatsRollup, build_rollup_summary, event_rollup_values, validation_rollup_key
+from app.storage.search import event_search_text, fts5_match_expression
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT,
+    headline TEXT,
+    source TEXT,
+    severity TEXT,
+    market_pressure TEXT,
+    timestamp REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_event_id ON events(event_id);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp, seq);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp_event_id ON events(timestamp, event_id);
+CREATE INDEX IF NOT EXISTS idx_events_severity ON events(severity);
+CREATE INDEX IF NOT EXISTS idx_events_source ON events(source);
+CREATE INDEX IF NOT EXISTS idx_events_market_pressure ON events(market_pressure);
+CREATE INDEX IF NOT EXISTS idx_events_headline_source ON events(headline, source);
+
+CREATE TABLE IF NOT EXISTS event_tickers (
+    seq INTEGER NOT NULL REFERENCES events(seq),
+    ticker TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_event_tickers_ticker ON event_tickers(ticker, seq);
+
+-- Contentless full-text index keyed by events.seq
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(body, content='', tokenize='unicode61 remove_diacritics 0');
+
+CREATE TABLE IF NOT EXISTS validations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT,
+    horizon TEXT,
+    validated_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_validations_event_horizon ON validations(event_id, horizon, seq);
+CREATE INDEX IF NOT EXISTS idx_validations_validated_at ON validations(validated_at);
+
+-- Incremental aggregates, bumped in the same transaction as each insert
+CREATE TABLE IF NOT EXISTS event_counters (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+);
+CREATE TABLE IF NOT EXISTS validation_counters (
+    ticker TEXT NOT NULL,
+    horizon TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (ticker, horizon, status)
+);
+
+-- Single-row write counter shared by every process using the database
+CREATE TABLE IF NOT EXISTS store_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_version (id, version) VALUES (1, 0);
+"""
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite store with indexed columns and JSON payloads."""
+
+    def __init__(
+        self,
+        path: str,
+        seed_events: Optional[List[dict]] = None,
+        seed_validations: Optional[List[dict]] = None,
+    ):
+        """
+        Open (or create) the database.
+
+        Args:
+            path: Database file path
+            seed_events: Events (newest first) inserted only if the database is empty
+            seed_validations: Validations inserted only if the database is empty
+        """
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        self._migrate(conn)
+        conn.executescript(SCHEMA)
+        self._seed(seed_events or [], seed_validations or [])
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Add columns and tables introduced after a database was created, backfilling them from the payloads."""
+        if not conn.execute("PRAGMA table_info(events)").fetchall():
+            return  # New database; SCHEMA creates everything
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another worker migrated first
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+            if "market_pressure" not in columns:
+                conn.execute("ALTER TABLE events ADD COLUMN market_pressure TEXT")
+                conn.execute("UPDATE events SET market_pressure = json_extract(payload, '$.market_pressure')")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS event_tickers "
+                    "(seq INTEGER NOT NULL REFERENCES events(seq), ticker TEXT NOT NULL)"
+                )
+                conn.execute("""
+                    INSERT INTO event_tickers (seq, ticker)
+                    SELECT DISTINCT events.seq, UPPER(json_extract(asset.value, '$.ticker'))
+                    FROM events, json_each(events.payload, '$.affected_assets') AS asset
+                    WHERE json_extract(asset.value, '$.ticker') IS NOT NULL
+                """)
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'"
+            ).fetchone()
+            if not has_fts:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE events_fts USING fts5(body, content='', tokenize='unicode61 remove_diacritics 0')"
+                )
+                conn.executemany(
+                    "INSERT INTO events_fts (rowid, body) VALUES (?, ?)",
+                    ((seq, event_search_text(json.loads(payload)))
+                     for seq, payload in conn.execute("SELECT seq, payload FROM events").fetchall()),
+                )
+            has_counters = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_counters'"
+            ).fetchone()
+            if not has_counters:
+                SQLiteBackend._backfill_counters(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _backfill_counters(conn: sqlite3.Connection) -> None:
+        """Create the counter tables for a database that predates them and fill them from the payloads."""
+        conn.execute(
+            "CREATE TABLE event_counters (dimension TEXT NOT NULL, value TEXT NOT NULL, "
+            "count INTEGER NOT NULL, PRIMARY KEY (dimension, value))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS validation_counters (ticker TEXT NOT NULL, horizon TEXT NOT NULL, "
+            "status TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (ticker, horizon, status))"
+        )
+        rollup = StatsRollup()
+        for (payload,) in conn.execute("SELECT payload FROM events"):
+            rollup.add_event(json.loads(payload))
+        for (payload,) in conn.execute("SELECT payload FROM validations"):
+            rollup.add_validation(json.loads(payload))
+        conn.executemany(
+            "INSERT INTO event_counters (dimension, value, count) VALUES (?, ?, ?)",
+            [(dim, value, count) for dim, counts in rollup.event_counts.items() for value, count in counts.items()],
+        )
+        conn.executemany(
+            "INSERT INTO validation_counters (ticker, horizon, status, count) VALUES (?, ?, ?, ?)",
+            [(*key, count) for key, count in rollup.validation_counts.items()],
+        )
+
+    def _seed(self, events: List[dict], validations: List[dict]) -> None:
+        """Load initial data once; BEGIN IMMEDIATE keeps concurrent workers from seeding twice."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM events) AND NOT EXISTS (SELECT 1 FROM validations)").fetchone()[0]
+            if empty:
+                for event in reversed(events):
+                    self._insert_event(conn, event)
+                for validation in validations:
+                    self._insert_validation(conn, validation)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _insert_event(conn: sqlite3.Connection, event: dict) -> None:
+        cursor = conn.execute(
+            "INSERT INTO events (event_id, headline, source, severity, market_pressure, timestamp, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                event.get("event_id"),
+                event.get("headline"),
+                event.get("source"),
+                event.get("severity"),
+                event.get("market_pressure"),
+                timestamp_sort_key(event.get("timestamp")),
+                _dumps(event),
+            ),
+        )
+        seq = cursor.lastrowid
+        conn.execute("INSERT INTO events_fts (rowid, body) VALUES (?, ?)", (seq, event_search_text(event)))
+        conn.executemany(
+            "INSERT INTO event_tickers (seq, ticker) VALUES (?, ?)",
+            [(seq, ticker) for ticker in event_filter_values(event, "ticker")],
+        )
+        conn.executemany(
+            "INSERT INTO event_counters (dimension, value, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1",
+            list(event_rollup_values(event).items()),
+        )
+        conn.execute("UPDATE store_version SET version = version + 1 WHERE id = 1")
+
+    @staticmethod
+    def _insert_validation(conn: sqlite3.Connection, validation: dict) -> None:
+        conn.execute(
+            "INSERT INTO validations (event_id, horizon, validated_at, payload) VALUES (?, ?, ?, ?)",
+            (
+                validation.get("event_id"),
+                validation.get("horizon"),
+                validation.get("validated_at"),
+                _dumps(validation),
+            ),
+        )
+        conn.execute(
+            "INSERT INTO validation_counters (ticker, horizon, status, count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (ticker, horizon, status) DO UPDATE SET count = count + 1",
+            validation_rollup_key(validation),
+        )
+        conn.execute("UPDATE store_version SET version = version + 1 WHERE id = 1")
+
+    def _fetch_payloads(self, sql: str, params: tuple = ()) -> List[dict]:
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    def _fetch_payload(self, sql: str, params: tuple = ()) -> Optional[dict]:
+        row = self._conn().execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def compact(self) -> bool:
+        """Checkpoint SQLite's own WAL into the main database file."""
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    # -- events -------------------------------------------------------------
+
+    def add_event(self, event: dict) -> None:
+        conn = self._conn()
+        # One transaction so the event and its ticker rows appear together
+        with conn:
+            conn.execute("BEGIN")
+            self._insert_event(conn, event)
+
+    def get_events(self) -> List[dict]:
+        return self._fetch_payloads("SELECT payload FROM events ORDER BY seq DESC")
+
+    def query_events(
+        self,
+        limit: int,
+        filters: Dict[str, str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[dict]:
+        clauses, params = [], []
+        for field in ("source", "severity", "market_pressure"):
+            if field in filters:
+                clauses.append(f"{field} = ?")
+                params.append(filters[field])
+        if "ticker" in filters:
+            clauses.append("seq IN (SELECT seq FROM event_tickers WHERE ticker = ?)")
+            params.append(filters["ticker"])
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if before is not None:
+            # The leading range term lets SQLite seek on the timestamp index
+            clauses.append("timestamp <= ? AND (timestamp < ? OR event_id < ?)")
+            params.extend((before[0], before[0], before[1]))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self._fetch_payloads(
+            f"SELECT payload FROM events {where}ORDER BY timestamp DESC, event_id DESC, seq DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def get_event_by_id(self, event_id: str) -> Optional[dict]:
+        return self._fetch_payload(
+            "SELECT payload FROM events WHERE event_id = ? ORDER BY seq DESC LIMIT 1", (event_id,)
+        )
+
+    def has_event(self, headline: str, source: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM events WHERE headline = ? AND source = ? LIMIT 1", (headline, source)
+        ).fetchone()
+        return row is not None
+
+    def search_events(self, terms: List[Tuple[str, bool]], limit: int) -> List[Tuple[dict, float]]:
+        if not terms:
+            return []
+        # bm25() is lower-is-better; negate it to match the memory backend
+        rows = self._conn().execute(
+            "SELECT events.payload, -bm25(events_fts) AS score FROM events_fts "
+            "JOIN events ON events.seq = events_fts.rowid "
+            "WHERE events_fts MATCH ? ORDER BY score DESC, events.seq DESC LIMIT ?",
+            (fts5_match_expression(terms), limit),
+        )
+        return [(json.loads(payload), score) for payload, score in rows]
+
+    # -- validations --------------------------------------------------------
+
+    def add_validation(self, validation: dict) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            self._insert_validation(conn, validation)
+
+    def get_validations(self) -> List[dict]:
+        return self._fetch_payloads("SELECT payload FROM validations ORDER BY seq")
+
+    def get_latest_validations(self, limit: int) -> List[dict]:
+        return self._fetch_payloads(
+            "SELECT payload FROM validations ORDER BY COALESCE(validated_at, '') DESC LIMIT ?", (limit,)
+        )
+
+    def get_validation(self, event_id: str, horizon: Optional[str] = None) -> Optional[dict]:
+        if horizon is None:
+            return self._fetch_payload(
+                "SELECT payload FROM validations WHERE event_id = ? ORDER BY seq LIMIT 1", (event_id,)
+            )
+        return self._fetch_payload(
+            "SELECT payload FROM validations WHERE event_id = ? AND horizon = ? ORDER BY seq LIMIT 1",
+            (event_id, horizon),
+        )
+
+    def get_rollups(self) -> dict:
+        conn = self._conn()
+        # One read transaction so both tables come from the same snapshot
+        with conn:
+            conn.execute("BEGIN")
+            event_rows = conn.execute("SELECT dimension, value, count FROM event_counters").fetchall()
+            validation_rows = conn.execute("SELECT ticker, horizon, status, count FROM validation_counters").fetchall()
+        event_counts = {}
+        for dimension, value, count in event_rows:
+            event_counts.setdefault(dimension, {})[value] = count
+        validation_counts = {(ticker, horizon, status): count for ticker, horizon, status, count in validation_rows}
+        return build_rollup_summary(event_counts, validation_counts)
+
+    def get_version(self) -> int:
+        return self._conn().execute("SELECT version FROM store_version WHERE id = 1").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        conn = self._conn()
+        events_count = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        validations_count = conn.execute("SELECT COUNT(*) FROM validations").fetchone()[0]
+        last_event = self._fetch_payload("SELECT payload FROM events ORDER BY seq DESC LIMIT 1")
+        last_validation = self._fetch_payload("SELECT payload FROM validations ORDER BY seq DESC LIMIT 1")
+        return {
+            "events_count": events_count,
+            "validations_count": validations_count,
+            "last_event_timestamp": last_event.get("timestamp") if last_event else None,
+            "last_validation_timestamp": last_validation.get("validated_at") if last_validation else None,
+        }
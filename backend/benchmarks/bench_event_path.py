@@ -0,0 +1,79 @@
+"""
+Per-event cost of the ingest and read paths, before and after the
+validate-once fast path.
+
+Before: add_event built an Event, dumped it back to a dict, and
+/api/events validated every stored dict again through EventsResponse.
+After: one TypeAdapter validation on ingest, and reads serialize the
+stored dicts directly.
+
+Usage (from backend/):
+    python benchmarks/bench_event_path.py [events] [rounds]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the benchmark from touching the real data directory
+os.environ.setdefault("GEOPULSE_DATA_DIR", tempfile.mkdtemp(prefix="geopulse-bench-"))
+
+from app.storage import repository
+from app.storage.loader import DECODER, dumps
+from app.storage.models import Event, EventsResponse
+
+
+def sample_events(count: int) -> list:
+    seed = repository.load_mock_events()
+    events = []
+    for i in range(count):
+        event = dict(seed[i % len(seed)])
+        event["event_id"] = f"bench_{i}"
+        events.append(event)
+    return events
+
+
+def ingest_before(events: list) -> list:
+    return [Event(**event).model_dump(mode="json") for event in events]
+
+
+def ingest_after(events: list) -> list:
+    adapter = repository.EVENT_ADAPTER
+    return [adapter.dump_python(adapter.validate_python(event), mode="json") for event in events]
+
+
+def read_before(stored: list) -> bytes:
+    return EventsResponse(data=stored).model_dump_json().encode("utf-8")
+
+
+def read_after(stored: list) -> bytes:
+    return dumps({"status": "success", "data": stored, "next_cursor": None})
+
+
+def per_event_us(fn, arg, count: int, rounds: int) -> float:
+    best = min(timeit.repeat(lambda: fn(arg), number=1, repeat=rounds))
+    return best / count * 1e6
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    events = sample_events(count)
+    stored = ingest_after(events)
+    assert stored == ingest_before(events)
+
+    print(f"{count} events, best of {rounds} rounds, JSON encoder: {DECODER}")
+    print(f"{'path':<10}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, before, after, arg in (
+        ("ingest", ingest_before, ingest_after, events),
+        ("read", read_before, read_after, stored),
+    ):
+        b = per_event_us(before, arg, count, rounds)
+        a = per_event_us(after, arg, count, rounds)
+        print(f"{name:<10}{b:>14.2f}{a:>14.2f}{b / a:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
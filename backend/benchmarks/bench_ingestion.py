@@ -0,0 +1,170 @@
+"""
+Ingestion throughput per stage, replayed offline so runs are repeatable.
+
+Feeds come from a replay directory: synthesized at the requested scale
+(default 500 feeds x 100 entries), or recorded earlier with
+app.ingestion.replay.record_snapshots and passed with --dir. They are
+read from disk, or served by a local replay server (--mode http) with
+optional per-request latency and bandwidth cap.
+
+Stages:
+    fetch     download every feed (FETCH_WORKERS threads)
+    parse     feed bodies to requests, in-process and on the parse pool
+    dedup     exact dedup, then near-duplicate grouping, feed by feed
+    enqueue   queue items onto a bounded multiprocessing queue being drained
+    pipeline  IngestionPipeline.stream end to end, with fresh feed state
+
+Usage (from backend/):
+    python benchmarks/bench_ingestion.py [--feeds 500] [--entries 100]
+        [--mode file|http] [--latency-ms 0] [--bandwidth-kbps 0]
+        [--dir REPLAY_DIR] [--parse-workers N] [--rounds 3]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the benchmark from touching the real data directory
+os.environ.setdefault("GEOPULSE_DATA_DIR", tempfile.mkdtemp(prefix="geopulse-bench-"))
+
+from app.ingestion.dedup import DedupIndex
+from app.ingestion.feed_metrics import FeedMetrics
+from app.ingestion.feed_state import FeedStateStore
+from app.ingestion.fetcher import CYCLE_DEADLINE_S, FETCH_WORKERS, PARSE_WORKERS, RSSFetcher, shutdown_parse_pool
+from app.ingestion.near_dup import NearDuplicateDetector
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.replay import FeedReplay, ReplayServer, synthesize_snapshots
+from app.ingestion.workers import QUEUE_SIZE, put_blocking, request_to_item
+
+
+def best(fn, rounds: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=rounds))
+
+
+def make_fetcher(replay: FeedReplay, parse_workers: int) -> RSSFetcher:
+    return RSSFetcher(
+        feed_state=FeedStateStore(path=None),
+        feed_metrics=FeedMetrics(path=None),
+        parse_workers=parse_workers,
+        replay=replay,
+    )
+
+
+def row(stage: str, seconds: float, feeds: int, items: int, size: int = 0) -> None:
+    mb_per_s = f"{size / seconds / 1e6:>10.1f}" if size else f"{'':>10}"
+    print(f"{stage:<16}{seconds * 1000:>10.0f}{feeds / seconds:>10.0f}{items / seconds:>12.0f}{mb_per_s}")
+
+
+def run(replay: FeedReplay, rounds: int, parse_workers: int) -> None:
+    feed_urls = replay.feed_urls()
+    fetcher = make_fetcher(replay, parse_workers=0)
+
+    def download_all():
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            return list(pool.map(fetcher.download, feed_urls))
+
+    downloads = download_all()
+    size = sum(len(body) for body, _, _ in downloads)
+    fetch_s = best(download_all, rounds)
+
+    parsed = [fetcher.parse(body, headers) for body, headers, _ in downloads]
+    items = sum(len(requests) for requests in parsed)
+    inline_s = best(lambda: [fetcher.parse(body, headers) for body, headers, _ in downloads], rounds)
+
+    pooled = make_fetcher(replay, parse_workers=parse_workers)
+
+    def parse_pooled():
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            return list(pool.map(lambda download: pooled.parse(download[0], download[1]), downloads))
+
+    pool_s = best(parse_pooled, rounds) if parse_workers > 0 else None
+
+    stories = []
+
+    def dedup_all():
+        pipeline = IngestionPipeline(fetcher, DedupIndex(path=None), NearDuplicateDetector())
+        stories[:] = [story for requests in parsed for story in pipeline.near_dup.group(pipeline._deduplicate(requests))]
+
+    dedup_s = best(dedup_all, rounds)
+
+    def enqueue_all():
+        queue = multiprocessing.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+        consumer = threading.Thread(target=lambda: [queue.get() for _ in range(len(stories))])
+        consumer.start()
+        for story in stories:
+            put_blocking(queue, request_to_item(story), stop)
+        consumer.join()
+
+    enqueue_s = best(enqueue_all, rounds)
+
+    first_batch = []
+    cycles = []
+
+    def stream_all():
+        streamed = make_fetcher(replay, parse_workers)
+        pipeline = IngestionPipeline(streamed, DedupIndex(path=None), NearDuplicateDetector())
+        started = time.perf_counter()
+        for i, _ in enumerate(pipeline.stream(feed_urls)):
+            if i == 0:
+                first_batch.append(time.perf_counter() - started)
+        entries = sum(len(result["published"]) for result in streamed.last_feed_results.values())
+        cycles.append((streamed.last_cycle, entries))
+
+    pipeline_s = best(stream_all, rounds)
+    # Feeds cut off by the cycle deadline count against throughput, as they would in production
+    last_cycle, streamed_items = cycles[-1]
+
+    print(f"\n{len(feed_urls)} feeds, {items} entries, {size / 1e6:.1f} MB, {len(stories)} distinct stories; best of {rounds} rounds")
+    print(f"{'stage':<16}{'ms':>10}{'feeds/s':>10}{'entries/s':>12}{'MB/s':>10}")
+    row("fetch", fetch_s, len(feed_urls), items, size)
+    row("parse inline", inline_s, len(feed_urls), items, size)
+    if pool_s is not None:
+        row(f"parse pool x{parse_workers}", pool_s, len(feed_urls), items, size)
+    row("dedup", dedup_s, len(feed_urls), items)
+    row("enqueue", enqueue_s, len(feed_urls), len(stories))
+    row("pipeline", pipeline_s, last_cycle["succeeded"], streamed_items, last_cycle["bytes_downloaded"])
+    print(f"first batch out after {min(first_batch) * 1000:.0f} ms (enqueue rate is per distinct story)")
+    missed = last_cycle["timed_out"] + last_cycle["deferred"]
+    if missed:
+        print(f"pipeline: {missed} of {len(feed_urls)} feeds missed the {CYCLE_DEADLINE_S:.0f}s cycle deadline")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--feeds", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--mode", choices=("file", "http"), default="file")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="replay server delay per request")
+    parser.add_argument("--bandwidth-kbps", type=int, default=0, help="replay server rate per response (0: unlimited)")
+    parser.add_argument("--dir", help="existing replay directory (default: synthesize one)")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = args.dir
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="geopulse-replay-")
+        synthesize_snapshots(directory, feeds=args.feeds, entries=args.entries)
+
+    try:
+        if args.mode == "http":
+            with ReplayServer(directory, latency_s=args.latency_ms / 1000, bandwidth_bps=args.bandwidth_kbps * 1000) as server:
+                print(f"Replaying {directory} over {server.url}")
+                run(server.replay(), args.rounds, args.parse_workers)
+        else:
+            print(f"Replaying {directory} from disk")
+            run(FeedReplay(directory), args.rounds, args.parse_workers)
+    finally:
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-item cost and prompt size of feed description cleanup, before and
+after the normalization stage.
+
+Before: clean_html stripped tags with a non-greedy regex over the whole
+description, leaving entities, whitespace runs, script bodies and the
+full length in the prompt.
+After: normalize_text streams through the markup, stops at the token
+budget, decodes entities and collapses whitespace.
+
+Usage (from backend/):
+    python benchmarks/bench_normalize.py [items] [rounds]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ingestion.normalize import CHARS_PER_TOKEN, CONTEXT_TOKEN_BUDGET, normalize_text
+
+SHORT = (
+    "<p>The Federal Reserve held rates steady on Wednesday &mdash; as expected &ndash; "
+    "while signalling that &#8220;further tightening&#8221; remains possible.</p>\n"
+    "<p>Markets   rallied&nbsp;on the news. <a href=\"https://example.com\">Read more</a></p>"
+)
+ARTICLE = (
+    "<div class=\"article\"><script>window.dataLayer = window.dataLayer || [];</script>"
+    + "".join(
+        f"<p>Paragraph {i}: Oil prices climbed &amp; bond yields slipped as traders weighed "
+        f"supply risks in the Middle East and the outlook for central bank policy.</p>\n\n"
+        for i in range(150)
+    )
+    + "<style>.ad { display: none; }</style></div>"
+)
+
+
+def clean_html(raw_html: str) -> str:
+    cleanr = re.compile('<.*?>')
+    cleantext = re.sub(cleanr, '', raw_html)
+    return cleantext.strip()
+
+
+def per_item_us(fn, items: list, rounds: int) -> float:
+    best = min(timeit.repeat(lambda: [fn(item) for item in items], number=1, repeat=rounds))
+    return best / len(items) * 1e6
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{count} items per case, best of {rounds} rounds, budget {CONTEXT_TOKEN_BUDGET} tokens")
+    print(f"{'case':<10}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}{'before (tok)':>15}{'after (tok)':>14}")
+    for name, sample in (("short", SHORT), ("article", ARTICLE)):
+        items = [sample] * count
+        b = per_item_us(clean_html, items, rounds)
+        a = per_item_us(normalize_text, items, rounds)
+        tokens_before = len(clean_html(sample)) // CHARS_PER_TOKEN
+        tokens_after = len(normalize_text(sample)) // CHARS_PER_TOKEN
+        print(f"{name:<10}{b:>14.2f}{a:>14.2f}{b / a:>9.1f}x{tokens_before:>15}{tokens_after:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Pytest configuration.
+
+Points repository persistence at a throwaway directory so test runs do not
+write into the tracked data/ folder.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("GEOPULSE_DATA_DIR", tempfile.mkdtemp(prefix="geopulse-test-data-"))
@@ -1,11 +1,39 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes_feed import router as feed_router
+from app.ingestion.workers import WorkerPipeline
+from app.storage import repository
+
+# Set to 1 to poll the feeds and analyze new items inside the API process
+RUN_INGESTION = os.getenv("GEOPULSE_RUN_INGESTION", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the store now rather than on the first request
+    await run_in_threadpool(repository.get_backend)
+    app.state.ingestion = None
+    if RUN_INGESTION:
+        # Threads, not processes: forking the server process is asking for trouble
+        app.state.ingestion = WorkerPipeline(in_process=True)
+        app.state.ingestion.start()
+    yield
+    if app.state.ingestion is not None:
+        # Finish the queued items; anything left is picked up again on the next start
+        await run_in_threadpool(app.state.ingestion.stop, drain=True)
+    # Flush buffered repository writes before the process exits
+    repository.shutdown()
+
 
 app = FastAPI(
     title="GeoPulse AI API",
     description="News-to-market-impact prediction API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend
@@ -0,0 +1,122 @@
+"""
+Tests for ETag-cached list endpoints (/api/events, /api/validations).
+"""
+
+import sys
+import os
+
+# Add the current directory to sys.path to import main
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.response_cache import ResponseCache
+from app.api.routes_feed import response_cache
+from app.storage.models import EventsResponse, ValidationResponse
+from app.storage import repository
+from test_storage import make_event
+
+client = TestClient(app)
+
+
+def test_events_etag_returns_304_until_store_changes():
+    """A matching If-None-Match gets a 304 until a write bumps the version."""
+    # Filtered to this test's source, so events other tests added don't matter
+    url = "/api/events?limit=5&source=Cache Test Wire"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    hits_before = response_cache.get_stats()["hits"]
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert response_cache.get_stats()["hits"] == hits_before + 1
+
+    repository.add_event(make_event("test_cache_001", "2098-06-01T00:00:00Z", source="Cache Test Wire"))
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [e["event_id"] for e in changed.json()["data"]] == ["test_cache_001"]
+
+
+def test_etags_follow_the_body_across_caches():
+    """ETags depend on the body only, so restarts and other workers agree (versions restart at 0)."""
+    key = ("events", 5)
+    before, _ = ResponseCache().get_or_build(key, 0, lambda: b"[]")
+    same, _ = ResponseCache().get_or_build(key, 7, lambda: b"[]")
+    changed, _ = ResponseCache().get_or_build(key, 0, lambda: b'[{"event_id": "a"}]')
+
+    assert before == same
+    assert before != changed
+
+
+def test_cache_key_includes_filters():
+    """Different filters get different bodies and ETags."""
+    all_events = client.get("/api/events?limit=5")
+    high_only = client.get("/api/events?limit=5&severity=HIGH")
+
+    assert all_events.headers["etag"] != high_only.headers["etag"]
+    assert all(e["severity"] == "HIGH" for e in high_only.json()["data"])
+
+
+def test_events_cursor_pagination():
+    """next_cursor pages through a time range without repeats."""
+    for i in range(5):
+        repository.add_event(make_event(f"test_api_page_{i}", f"2031-01-0{i + 1}T00:00:00Z"))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "from": "2031-01-01T00:00:00Z", "to": "2031-01-05T00:00:00Z"}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/events", params=params).json()
+        seen.extend(e["event_id"] for e in body["data"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"test_api_page_{i}" for i in (3, 2, 1, 0)]
+    assert client.get("/api/events", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_stats_endpoint_tracks_writes():
+    """/api/stats reflects a new event without a rebuild of the store."""
+    before = client.get("/api/stats").json()["data"]
+    repository.add_event(make_event("test_api_stats", "2030-01-01T00:00:00Z", source="Stats Wire"))
+    after = client.get("/api/stats").json()["data"]
+
+    assert after["events"]["total"] == before["events"]["total"] + 1
+    assert after["events"]["by_source"]["Stats Wire"] == 1
+
+
+def test_direct_serialization_matches_response_models():
+    """Bodies serialized straight from the store still conform to the response models."""
+    events = client.get("/api/events?limit=50").json()
+    validations = client.get("/api/validations").json()
+
+    # Events stored before a field was added simply lack it, hence exclude_unset
+    assert EventsResponse.model_validate(events).model_dump(mode="json", exclude_unset=True)["data"] == events["data"]
+    assert ValidationResponse.model_validate(validations).model_dump(mode="json")["data"] == validations["data"]
+
+
+def test_validations_etag():
+    """/api/validations supports conditional requests too."""
+    first = client.get("/api/validations")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    assert client.get("/api/validations", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+
+
+if __name__ == "__main__":
+    test_events_etag_returns_304_until_store_changes()
+    test_etags_differ_across_restarts()
+    test_cache_key_includes_filters()
+    test_events_cursor_pagination()
+    test_stats_endpoint_tracks_writes()
+    test_direct_serialization_matches_response_models()
+    test_validations_etag()
+    print("✓ All API cache tests passed!")
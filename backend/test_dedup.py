@@ -0,0 +1,121 @@
+"""
+Tests for the persistent ingestion dedup index.
+"""
+
+import sys
+import os
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion.dedup import BloomFilter, DedupIndex, content_hash, record_stored
+from app.ingestion.feed_metrics import FeedMetrics
+from app.ingestion.pipeline import IngestionPipeline
+from app.storage import repository
+from app.storage.models import AnalyzeRequest
+
+
+class StaticFetcher:
+    def __init__(self, requests):
+        self.requests = requests
+        self.last_feed_results = {}
+        self.feed_metrics = FeedMetrics(path=None)
+
+    def iter_fetch(self, feed_urls=None, commit=True):
+        yield "http://feeds.test/static", list(self.requests)
+
+    def commit(self, feed_urls):
+        pass
+
+
+def test_content_hash_ignores_case_and_whitespace():
+    assert content_hash("Fed  holds rates ", "Reuters") == content_hash("fed holds rates", "REUTERS")
+    assert content_hash("Fed holds rates", "Reuters") != content_hash("Fed holds rates", "AP")
+
+
+def test_dedup_index_persists_and_skips_torn_records(tmp_path):
+    path = str(tmp_path / "dedup_index.bin")
+    index = DedupIndex(path)
+    index.add_many([1, 2, 3, 2])
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # interrupted append
+
+    reopened = DedupIndex(path)
+
+    assert len(reopened) == 3
+    assert reopened.lookup(2) is True
+    assert reopened.lookup(4) is None
+
+    # The torn tail was cut off, so records appended afterwards stay aligned
+    reopened.add_many([5])
+    record_stored("Later headline", "Wire", path)
+    again = DedupIndex(path)
+    assert len(again) == 5
+    assert again.lookup(5) is True
+    assert again.lookup(content_hash("Later headline", "Wire")) is True
+
+
+def test_bloom_mode_has_no_false_negatives(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup_index.bin"), bloom_capacity=5000)
+    added = [content_hash(f"headline {i}", "Wire") for i in range(5000)]
+    index.add_many(added)
+
+    assert all(index.lookup(h) is None for h in added)
+    others = [content_hash(f"other {i}", "Wire") for i in range(5000)]
+    false_positives = sum(index.lookup(h) is None for h in others)
+    assert false_positives < 150  # ~1% target
+
+    # Restarting rebuilds the filter from the file
+    assert DedupIndex(index.path, bloom_capacity=10).lookup(added[0]) is None
+    assert BloomFilter(100).num_hashes == 7
+
+
+def test_pipeline_dedup_survives_restart(tmp_path):
+    """Items are deduplicated within a batch, against stored items, and against stored events."""
+    stored = repository.get_events()[0]
+    requests = [
+        AnalyzeRequest(headline="Copper hits record", source="Metals Wire"),
+        AnalyzeRequest(headline="copper  hits record", source="Metals Wire"),
+        AnalyzeRequest(headline=stored["headline"], source=stored["source"]),
+        AnalyzeRequest(headline="Nickel slides", source="Metals Wire"),
+    ]
+    path = str(tmp_path / "dedup_index.bin")
+
+    first = IngestionPipeline(StaticFetcher(requests), DedupIndex(path)).run()
+    assert [r.headline for r in first] == ["Copper hits record", "Nickel slides"]
+    # Only the copper item's analysis got stored before the restart
+    record_stored("Copper hits record", "Metals Wire", path)
+
+    restarted = IngestionPipeline(StaticFetcher(requests), DedupIndex(path))
+    assert [r.headline for r in restarted.run()] == ["Nickel slides"]
+    assert len(restarted.dedup_index) == 2
+
+
+def test_pipeline_outside_the_store_process_skips_the_store(tmp_path, monkeypatch):
+    """A forked fetcher (check_store=False) trusts the dedup index instead of loading the store."""
+    def no_store(headline, source):
+        raise AssertionError("the store was consulted")
+
+    monkeypatch.setattr(repository, "has_event", no_store)
+    requests = [AnalyzeRequest(headline="Lithium jumps", source="Metals Wire")]
+    pipeline = IngestionPipeline(StaticFetcher(requests), DedupIndex(str(tmp_path / "dedup_index.bin")), check_store=False)
+
+    assert [r.headline for r in pipeline.run()] == ["Lithium jumps"]
+
+
+def test_items_handed_on_are_retried_until_stored(tmp_path):
+    path = str(tmp_path / "dedup_index.bin")
+    requests = [
+        AnalyzeRequest(headline="Zinc rallies", source="Metals Wire"),
+        AnalyzeRequest(headline="Tin slips", source="Metals Wire"),
+    ]
+    pipeline = IngestionPipeline(StaticFetcher(requests), DedupIndex(path), retry_s=60)
+
+    assert len(pipeline.run()) == 2
+    # Waiting for analysis: not handed on twice
+    assert pipeline.run() == []
+
+    # Zinc gets stored (by another process); Tin's analysis failed
+    record_stored("Zinc rallies", "Metals Wire", path)
+    pipeline.retry_s = 0
+    assert [r.headline for r in pipeline.run()] == ["Tin slips"]
@@ -0,0 +1,266 @@
+"""
+Tests for concurrent feed fetching against a local HTTP server serving fixture feeds.
+"""
+
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main import app
+from app.ingestion.feed_metrics import FEED_METRICS_PATH, FeedMetrics
+from app.ingestion.feed_state import FeedStateStore
+from app.ingestion import fetcher as fetcher_module
+from app.ingestion.fetcher import RSSFetcher, shutdown_parse_pool
+
+
+def rss_fixture(title: str, headlines: list) -> bytes:
+    items = "".join(
+        f"<item><title>{headline}</title><description>&lt;p&gt;{headline} body&lt;/p&gt;</description>"
+        f"<pubDate>Mon, 02 Feb 2026 10:00:00 GMT</pubDate></item>"
+        for headline in headlines
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>{title}</title>{items}</channel></rss>'
+    ).encode("utf-8")
+
+
+# path -> (delay in seconds before responding, body or None for a 404)
+FIXTURES = {
+    "/markets.xml": (0.4, rss_fixture("Markets Wire", ["Oil jumps", "Gold slips"])),
+    "/economy.xml": (0.4, rss_fixture("Economy Daily", ["Fed holds rates"])),
+    "/world.xml": (0.4, rss_fixture("World Desk", ["Trade talks resume"])),
+    "/hang.xml": (3.0, rss_fixture("Slow Publisher", ["Too late"])),
+    "/missing.xml": (0.0, None),
+    "/etag.xml": (0.0, rss_fixture("ETag Feed", ["Copper rallies"])),
+    "/lastmod.xml": (0.0, rss_fixture("Dated Feed", ["Bond yields climb"])),
+    "/plain.xml": (0.0, rss_fixture("Plain Feed", ["Wheat steady"])),
+    "/late_etag.xml": (0.6, rss_fixture("Late Feed", ["Nickel surges"])),
+}
+# Validators the fixture server sends (and honours) per path
+VALIDATORS = {
+    "/etag.xml": ("ETag", "If-None-Match", '"v1"'),
+    "/lastmod.xml": ("Last-Modified", "If-Modified-Since", "Mon, 02 Feb 2026 10:00:00 GMT"),
+    "/late_etag.xml": ("ETag", "If-None-Match", '"abc"'),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, body = FIXTURES.get(self.path, (0.0, None))
+        time.sleep(delay)
+        try:
+            if body is None:
+                self.send_error(404)
+                return
+            validator = VALIDATORS.get(self.path)
+            if validator and self.headers.get(validator[1]) == validator[2]:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if validator:
+                self.send_header(validator[0], validator[2])
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up on this feed (timeout tests)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def feed_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(tmp_path, base_url, paths, **kwargs) -> RSSFetcher:
+    feeds_file = tmp_path / "feeds.txt"
+    feeds_file.write_text("# fixture feeds\n" + "".join(f"{base_url}{path}\n" for path in paths))
+    kwargs.setdefault("feed_state", FeedStateStore(str(tmp_path / "feed_state.json")))
+    kwargs.setdefault("feed_metrics", FeedMetrics(str(tmp_path / "feed_metrics.json")))
+    # Parse on the download threads so timings measure downloads, not process start-up
+    kwargs.setdefault("parse_workers", 0)
+    return RSSFetcher(str(feeds_file), **kwargs)
+
+
+def test_fetch_all_runs_feeds_concurrently(tmp_path, feed_server):
+    """Three 0.4s feeds finish in about 0.4s, not 1.2s, and keep feed-list order."""
+    fetcher = make_fetcher(tmp_path, feed_server, ["/markets.xml", "/economy.xml", "/world.xml"])
+
+    started = time.monotonic()
+    results = fetcher.fetch_all()
+    elapsed = time.monotonic() - started
+
+    assert [r.headline for r in results] == ["Oil jumps", "Gold slips", "Fed holds rates", "Trade talks resume"]
+    assert results[0].source == "Markets Wire"
+    assert results[0].text == "Oil jumps body"
+    assert elapsed < 1.0
+    assert fetcher.last_cycle["succeeded"] == 3
+
+
+def test_per_feed_timeout_and_errors_skip_only_that_feed(tmp_path, feed_server):
+    """A hanging feed times out and a 404 fails without affecting the others."""
+    fetcher = make_fetcher(
+        tmp_path, feed_server, ["/hang.xml", "/markets.xml", "/missing.xml"], feed_timeout=1.0,
+    )
+
+    results = fetcher.fetch_all()
+
+    assert [r.headline for r in results] == ["Oil jumps", "Gold slips"]
+    assert fetcher.last_cycle["failed"] == 2
+    assert fetcher.last_cycle["duration_ms"] < 2000
+
+
+def test_cycle_deadline_abandons_stragglers(tmp_path, feed_server):
+    """The cycle returns at its deadline with whatever finished."""
+    fetcher = make_fetcher(
+        tmp_path, feed_server, ["/markets.xml", "/hang.xml"], feed_timeout=10.0, cycle_deadline=1.0,
+    )
+
+    started = time.monotonic()
+    results = fetcher.fetch_all()
+
+    assert time.monotonic() - started < 1.5
+    assert [r.headline for r in results] == ["Oil jumps", "Gold slips"]
+    assert fetcher.last_cycle["timed_out"] == 1
+
+
+def test_undelivered_feeds_keep_their_old_state(tmp_path, feed_server):
+    """A feed abandoned at the deadline, or whose items were never consumed, is fetched in full again."""
+    fetcher = make_fetcher(tmp_path, feed_server, ["/late_etag.xml"], feed_timeout=10.0, cycle_deadline=0.2)
+
+    assert fetcher.fetch_all() == []
+    assert fetcher.last_cycle["timed_out"] == 1
+    # Let the straggler finish downloading; it must not record the new ETag
+    time.sleep(0.8)
+    assert fetcher.feed_state.get(feed_server + "/late_etag.xml") == {}
+
+    fetcher.cycle_deadline = 5.0
+    stream = fetcher.iter_fetch()
+    assert [r.headline for r in next(stream)[1]] == ["Nickel surges"]
+    stream.close()
+    assert fetcher.feed_state.get(feed_server + "/late_etag.xml") == {}
+
+    assert [r.headline for r in fetcher.fetch_all()] == ["Nickel surges"]
+    assert fetcher.feed_state.get(feed_server + "/late_etag.xml")["etag"] == '"abc"'
+    assert fetcher.fetch_all() == []
+    assert fetcher.last_cycle["unchanged"] == 1
+
+
+def test_unchanged_feeds_are_not_parsed_again(tmp_path, feed_server):
+    """ETag, Last-Modified and identical bodies all count as unchanged on the next cycle."""
+    paths = ["/etag.xml", "/lastmod.xml", "/plain.xml"]
+    fetcher = make_fetcher(tmp_path, feed_server, paths)
+
+    assert [r.headline for r in fetcher.fetch_all()] == ["Copper rallies", "Bond yields climb", "Wheat steady"]
+    assert fetcher.last_cycle["unchanged"] == 0
+
+    assert fetcher.fetch_all() == []
+    assert fetcher.last_cycle["unchanged"] == 3
+    # 304s carry no body; only the feed without validators was downloaded again
+    assert fetcher.last_cycle["bytes_downloaded"] == len(FIXTURES["/plain.xml"][1])
+
+    # Validators persist across fetcher instances (i.e. restarts)
+    restarted = make_fetcher(tmp_path, feed_server, paths)
+    assert restarted.fetch_all() == []
+    assert restarted.last_cycle["unchanged"] == 3
+
+
+def test_feed_state_saves_merge_across_processes(tmp_path):
+    """Fetchers polling different feeds share one state file without losing each other's feeds."""
+    path = str(tmp_path / "feed_state.json")
+    first, second = FeedStateStore(path), FeedStateStore(path)
+    first.update("http://feeds.test/a", '"a1"', None, "hash-a")
+    second.update("http://feeds.test/b", '"b1"', None, "hash-b")
+    first.save()
+    second.save()
+
+    reloaded = FeedStateStore(path)
+    assert reloaded.get("http://feeds.test/a")["etag"] == '"a1"'
+    assert reloaded.get("http://feeds.test/b")["etag"] == '"b1"'
+
+
+def test_iter_fetch_yields_fast_feeds_first(tmp_path, feed_server):
+    """Finished feeds are handed on while slower ones are still downloading."""
+    fetcher = make_fetcher(
+        tmp_path, feed_server, ["/hang.xml", "/markets.xml", "/economy.xml"], max_workers=2, feed_timeout=10.0,
+    )
+
+    started = time.monotonic()
+    stream = fetcher.iter_fetch()
+    feed_url, requests = next(stream)
+
+    assert time.monotonic() - started < 1.0
+    assert feed_url.endswith("/markets.xml")
+    assert [r.headline for r in requests] == ["Oil jumps", "Gold slips"]
+    stream.close()
+    # /economy.xml was started when /markets.xml finished; closing abandons both stragglers
+    assert fetcher.last_cycle["succeeded"] == 1
+    assert fetcher.last_cycle["timed_out"] == 2
+
+
+def test_process_pool_parsing_matches_in_thread_parsing(tmp_path, feed_server):
+    """Feeds parsed in the shared process pool yield the same requests as parsing in-thread."""
+    paths = ["/markets.xml", "/economy.xml"]
+    (tmp_path / "inline").mkdir()
+    inline = make_fetcher(tmp_path / "inline", feed_server, paths)
+    pooled = make_fetcher(tmp_path, feed_server, paths, parse_workers=2)
+    try:
+        pooled_results = pooled.fetch_all()
+        assert fetcher_module._parse_pool is not None
+    finally:
+        shutdown_parse_pool()
+
+    assert fetcher_module._parse_pool is None
+    assert [r.model_dump() for r in pooled_results] == [r.model_dump() for r in inline.fetch_all()]
+
+
+def test_per_feed_metrics_table(tmp_path, feed_server):
+    """Each fetch records latency, bytes, HTTP status and failures; the table survives restarts."""
+    paths = ["/markets.xml", "/missing.xml", "/etag.xml"]
+    fetcher = make_fetcher(tmp_path, feed_server, paths)
+    fetcher.fetch_all()
+    fetcher.feed_metrics.record_dedup(f"{feed_server}/markets.xml", new=1, duplicates=1)
+    fetcher.fetch_all()
+
+    rows = {row["feed_url"][len(feed_server):]: row for row in FeedMetrics(fetcher.feed_metrics.path).get_table()}
+
+    assert rows["/missing.xml"]["consecutive_failures"] == 2
+    assert rows["/missing.xml"]["last_http_status"] == 404
+    assert rows["/missing.xml"]["latency_ms"] is None
+    assert rows["/etag.xml"]["last_status"] == "unchanged" and rows["/etag.xml"]["last_http_status"] == 304
+    markets = rows["/markets.xml"]
+    assert markets["fetches"] == 2 and markets["entries_last"] == 0
+    assert markets["latency_ms"]["avg"] >= 400
+    assert (markets["new"], markets["duplicates"], markets["duplicate_ratio"]) == (1, 1, 0.5)
+    # Slowest first by default, failing first on request
+    assert [row["feed_url"] for row in fetcher.feed_metrics.get_table()][0].endswith("/markets.xml")
+    assert fetcher.feed_metrics.get_table("failures")[0]["feed_url"].endswith("/missing.xml")
+
+
+def test_ingestion_feeds_endpoint_reads_the_saved_table():
+    metrics = FeedMetrics(FEED_METRICS_PATH)
+    metrics.record_fetch("http://feeds.test/slow", "ok", 2500.0, 1024, 200, entries=5)
+    metrics.save()
+
+    response = TestClient(app).get("/api/ingestion/feeds?sort=failures")
+    assert response.status_code == 200
+    assert "http://feeds.test/slow" in [row["feed_url"] for row in response.json()["data"]]
+    assert TestClient(app).get("/api/ingestion/feeds?sort=bogus").status_code == 422
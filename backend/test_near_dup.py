@@ -0,0 +1,154 @@
+"""
+Tests for cross-feed near-duplicate story detection.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion.dedup import DedupIndex
+from app.ingestion.near_dup import NearDuplicateDetector, jaccard, story_tokens
+from app.ingestion.pipeline import IngestionPipeline
+from app.ingestion.feed_metrics import FeedMetrics
+from app.storage.models import AnalyzeRequest
+from test_dedup import StaticFetcher
+
+NOON = datetime(2026, 3, 2, 12, 0)
+
+
+def story(headline, source, minutes=0):
+    return AnalyzeRequest(headline=headline, source=source, timestamp=NOON + timedelta(minutes=minutes))
+
+
+def test_story_tokens_drop_stopwords_and_stem():
+    assert story_tokens("The Fed is raising rates") == {"fed", "rais", "rate"}
+    assert jaccard(story_tokens("Oil prices jump"), story_tokens("Oil price jumps")) == 1.0
+
+
+def test_rewrites_across_feeds_collapse_into_one_story():
+    detector = NearDuplicateDetector()
+    requests = [
+        story("Fed raises interest rates by 25 basis points", "Reuters"),
+        story("Federal Reserve announces surprise rate cut", "Bloomberg", 5),
+        story("Fed raises rates by 25 basis points", "CNBC", 10),
+        story("Fed raises interest rates 25 basis points to fight inflation", "AP", 20),
+        story("Oil prices surge after OPEC output cut", "Reuters", 30),
+    ]
+
+    kept = detector.group(requests)
+
+    assert [r.source for r in kept] == ["Reuters", "Bloomberg", "Reuters"]
+    assert [(r.source, r.headline) for r in kept[0].related_sources] == [
+        ("CNBC", "Fed raises rates by 25 basis points"),
+        ("AP", "Fed raises interest rates 25 basis points to fight inflation"),
+    ]
+    assert kept[1].related_sources == [] and kept[2].related_sources == []
+    assert detector.get_stats() == {"clusters": 3, "merged": 2}
+
+
+def test_copies_outside_the_window_are_separate_stories():
+    detector = NearDuplicateDetector(window_s=3600)
+    kept = detector.group([
+        story("Fed raises interest rates by 25 basis points", "Reuters"),
+        story("Fed raises interest rates by 25 basis points today", "CNBC", 3 * 60),
+    ])
+    assert len(kept) == 2
+
+
+def test_copies_in_later_batches_are_dropped():
+    detector = NearDuplicateDetector()
+    assert len(detector.group([story("Tesla recalls 2 million vehicles over autopilot", "Reuters")])) == 1
+    assert detector.group([story("Tesla recalls 2 million vehicles over Autopilot flaw", "Verge", 60)]) == []
+    assert detector.merged == 1
+
+
+def test_a_shared_common_word_yields_few_candidates():
+    """Unrelated headlines sharing one word rarely share a band, so lookups stay cheap."""
+    detector = NearDuplicateDetector()
+    detector.group([
+        story(f"Markets alpha{i} bravo{i} charlie{i} delta{i}", "Wire", i % 60) for i in range(2000)
+    ])
+
+    candidates = [
+        len(list(detector._candidates(detector.hasher.signature(story_tokens(f"Markets echo{j} fox{j} golf{j} hotel{j}")))))
+        for j in range(50)
+    ]
+    assert sum(candidates) / len(candidates) < 40
+
+
+def test_clusters_expire_by_publish_time_not_arrival_order():
+    detector = NearDuplicateDetector(window_s=3600)
+    # A feed lists its newest item first
+    detector.group([
+        story("Gold climbs to a record", "Metals Wire", 0),
+        story("Silver slips on profit taking", "Metals Wire", -5 * 60),
+    ])
+    detector.group([story("Platinum steadies after a volatile week", "Metals Wire", 60)])
+
+    # The older story is gone even though it arrived after one still in the window
+    assert detector.get_stats()["clusters"] == 2
+
+
+def test_pipeline_sends_one_request_per_story(tmp_path):
+    requests = [
+        story("Copper hits record high on supply fears", "Metals Wire"),
+        story("Copper hits a record high on supply fears", "Mining Daily", 2),
+        story("Nickel slides as demand weakens", "Metals Wire", 4),
+    ]
+    pipeline = IngestionPipeline(StaticFetcher(requests), DedupIndex(str(tmp_path / "dedup_index.bin")))
+
+    kept = pipeline.run()
+
+    assert [r.headline for r in kept] == ["Copper hits record high on supply fears", "Nickel slides as demand weakens"]
+    assert kept[0].related_sources[0].source == "Mining Daily"
+
+
+class FeedsFetcher:
+    """Yields one batch per feed and records which feeds were committed."""
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.last_feed_results = {}
+        self.feed_metrics = FeedMetrics(path=None)
+        self.committed = []
+
+    def iter_fetch(self, feed_urls=None, commit=True):
+        for feed_url, requests in self.feeds.items():
+            yield feed_url, requests
+
+    def commit(self, feed_urls):
+        self.committed.extend(feed_urls)
+
+
+def test_copies_from_later_feeds_reach_held_stories(tmp_path):
+    fetcher = FeedsFetcher({
+        "http://feeds.test/toi": [story("RBI keeps repo rate unchanged at 6.5%", "Times of India")],
+        "http://feeds.test/nyt": [story("RBI keeps repo rate unchanged at 6.5 percent", "NYT Economy", 3)],
+    })
+    pipeline = IngestionPipeline(fetcher, DedupIndex(str(tmp_path / "dedup_index.bin")), hold_s=60)
+
+    batches = list(pipeline.stream())
+
+    assert len(batches) == 1
+    assert [(r.source, r.headline) for r in batches[0][0].related_sources] == [
+        ("NYT Economy", "RBI keeps repo rate unchanged at 6.5 percent"),
+    ]
+    assert fetcher.committed == ["http://feeds.test/nyt", "http://feeds.test/toi"]
+
+
+def test_feeds_still_held_when_the_consumer_stops_are_not_committed(tmp_path):
+    fetcher = FeedsFetcher({
+        "http://feeds.test/metals": [story("Copper hits record high", "Metals Wire")],
+        "http://feeds.test/energy": [story("Brent crude falls below $70", "Energy Desk")],
+    })
+    pipeline = IngestionPipeline(fetcher, DedupIndex(str(tmp_path / "dedup_index.bin")), hold_s=60)
+
+    stream = pipeline.stream()
+    assert [r.source for r in next(stream)] == ["Metals Wire"]
+    stream.close()
+
+    # The first batch was handed out but not taken up (no next()), so neither feed is committed
+    assert fetcher.committed == []
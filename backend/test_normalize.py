@@ -0,0 +1,40 @@
+"""
+Tests for feed text normalization.
+"""
+
+import sys
+import os
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion.normalize import ELLIPSIS, html_to_text, normalize_text
+
+
+def test_markup_entities_and_whitespace():
+    raw = (
+        "<p>Fed&nbsp;holds rates &amp; <b>signals</b> cuts</p>\n\n<p>Markets&#8217;   rally</p>"
+        "<script>var tag = '<p>ad</p>';</script><!-- tracking > pixel -->3 < 4"
+    )
+    assert normalize_text(raw) == "Fed holds rates & signals cuts Markets’ rally 3 < 4"
+    assert normalize_text("") == "" and normalize_text(None) == ""
+    # Escaped markup is decoded, not stripped
+    assert normalize_text("&lt;b&gt;bold&lt;/b&gt;") == "<b>bold</b>"
+
+
+def test_truncates_to_token_budget_at_a_word_boundary():
+    text = normalize_text("<p>" + "inflation " * 500 + "</p>", max_tokens=10)
+    assert text.endswith(ELLIPSIS)
+    assert len(text) <= 10 * 4 + 1
+    assert text[:-1].split(" ") == ["inflation"] * 4
+    assert normalize_text("short text", max_tokens=10) == "short text"
+
+
+def test_long_input_is_only_read_as_far_as_the_budget():
+    """A huge article costs a window around the budget, and skip blocks cut by the window don't leak."""
+    article = "<p>" + "word " * 100 + "</p><script>" + "secret " * 10_000 + "</script>" + "<p>tail</p>" * 10_000
+    text = html_to_text(article, max_chars=400)
+    assert "secret" not in text and "tail" not in text
+    assert normalize_text(article, max_tokens=20).startswith("word word")
+    assert "secret" not in html_to_text(article)
+    assert html_to_text(article).count("tail") == 10_000
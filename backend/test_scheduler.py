@@ -0,0 +1,183 @@
+"""
+Tests for the adaptive per-feed polling scheduler (fake pipeline and clocks).
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timezone
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ingestion.scheduler import AdaptiveScheduler
+from app.storage.backend import timestamp_sort_key
+from app.storage.models import AnalyzeRequest
+
+BUSY = "http://feeds.test/busy"
+QUIET = "http://feeds.test/quiet"
+BROKEN = "http://feeds.test/broken"
+NOW = 1_800_000_000.0
+
+
+class FakeClock:
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def entries(url: str, gap: float, count: int, newest: float) -> list:
+    return [
+        AnalyzeRequest(
+            headline=f"{url} #{i}",
+            source=url,
+            timestamp=datetime.fromtimestamp(newest - i * gap, tz=timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+
+class FakePipeline:
+    """Stands in for IngestionPipeline: serves scripted per-feed outcomes."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes  # url -> callable(now) -> (status, requests)
+        self.fetcher = self
+        self.last_feed_results = {}
+        self.calls = []
+
+    def get_feeds_list(self):
+        return list(self.outcomes)
+
+    def stream(self, feed_urls):
+        self.calls.append(list(feed_urls))
+        self.last_feed_results = {}
+        for url in feed_urls:
+            status, requests = self.outcomes[url](wall.now)
+            published = [timestamp_sort_key(request.timestamp) for request in requests]
+            self.last_feed_results[url] = {"status": status, "published": published}
+            if requests:
+                yield requests
+
+
+wall = FakeClock(NOW)
+
+
+def make_scheduler(outcomes, **kwargs):
+    wall.now = NOW
+    clock = FakeClock(0.0)
+    pipeline = FakePipeline(outcomes)
+    received = []
+    scheduler = AdaptiveScheduler(
+        pipeline,
+        on_new=received.extend,
+        min_interval=60,
+        max_interval=3600,
+        default_interval=120,
+        clock=clock,
+        wall_clock=wall,
+        rng=random.Random(7),
+        **kwargs,
+    )
+    return scheduler, pipeline, clock, received
+
+
+def advance(clock, seconds):
+    clock.now += seconds
+    wall.now += seconds
+
+
+def test_busy_feeds_poll_often_and_quiet_feeds_rarely():
+    """Intervals follow each feed's publish rate, within the configured bounds."""
+    scheduler, pipeline, clock, received = make_scheduler({
+        BUSY: lambda now: ("ok", entries(BUSY, 90, 10, now - 30)),
+        QUIET: lambda now: ("ok", entries(QUIET, 6 * 3600, 10, now - 600)),
+    })
+
+    scheduler.run_due()
+
+    stats = scheduler.get_stats()
+    assert pipeline.calls == [[BUSY, QUIET]]
+    assert len(received) == 20
+    assert stats[BUSY]["interval_s"] == 90
+    assert stats[QUIET]["interval_s"] == 3600
+    # Only the busy feed is due again two minutes later
+    advance(clock, 120)
+    assert scheduler.due_feeds() == [BUSY]
+
+
+def test_silence_stretches_the_interval():
+    """A feed that stops publishing is polled less and less often."""
+    scheduler, _, clock, _ = make_scheduler({BUSY: lambda now: ("ok", entries(BUSY, 60, 5, NOW - 10))})
+    scheduler.run_due()
+    first = scheduler.get_stats()[BUSY]["interval_s"]
+
+    # Same entries on every later poll: nothing new since NOW - 10
+    for _ in range(5):
+        advance(clock, scheduler.seconds_until_next())
+        scheduler.run_due()
+
+    assert scheduler.get_stats()[BUSY]["interval_s"] > first * 2
+
+
+def test_errors_back_off_with_jitter_and_recover():
+    """Consecutive failures back off exponentially (capped); a success resets the count."""
+    state = {"fail": True}
+
+    def outcome(now):
+        if state["fail"]:
+            return ("failed", [])
+        return ("ok", entries(BROKEN, 120, 5, now - 10))
+
+    scheduler, _, clock, _ = make_scheduler({BROKEN: outcome})
+    delays = []
+    for _ in range(6):
+        scheduler.run_due()
+        delays.append(scheduler.seconds_until_next())
+        advance(clock, delays[-1])
+
+    assert scheduler.get_stats()[BROKEN]["consecutive_errors"] == 6
+    assert delays[1] > delays[0]
+    assert all(60 <= d <= 3600 for d in delays)
+    assert 120 * 2 / 2 <= delays[0] <= 120 * 2
+
+    state["fail"] = False
+    scheduler.run_due()
+    stats = scheduler.get_stats()[BROKEN]
+    assert stats["consecutive_errors"] == 0
+    assert stats["interval_s"] == 120
+
+
+def test_pipeline_exception_counts_as_failed_round():
+    """An exception from the pipeline backs off every due feed instead of spinning."""
+    def explode(now):
+        raise RuntimeError("repository unavailable")
+
+    scheduler, _, _, received = make_scheduler({BUSY: explode, QUIET: explode})
+
+    assert scheduler.run_due() == 0
+    assert scheduler.due_feeds() == []
+    assert received == []
+    assert all(s["consecutive_errors"] == 1 for s in scheduler.get_stats().values())
+
+
+def test_on_new_returning_false_ends_the_round():
+    """A consumer that stops accepting batches closes the pipeline stream."""
+    scheduler, pipeline, _, _ = make_scheduler({
+        BUSY: lambda now: ("ok", entries(BUSY, 90, 3, now - 30)),
+        QUIET: lambda now: ("ok", entries(QUIET, 90, 3, now - 30)),
+    })
+    batches = []
+
+    def stop_after_first(batch):
+        batches.append(batch)
+        return False
+
+    scheduler.on_new = stop_after_first
+
+    assert scheduler.run_due() == 3
+    assert [batch[0].source for batch in batches] == [BUSY]
+    # The pipeline never got to the second feed
+    assert list(pipeline.last_feed_results) == [BUSY]
@@ -0,0 +1,635 @@
+"""
+Tests for the storage layer: repository indexes and lookups.
+"""
+
+import sys
+import os
+import copy
+import gzip
+import json
+import subprocess
+import threading
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.storage import repository
+from app.storage.wal import WriteAheadLog
+from app.storage.archive import dedup_key_hash
+from app.storage.sqlite_backend import SQLiteBackend
+from app.storage.memory_backend import MemoryBackend
+from app.storage.backend import event_sort_key, timestamp_sort_key
+from app.storage.search import SearchIndex, parse_query
+
+
+SAMPLE_EVENT = {
+    "event_id": "test_storage_evt",
+    "headline": "Storage test headline",
+    "source": "Storage Test Source",
+    "timestamp": "2026-02-15T14:30:55Z",
+    "severity": "MEDIUM",
+    "event_sentiment": "POSITIVE",
+    "macro_effect": "Test Effect",
+    "prediction_horizon": "SHORT_TERM",
+    "market_pressure": "RISK_ON",
+    "logic_chain": [
+        {"type": "event", "text": "Test event"},
+        {"type": "macro", "text": "Test macro"},
+        {"type": "sector", "text": "Test sector"},
+        {"type": "asset", "text": "AAPL"},
+    ],
+    "affected_assets": [
+        {
+            "ticker": "AAPL",
+            "name": "Apple Inc.",
+            "asset_class": "Equity",
+            "sector": "Technology",
+            "prediction": "BULLISH",
+            "confidence": 0.75,
+            "reason": "Test reason",
+        }
+    ],
+    "why": "Test explanation",
+    "meta": {
+        "llm_model": "test-model",
+        "llm_prompt_version": "v1",
+        "confidence_components": {
+            "llm_score": 0.75,
+            "sentiment_strength": 0.6,
+            "historical_similarity": 0.5,
+        },
+        "confidence_formula": "test_formula",
+    },
+}
+
+
+def make_event(event_id: str, timestamp: str, **overrides) -> dict:
+    """Build a valid event dict based on SAMPLE_EVENT."""
+    event = copy.deepcopy(SAMPLE_EVENT)
+    event["event_id"] = event_id
+    event["headline"] = f"Storage test headline {event_id}"
+    event["timestamp"] = timestamp
+    event.update(overrides)
+    return event
+
+
+def test_event_id_index():
+    """Events are retrievable by ID right after being added."""
+    event = repository.add_event(make_event("test_idx_001", "2026-02-15T10:00:00Z"))
+
+    assert repository.get_event_by_id("test_idx_001") is event
+    assert repository.get_event_by_id("test_idx_missing") is None
+    assert repository.has_event(event["headline"], event["source"])
+    assert not repository.has_event(event["headline"], "Another Source")
+
+
+def test_latest_events_ordered_by_timestamp():
+    """Latest events come back newest first regardless of insertion order."""
+    repository.add_event(make_event("test_idx_future_b", "2099-01-01T00:00:02Z"))
+    repository.add_event(make_event("test_idx_future_a", "2099-01-01T00:00:01.500000Z"))
+    repository.add_event(make_event("test_idx_future_c", "2099-01-01T00:00:03Z"))
+
+    latest = repository.get_latest_events(3)
+
+    assert [e["event_id"] for e in latest] == [
+        "test_idx_future_c",
+        "test_idx_future_b",
+        "test_idx_future_a",
+    ]
+
+
+def test_validation_index_by_event_and_horizon():
+    """Validations are indexed by event ID and horizon."""
+    base = {
+        "event_id": "test_idx_val",
+        "headline": "Validation index test",
+        "predicted_direction": "BULLISH",
+        "predicted_ticker": "AAPL",
+        "predicted_confidence": 0.7,
+        "price_at_event": 100.0,
+        "status": "PENDING",
+    }
+    first = repository.add_validation({**base, "horizon": "1h"})
+    second = repository.add_validation({**base, "horizon": "24h"})
+
+    assert repository.get_validation_by_event_id("test_idx_val") == first
+    assert repository.get_validation_by_event_id_and_horizon("test_idx_val", "24h") == second
+    assert repository.get_validation_by_event_id_and_horizon("test_idx_val", "6h") is None
+    assert repository.get_validation_by_event_id("test_idx_missing") is None
+
+
+def test_wal_replay_skips_torn_records(tmp_path):
+    """WAL records round-trip and a torn trailing line is ignored."""
+    wal = WriteAheadLog(str(tmp_path / "wal.jsonl"))
+    wal.append("event", {"event_id": "a"})
+    wal.append("validation", {"event_id": "a", "horizon": "1h"})
+    wal.close()
+    with open(wal.path, "a") as f:
+        f.write('{"kind": "event", "data": {"event_')
+
+    replayed = list(WriteAheadLog(wal.path).replay())
+
+    assert replayed == [
+        ("event", {"event_id": "a"}),
+        ("validation", {"event_id": "a", "horizon": "1h"}),
+    ]
+
+
+def test_add_event_appends_to_wal_and_compacts():
+    """Writes land in the WAL and compaction moves them into the backups."""
+    event = repository.add_event(make_event("test_wal_001", "2026-02-15T11:00:00Z"))
+    repository.flush()
+
+    replayed = list(WriteAheadLog(repository.WAL_PATH).replay())
+    assert ("event", event) in replayed
+
+    assert repository.compact()
+    assert list(WriteAheadLog(repository.WAL_PATH).replay()) == []
+    backup = repository.load_backup(repository.EVENTS_BACKUP_PATH)
+    assert any(e["event_id"] == "test_wal_001" for e in backup)
+
+
+def test_sqlite_backend(tmp_path):
+    """SQLite backend answers the same queries as the in-memory store."""
+    db_path = str(tmp_path / "geopulse.db")
+    seed = [make_event("test_sql_seed", "2026-01-01T00:00:00Z")]
+    backend = SQLiteBackend(db_path, seed_events=seed)
+
+    older = make_event("test_sql_001", "2026-02-01T00:00:00Z")
+    newer = make_event("test_sql_002", "2026-03-01T00:00:00Z")
+    backend.add_event(newer)
+    backend.add_event(older)
+    backend.add_validation({"event_id": "test_sql_001", "horizon": "6h", "validated_at": "2026-02-02T00:00:00Z"})
+
+    assert backend.get_event_by_id("test_sql_001") == older
+    assert [e["event_id"] for e in backend.get_latest_events(2)] == ["test_sql_002", "test_sql_001"]
+    assert backend.has_event(older["headline"], older["source"])
+    assert backend.get_validation("test_sql_001", "6h")["horizon"] == "6h"
+    assert backend.get_validation("test_sql_001", "1h") is None
+    stats = backend.get_stats()
+    assert stats["events_count"] == 3
+    assert stats["validations_count"] == 1
+    backend.close()
+
+    # Seeding only happens on an empty database
+    reopened = SQLiteBackend(db_path, seed_events=seed)
+    assert reopened.get_stats()["events_count"] == 3
+    version = reopened.get_version()
+    reopened.add_validation({"event_id": "test_sql_002", "horizon": "1h"})
+    assert reopened.get_version() == version + 1
+    reopened.close()
+
+
+def test_load_report_describes_startup():
+    """Startup load metrics are recorded for /api/health."""
+    report = repository.get_load_report()
+
+    assert report["backend"] == repository.STORAGE_BACKEND
+    assert report["source"] in ("backup", "mock", "sqlite")
+    assert report["events_loaded"] >= 0
+    assert report["load_ms"] >= 0
+
+
+def test_importing_the_entry_points_does_not_load_the_store(tmp_path):
+    """Spawned worker processes re-import the entry point; that alone must not load the store."""
+    script = (
+        "import sys, analysis, main, workers.rssfetch\n"
+        "from app.storage import repository\n"
+        "sys.exit(repository._backend is not None)\n"
+    )
+    env = dict(os.environ, GEOPULSE_DATA_DIR=str(tmp_path))
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+    assert subprocess.run([sys.executable, "-c", script], cwd=backend_dir, env=env).returncode == 0
+    assert not os.path.exists(tmp_path / "repository_wal.jsonl")
+
+
+def test_memory_backend_restores_backup_and_wal(tmp_path):
+    """A restarted memory backend sees both compacted and logged writes."""
+    paths = {
+        "wal_path": str(tmp_path / "wal.jsonl"),
+        "events_backup_path": str(tmp_path / "events_backup.json"),
+        "validations_backup_path": str(tmp_path / "validations_backup.json"),
+    }
+    backend = MemoryBackend(**paths)
+    backend.add_event(make_event("test_restore_001", "2026-02-01T00:00:00Z"))
+    backend.compact()
+    backend.add_event(make_event("test_restore_002", "2026-02-02T00:00:00Z"))
+    backend.close()
+
+    restored = MemoryBackend(
+        repository.load_backup(paths["events_backup_path"]),
+        repository.load_backup(paths["validations_backup_path"]),
+        **paths,
+    )
+
+    assert [e["event_id"] for e in restored.get_events()] == ["test_restore_002", "test_restore_001"]
+    assert restored.replayed_records == 1
+
+
+def test_background_flusher_coalesces_writes(tmp_path):
+    """Queued writes reach the WAL in batches and are flushed on close."""
+    wal_path = str(tmp_path / "wal.jsonl")
+    backend = MemoryBackend(wal_path=wal_path, flush_interval_ms=60_000, flush_max_records=1000)
+    for i in range(5):
+        backend.add_event(make_event(f"test_flush_{i:03d}", "2026-02-01T00:00:00Z"))
+
+    # Nothing is written from the request path
+    assert list(WriteAheadLog(wal_path).replay()) == []
+    assert backend.get_persistence_stats()["pending_records"] == 5
+
+    backend.close()
+
+    assert len(list(WriteAheadLog(wal_path).replay())) == 5
+    stats = backend.get_persistence_stats()
+    assert stats["flush_count"] == 1
+    assert stats["bytes_written"] == os.path.getsize(wal_path)
+
+
+def test_hot_window_evicts_to_cold_archive(tmp_path):
+    """Old events leave memory but stay readable through the archive."""
+    archive_dir = str(tmp_path / "archive")
+    backend = MemoryBackend(hot_capacity=3, evict_batch=2, archive_dir=archive_dir)
+    for day in range(1, 7):
+        backend.add_event(make_event(f"test_hot_{day}", f"2026-03-0{day}T12:00:00Z"))
+
+    stats = backend.get_stats()
+    assert stats["hot_events_count"] <= 3
+    assert stats["events_count"] == 6
+    assert os.listdir(archive_dir)
+
+    oldest = backend.get_event_by_id("test_hot_1")
+    assert oldest is not None and oldest["event_id"] == "test_hot_1"
+    assert backend.has_event(oldest["headline"], oldest["source"])
+    assert [e["event_id"] for e in backend.get_latest_events(6)] == [
+        f"test_hot_{day}" for day in range(6, 0, -1)
+    ]
+
+    # The archive directory survives a restart
+    reopened = MemoryBackend(hot_capacity=3, evict_batch=2, archive_dir=archive_dir)
+    assert reopened.get_event_by_id("test_hot_1")["event_id"] == "test_hot_1"
+
+
+def test_repeated_event_ids_are_made_unique(tmp_path, monkeypatch):
+    """Mock-style IDs repeat within a second; every event is still stored, evicted and listed."""
+    backend = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=str(tmp_path / "archive"))
+    monkeypatch.setattr(repository, "_backend", backend)
+    stored = [
+        repository.add_event(make_event("evt_mock_20260301_120000", f"2026-03-0{day}T12:00:00Z", headline=f"Mock {day}"))
+        for day in range(1, 7)
+    ]
+
+    ids = [event["event_id"] for event in stored]
+    assert ids[0] == "evt_mock_20260301_120000"
+    assert len(set(ids)) == 6
+    assert backend.get_stats()["events_count"] == 6
+    assert len(backend.query_events(10, {})) == 6
+    assert backend.get_rollups()["events"]["total"] == 6
+    assert all(backend.get_event_by_id(event_id)["headline"] == f"Mock {day}" for day, event_id in enumerate(ids, 1))
+
+
+def test_restart_skips_snapshot_events_archived_since_compaction(tmp_path):
+    """Events evicted after the last compaction are not loaded back into the hot window."""
+    paths = {
+        "wal_path": str(tmp_path / "wal.jsonl"),
+        "events_backup_path": str(tmp_path / "events_backup.json"),
+        "validations_backup_path": str(tmp_path / "validations_backup.json"),
+        "archive_dir": str(tmp_path / "archive"),
+        "hot_capacity": 5,
+        "evict_batch": 2,
+    }
+    backend = MemoryBackend(**paths)
+    for i in range(5):
+        backend.add_event(make_event(f"test_resnap_{i}", f"2026-03-0{i + 1}T12:00:00Z"))
+    backend.compact()
+    for i in range(5, 8):
+        backend.add_event(make_event(f"test_resnap_{i}", f"2026-03-0{i + 1}T12:00:00Z"))
+    backend.close()
+
+    restored = MemoryBackend(repository.load_backup(paths["events_backup_path"]), **paths)
+
+    ids = [e["event_id"] for e in restored.query_events(20, {})]
+    assert ids == [f"test_resnap_{i}" for i in range(7, -1, -1)]
+    assert restored.get_stats()["events_count"] == 8
+    assert restored.get_rollups()["events"]["total"] == 8
+
+
+def test_memory_backend_concurrent_readers_and_writers(tmp_path):
+    """Concurrent writers, readers and evictions leave the store consistent."""
+    backend = MemoryBackend(hot_capacity=50, evict_batch=10, archive_dir=str(tmp_path / "archive"))
+    errors = []
+
+    def writer(worker: int):
+        try:
+            for i in range(100):
+                backend.add_event(make_event(f"test_conc_{worker}_{i}", f"2026-04-01T00:{i % 60:02d}:00Z"))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(200):
+                backend.get_latest_events(20)
+                backend.get_events()
+                backend.get_stats()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert backend.get_stats()["events_count"] == 400
+    assert backend.get_event_by_id("test_conc_0_0")["event_id"] == "test_conc_0_0"
+
+
+def _filter_fixture_events():
+    """Three events spread over tickers, sources, severities and pressures."""
+    oil = make_event("test_flt_oil", "2026-05-01T00:00:00Z", source="Bloomberg", severity="HIGH",
+                     market_pressure="INFLATIONARY")
+    oil["affected_assets"][0]["ticker"] = "XOM"
+    fed = make_event("test_flt_fed", "2026-05-02T00:00:00Z", source="Reuters", severity="HIGH",
+                     market_pressure="RISK_OFF")
+    tech = make_event("test_flt_tech", "2026-05-03T00:00:00Z", source="Reuters", severity="LOW",
+                      market_pressure="RISK_ON")
+    return [oil, fed, tech]
+
+
+def _check_filtered_queries(backend):
+    for event in _filter_fixture_events():
+        backend.add_event(event)
+
+    def ids(**filters):
+        return [e["event_id"] for e in backend.query_events(10, filters)]
+
+    assert ids(ticker="XOM") == ["test_flt_oil"]
+    assert ids(ticker="AAPL") == ["test_flt_tech", "test_flt_fed"]
+    assert ids(source="Reuters", severity="HIGH") == ["test_flt_fed"]
+    assert ids(market_pressure="RISK_ON") == ["test_flt_tech"]
+    assert ids(severity="MEDIUM") == []
+
+
+def test_memory_backend_secondary_indexes(tmp_path):
+    """Filtered queries hit the inverted indexes, including after eviction."""
+    backend = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=str(tmp_path / "archive"))
+    _check_filtered_queries(backend)
+
+
+def test_archived_filters_read_only_matching_partitions(tmp_path, monkeypatch):
+    """Filtered listings find archived matches through on-disk postings."""
+    backend = MemoryBackend(hot_capacity=1, evict_batch=1, archive_dir=str(tmp_path / "archive"))
+    for event in _filter_fixture_events():
+        backend.add_event(event)
+    archive = backend.archive
+    archive._cached_partition = archive._cached_lookup = None
+    decoded = []
+    decode = archive._decode_partition
+    monkeypatch.setattr(archive, "_decode_partition", lambda partition, **kw: decoded.append(partition) or decode(partition, **kw))
+
+    assert backend.query_events(10, {"ticker": "NOPE"}) == []
+    assert [e["event_id"] for e in backend.query_events(10, {"ticker": "XOM"})] == ["test_flt_oil"]
+    assert [e["event_id"] for e in backend.query_events(10, {"source": "Reuters", "severity": "HIGH"})] == ["test_flt_fed"]
+    assert decoded == ["2026-05-01", "2026-05-02"]
+
+
+def test_sqlite_backend_secondary_indexes(tmp_path):
+    """SQLite answers the same filtered queries through its indexed columns."""
+    backend = SQLiteBackend(str(tmp_path / "geopulse.db"))
+    _check_filtered_queries(backend)
+    backend.close()
+
+
+def test_repository_query_events_normalizes_ticker():
+    """Repository ticker filters are case-insensitive."""
+    event = make_event("test_flt_repo", "2026-05-04T00:00:00Z")
+    event["affected_assets"][0]["ticker"] = "ZZTEST"
+    repository.add_event(event)
+
+    assert [e["event_id"] for e in repository.query_events(5, ticker="zztest")] == ["test_flt_repo"]
+
+
+def _check_time_range_pagination(backend):
+    # Two events share a timestamp, so paging must break ties by event_id
+    for event_id, timestamp in [
+        ("test_page_a", "2026-07-01T00:00:00Z"),
+        ("test_page_b", "2026-07-02T00:00:00Z"),
+        ("test_page_d", "2026-07-03T00:00:00Z"),
+        ("test_page_c", "2026-07-03T00:00:00Z"),
+        ("test_page_e", "2026-07-05T00:00:00Z"),
+    ]:
+        backend.add_event(make_event(event_id, timestamp))
+
+    def ids(limit=10, **kwargs):
+        return [e["event_id"] for e in backend.query_events(limit, {}, **kwargs)]
+
+    start = timestamp_sort_key("2026-07-02T00:00:00Z")
+    end = timestamp_sort_key("2026-07-05T00:00:00Z")
+    assert ids(start=start, end=end) == ["test_page_d", "test_page_c", "test_page_b"]
+
+    pages, before = [], None
+    while True:
+        page = backend.query_events(2, {}, before=before)
+        if not page:
+            break
+        pages.append([e["event_id"] for e in page])
+        before = event_sort_key(page[-1])
+    assert pages == [
+        ["test_page_e", "test_page_d"],
+        ["test_page_c", "test_page_b"],
+        ["test_page_a"],
+    ]
+    assert ids(end=end, before=event_sort_key(backend.get_event_by_id("test_page_d"))) == [
+        "test_page_c", "test_page_b", "test_page_a",
+    ]
+
+
+def test_memory_backend_time_range_pagination(tmp_path):
+    """Range and cursor queries work across the hot window and the archive."""
+    backend = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=str(tmp_path / "archive"))
+    _check_time_range_pagination(backend)
+
+
+def test_sqlite_backend_time_range_pagination(tmp_path):
+    """SQLite answers the same range and cursor queries."""
+    backend = SQLiteBackend(str(tmp_path / "geopulse.db"))
+    _check_time_range_pagination(backend)
+    backend.close()
+
+
+def test_repository_cursor_round_trip():
+    """Cursors are opaque strings that decode back to the event's sort key."""
+    event = make_event("test_cursor", "2026-07-10T12:00:00Z")
+
+    assert repository.decode_cursor(repository.encode_cursor(event)) == event_sort_key(event)
+    try:
+        repository.decode_cursor("not-a-cursor")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("malformed cursor accepted")
+
+
+def _check_rollups(backend):
+    backend.add_event(make_event("test_roll_1", "2026-08-01T00:00:00Z", severity="HIGH", source="Reuters"))
+    backend.add_event(make_event("test_roll_2", "2026-08-02T00:00:00Z", severity="HIGH", event_sentiment="NEGATIVE"))
+    backend.add_event(make_event("test_roll_3", "2026-08-03T00:00:00Z"))
+    validation = {"event_id": "test_roll_1", "predicted_ticker": "aapl", "horizon": "1h"}
+    backend.add_validation({**validation, "status": "CORRECT"})
+    backend.add_validation({**validation, "status": "CORRECT", "horizon": "24h"})
+    backend.add_validation({**validation, "status": "INCORRECT"})
+    backend.add_validation({**validation, "status": "PENDING", "predicted_ticker": "XOM"})
+
+    rollups = backend.get_rollups()
+    events = rollups["events"]
+    assert events["total"] == 3
+    assert events["by_severity"] == {"HIGH": 2, "MEDIUM": 1}
+    assert events["by_sentiment"] == {"POSITIVE": 2, "NEGATIVE": 1}
+    assert events["by_source"] == {"Reuters": 1, "Storage Test Source": 2}
+
+    validations = rollups["validations"]
+    assert validations["by_status"] == {"CORRECT": 2, "INCORRECT": 1, "PENDING": 1}
+    assert validations["accuracy"] == round(2 / 3, 4)
+    assert validations["by_ticker"]["AAPL"]["1h"] == {"CORRECT": 1, "INCORRECT": 1, "PENDING": 0, "accuracy": 0.5}
+    assert validations["by_ticker"]["AAPL"]["24h"]["accuracy"] == 1.0
+    assert validations["by_ticker"]["XOM"]["1h"]["accuracy"] is None
+    return rollups
+
+
+def test_memory_backend_rollups(tmp_path):
+    """Aggregates count evicted events and survive a restart via the archive directory."""
+    archive_dir = str(tmp_path / "archive")
+    backend = MemoryBackend(hot_capacity=1, evict_batch=1, archive_dir=archive_dir)
+    _check_rollups(backend)
+
+    # Only archived events remain after a restart without backups
+    reopened = MemoryBackend(hot_capacity=1, evict_batch=1, archive_dir=archive_dir)
+    assert reopened.get_rollups()["events"]["by_severity"] == {"HIGH": 2}
+
+
+def test_sqlite_backend_rollups(tmp_path):
+    """SQLite keeps the same aggregates in counter tables, and backfills them on migration."""
+    db_path = str(tmp_path / "geopulse.db")
+    backend = SQLiteBackend(db_path)
+    rollups = _check_rollups(backend)
+    conn = backend._conn()
+    conn.execute("DROP TABLE event_counters")
+    conn.execute("DROP TABLE validation_counters")
+    backend.close()
+
+    assert SQLiteBackend(db_path).get_rollups() == rollups
+
+
+def _check_search(backend):
+    backend.add_event(make_event(
+        "test_search_oil", "2026-06-01T00:00:00Z",
+        headline="OPEC cuts oil output again", why="Oil supply shrinks",
+    ))
+    backend.add_event(make_event(
+        "test_search_infl", "2026-06-02T00:00:00Z",
+        headline="Inflation surprise lifts yields", macro_effect="Inflationary impulse",
+    ))
+    backend.add_event(make_event(
+        "test_search_chain", "2026-06-03T00:00:00Z",
+        logic_chain=[{"type": "macro", "text": "Higher oil prices feed inflation"}],
+    ))
+
+    def ids(query):
+        return [event["event_id"] for event, _ in backend.search_events(parse_query(query), 10)]
+
+    # Two mentions of "oil" outrank one
+    assert ids("oil") == ["test_search_oil", "test_search_chain"]
+    assert ids("OIL inflation") == ["test_search_chain"]
+    assert set(ids("infl*")) == {"test_search_infl", "test_search_chain"}
+    assert ids("infl") == []
+    assert ids("copper") == []
+
+
+def test_memory_backend_search(tmp_path):
+    """Search ranks with BM25, supports prefixes and still finds archived events."""
+    archive_dir = str(tmp_path / "archive")
+    backend = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=archive_dir)
+    _check_search(backend)
+    # Evicted events leave the in-memory index for the archive's on-disk one
+    assert len(backend.search_index) == 2
+
+    reopened = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=archive_dir)
+    assert [e["event_id"] for e, _ in reopened.search_events(parse_query("opec"), 5)] == ["test_search_oil"]
+
+
+
+def test_legacy_archive_directory_is_imported(tmp_path):
+    """An archive from before index.db (directory.jsonl) is imported, then full-text indexed in the background."""
+    archive_dir = tmp_path / "archive"
+    archive_dir.mkdir()
+    events = [
+        make_event("test_legacy_1", "2026-06-01T00:00:00Z", headline="OPEC cuts oil output again"),
+        make_event("test_legacy_2", "2026-06-01T06:00:00Z", headline="Gold steadies"),
+    ]
+    with gzip.open(archive_dir / "events-2026-06-01.jsonl.gz", "wt") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+    with open(archive_dir / "directory.jsonl", "w") as f:
+        for event in events:
+            f.write(json.dumps({
+                "id": event["event_id"], "p": "2026-06-01",
+                "k": dedup_key_hash(event["headline"], event["source"]),
+                "t": timestamp_sort_key(event["timestamp"]),
+            }) + "\n")
+
+    backend = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=str(archive_dir))
+    assert backend.get_stats()["archived_events_count"] == 2
+    assert backend.get_event_by_id("test_legacy_1")["headline"] == "OPEC cuts oil output again"
+    assert backend.has_event("Gold steadies", events[1]["source"])
+    assert backend.archive.search_ready.wait(5.0)
+    assert [e["event_id"] for e, _ in backend.search_events(parse_query("opec"), 5)] == ["test_legacy_1"]
+
+    # Imported once: a restart doesn't count the entries again
+    reopened = MemoryBackend(hot_capacity=2, evict_batch=1, archive_dir=str(archive_dir))
+    assert reopened.get_stats()["archived_events_count"] == 2
+    assert reopened.get_rollups()["events"]["total"] == 2
+
+
+def test_search_index_compacts_removed_documents():
+    """Removed documents' postings are dropped once they outnumber the live ones."""
+    index = SearchIndex()
+    for i in range(3000):
+        index.add(f"doc{i}", f"common word{i}")
+    for i in range(2000):
+        index.remove(f"doc{i}")
+
+    assert len(index) == 1000
+    assert index.document_frequency("common") < 2000
+    assert index.search(parse_query("word2500"), 5)[0][0] == "doc2500"
+    assert index.search(parse_query("word5"), 5) == []
+    # Ties still go to the most recently added document
+    assert [event_id for event_id, _ in index.search(parse_query("common"), 2)] == ["doc2999", "doc2998"]
+
+
+def test_sqlite_backend_search(tmp_path):
+    """SQLite answers the same searches through FTS5."""
+    backend = SQLiteBackend(str(tmp_path / "geopulse.db"))
+    _check_search(backend)
+    backend.close()
+
+
+def test_repository_search_events():
+    """Repository search parses the query and ignores punctuation-only input."""
+    repository.add_event(make_event("test_search_repo", "2026-06-04T00:00:00Z", headline="Zirconium tariffs announced"))
+
+    assert [e["event_id"] for e, _ in repository.search_events("zirconium, tariffs!")] == ["test_search_repo"]
+    assert repository.search_events("*** ...") == []
+
+
+if __name__ == "__main__":
+    test_event_id_index()
+    test_latest_events_ordered_by_timestamp()
+    test_validation_index_by_event_and_horizon()
+    test_add_event_appends_to_wal_and_compacts()
+    test_load_report_describes_startup()
+    test_repository_query_events_normalizes_ticker()
+    test_repository_cursor_round_trip()
+    test_repository_search_events()
+    print("✓ All storage tests passed!")
@@ -0,0 +1,182 @@
+"""
+Tests for the blocking producer/consumer worker pipeline.
+"""
+
+import sys
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add the current directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.ingestion import workers
+from app.ingestion.dedup import DedupIndex, content_hash
+from app.intelligence import pipeline as intelligence_pipeline
+from app.ingestion.workers import CycleMetrics, WorkerPipeline, analyze_item, put_blocking, request_to_item
+from app.storage import repository
+from app.storage.models import AnalyzeRequest, RelatedSource
+from test_storage import make_event
+
+ITEMS = 10
+
+
+def produce(queue, stop, feeds):
+    """Fetch process stand-in: queue ITEMS items, then idle until stopped."""
+    for i in range(ITEMS):
+        if not put_blocking(queue, {"item_title": f"headline {i}"}, stop, timeout=0.05):
+            return
+    stop.wait()
+
+
+def produce_cycle(queue, stop, feeds):
+    """One polling cycle's worth of items published a minute ago, then its end marker."""
+    published = (datetime.utcnow() - timedelta(seconds=60)).isoformat()
+    for i in range(ITEMS):
+        put_blocking(queue, {"item_title": f"headline {i}", "pubDate": published, "cycle": "fetch#1"}, stop)
+    put_blocking(queue, {"cycle_end": "fetch#1", "items": ITEMS, "started_at": time.time() - 1}, stop)
+    stop.wait()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_put_blocking_gives_up_on_stop():
+    full = queue.Queue(maxsize=1)
+    full.put("item")
+    stop = threading.Event()
+    threading.Timer(0.1, stop.set).start()
+
+    started = time.monotonic()
+    assert put_blocking(full, "another", stop, timeout=0.02) is False
+    assert time.monotonic() - started < 1.0
+
+
+def test_full_queue_holds_back_fetchers_until_workers_catch_up():
+    gate = threading.Event()
+    handled = []
+
+    def handler(item):
+        gate.wait()
+        handled.append(item["item_title"])
+
+    pipeline = WorkerPipeline(fetch_target=produce, handler=handler, workers=1, queue_size=3, timeout=0.05)
+    pipeline.start()
+    try:
+        # One item is held by the blocked worker, three fill the queue, the rest wait in the fetcher
+        wait_for(lambda: pipeline.queue_depth() == 3)
+        time.sleep(0.2)
+        assert pipeline.get_stats()["queue_depth"] == 3
+        assert handled == []
+
+        gate.set()
+        wait_for(lambda: pipeline.processed == ITEMS)
+    finally:
+        pipeline.stop(timeout=5.0)
+
+    assert sorted(handled) == sorted(f"headline {i}" for i in range(ITEMS))
+    stats = pipeline.get_stats()
+    assert stats["fetchers_alive"] == 0 and stats["workers_alive"] == 0
+
+
+def test_stop_drains_queued_items_and_counts_failures():
+    def handler(item):
+        if item["item_title"] == "headline 3":
+            raise RuntimeError("LLM unavailable")
+        time.sleep(0.01)
+
+    pipeline = WorkerPipeline(fetch_target=produce, handler=handler, workers=3, timeout=0.05)
+    pipeline.start()
+    wait_for(lambda: pipeline.processed + pipeline.failed + pipeline.queue_depth() == ITEMS)
+
+    pipeline.stop(timeout=5.0)
+
+    assert (pipeline.processed, pipeline.failed) == (ITEMS - 1, 1)
+    assert not any(thread.is_alive() for thread in pipeline.worker_threads)
+
+
+def test_analyze_item_stores_event_with_related_sources(monkeypatch):
+    request = AnalyzeRequest(
+        headline="Workers test headline",
+        source="Reuters",
+        text="Body",
+        related_sources=[RelatedSource(source="AP", headline="Workers test headline (AP)")],
+    )
+    calls = []
+
+    def fake_analyze(headline, source, timestamp=None, additional_text=None, related_sources=None):
+        calls.append((headline, additional_text))
+        return make_event(
+            "test_workers_001", "2020-01-01T00:00:00Z",
+            headline=headline, source=source, related_sources=related_sources,
+        )
+
+    monkeypatch.setattr(workers, "analyze_text", fake_analyze)
+    analyze_item(request_to_item(request))
+
+    stored = repository.get_event_by_id("test_workers_001")
+    assert calls == [("Workers test headline", "Body")]
+    assert stored["related_sources"] == [{"source": "AP", "headline": "Workers test headline (AP)"}]
+
+
+class FailingLLMClient:
+    def generate_event(self, system_prompt, user_prompt, json_schema):
+        raise RuntimeError("quota exceeded")
+
+
+def test_failed_llm_analysis_is_not_stored(monkeypatch):
+    """The placeholder event analyze_text returns on an LLM error fails the item instead."""
+    monkeypatch.setattr(intelligence_pipeline, "_llm_client", FailingLLMClient())
+    request = AnalyzeRequest(headline="Workers LLM outage headline", source="Reuters")
+    before = repository.get_stats()["events_count"]
+
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        analyze_item(request_to_item(request))
+
+    assert repository.get_stats()["events_count"] == before
+    # Not marked as stored, so the next poll hands it on again
+    assert not DedupIndex().lookup(content_hash(request.headline, request.source))
+
+
+def test_cycle_metrics_report_when_the_last_item_is_done():
+    metrics = CycleMetrics()
+    assert metrics.item_done("a#1", 30.0, ok=True) is None
+    # The end marker can overtake items still being analyzed
+    assert metrics.close("a#1", 3, time.time() - 2) is None
+    assert metrics.item_done("a#1", 10.0, ok=False) is None
+    report = metrics.item_done("a#1", 20.0, ok=True)
+
+    assert report["items"] == 3 and report["failed"] == 1
+    assert 1.0 < report["items_per_s"] < 2.0
+    assert report["latency_s"] == {"p50": 20.0, "p95": 30.0, "max": 30.0}
+    assert metrics.summary() == {"in_progress": 0, "recent": [report]}
+
+
+def test_in_process_pipeline_reports_cycle_throughput_and_latency():
+    pipeline = WorkerPipeline(fetch_target=produce_cycle, handler=lambda item: None, workers=4, in_process=True, timeout=0.05)
+    pipeline.start()
+    try:
+        wait_for(lambda: pipeline.metrics.summary()["recent"])
+    finally:
+        pipeline.stop(timeout=5.0)
+
+    stats = pipeline.get_stats()
+    report = stats["cycles"]["recent"][0]
+    assert stats["processed"] == ITEMS and stats["fetchers_alive"] == 0
+    assert report["cycle"] == "fetch#1" and report["items"] == ITEMS
+    assert 60 <= report["latency_s"]["p50"] < 65
+
+
+def test_ingestion_stats_endpoint_without_runner():
+    assert TestClient(app).get("/api/ingestion/stats").json() == {"status": "disabled", "data": None}